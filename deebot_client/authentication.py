@@ -2,31 +2,56 @@
 
 from __future__ import annotations
 
+from abc import ABC, abstractmethod
 import asyncio
-from dataclasses import dataclass
+from collections import defaultdict
+from dataclasses import asdict, dataclass
 from http import HTTPStatus
+import os
+from pathlib import Path
+import random
 import time
 from typing import TYPE_CHECKING, Any
 from urllib.parse import urljoin
 
-from aiohttp import ClientResponseError, ClientSession, ClientTimeout, hdrs
+from aiohttp import (
+    ClientResponseError,
+    ClientSession,
+    ClientTimeout,
+    JsonPayload,
+    hdrs,
+)
 
 from .const import COUNTRY_CHINA, PATH_API_USERS_USER, REALM
+from .event_bus import create_refresh_bucket
 from .exceptions import (
+    ApiCircuitOpenError,
     ApiError,
     ApiTimeoutError,
+    ApiUnauthorizedError,
     AuthenticationError,
     InvalidAuthenticationError,
 )
 from .logging_filter import get_logger
 from .models import Credentials
-from .util import cancel, create_task, md5
+from .util import (
+    AdaptiveLimiter,
+    CircuitBreaker,
+    TokenBucket,
+    cancel,
+    create_task,
+    md5,
+)
 from .util.continents import get_continent_url_postfix
 from .util.countries import get_ecovacs_country
+from .util.json import json_dumps, json_loads
+from .util.traffic import TrafficKind
 
 if TYPE_CHECKING:
     from collections.abc import Callable, Coroutine, Mapping
 
+    from .util.traffic import TrafficRecorder
+
 
 _LOGGER = get_logger(__name__)
 
@@ -44,6 +69,20 @@ _META = {
     "deviceType": "1",
 }
 MAX_RETRIES = 3
+_REQUEST_LATENCY_THRESHOLD = 5
+# Responses of these paths contain credentials and are therefore not recorded
+_NOT_RECORDED_PATHS = frozenset({PATH_API_USERS_USER})
+_RETRY_STATUSES = frozenset(
+    {
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.GATEWAY_TIMEOUT,
+    }
+)
+# Statuses, which are returned, if the credentials of the request are not accepted
+_REJECTED_CREDENTIALS_STATUSES = frozenset(
+    {HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN}
+)
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -87,9 +126,115 @@ def create_rest_config(
     )
 
 
+class CredentialStore(ABC):
+    """Store to persist the credentials of an account between restarts."""
+
+    @abstractmethod
+    async def load(self) -> Credentials | None:
+        """Load the stored credentials or return None."""
+
+    @abstractmethod
+    async def save(self, credentials: Credentials) -> None:
+        """Save the given credentials."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove the stored credentials."""
+
+
+class FileCredentialStore(CredentialStore):
+    """Credential store, which saves the credentials in a json file."""
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = Path(path)
+
+    async def load(self) -> Credentials | None:
+        """Load the stored credentials or return None."""
+        return await asyncio.to_thread(self._load)
+
+    def _load(self) -> Credentials | None:
+        try:
+            data = json_loads(self._path.read_bytes())
+            return Credentials(
+                token=data["token"],
+                user_id=data["user_id"],
+                expires_at=int(data["expires_at"]),
+            )
+        except FileNotFoundError:
+            return None
+        except (KeyError, TypeError, ValueError):
+            _LOGGER.warning("Could not parse stored credentials in %s", self._path)
+            return None
+
+    async def save(self, credentials: Credentials) -> None:
+        """Save the given credentials."""
+        await asyncio.to_thread(self._save, credentials)
+
+    def _save(self, credentials: Credentials) -> None:
+        # Write to a temporary file, which is only readable by the owner, and
+        # replace the old one afterwards to never leave a partially written file
+        tmp_path = self._path.with_name(f"{self._path.name}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(json_dumps(asdict(credentials)))
+        tmp_path.replace(self._path)
+
+    async def clear(self) -> None:
+        """Remove the stored credentials."""
+        await asyncio.to_thread(self._path.unlink, missing_ok=True)
+
+
+class RetryPolicy:
+    """Retry policy with exponential backoff, full jitter and a retry budget.
+
+    The budget allows on average budget_rate retries per second with bursts
+    up to budget_capacity, so an outage doesn't multiply the load by the retries.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_attempts: int = MAX_RETRIES,
+        base_delay: float = 5,
+        max_delay: float = 30,
+        budget_rate: float = 0.5,
+        budget_capacity: int = 10,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._budget = TokenBucket(budget_rate, budget_capacity)
+
+    def get_delay(self, attempt: int) -> float:
+        """Return the delay before the retry of the given (zero based) attempt."""
+        return random.uniform(  # noqa: S311
+            0, min(self._max_delay, self._base_delay * 2**attempt)
+        )
+
+    def try_acquire_retry(self) -> bool:
+        """Return True if the retry budget allows another retry."""
+        return self._budget.try_acquire()
+
+
 _TIMEOUT = ClientTimeout(60)
 
 
+def _get_timeout(path: str, request_timeout: float | None) -> ClientTimeout:
+    """Return the timeout of a request.
+
+    Raises ApiTimeoutError, if the request_timeout is not positive,
+    as aiohttp would disable the timeout instead.
+    """
+    if request_timeout is None:
+        return _TIMEOUT
+
+    timeout = ClientTimeout(request_timeout)
+    if request_timeout <= 0:
+        _LOGGER.debug("No time left to call api on path: %s", path)
+        raise ApiTimeoutError(path=path, timeout=timeout)
+    return timeout
+
+
 class _AuthClient:
     """Ecovacs auth client."""
 
@@ -98,10 +243,18 @@ class _AuthClient:
         config: RestConfiguration,
         account_id: str,
         password_hash: str,
+        *,
+        retry_policy: RetryPolicy | None = None,
+        recorder: TrafficRecorder | None = None,
     ) -> None:
         self._config = config
         self._account_id = account_id
         self._password_hash = password_hash
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._recorder = recorder
+        self._circuit_breakers: defaultdict[str, CircuitBreaker] = defaultdict(
+            CircuitBreaker
+        )
 
         self._meta: dict[str, str] = {
             **_META,
@@ -151,7 +304,7 @@ class _AuthClient:
 
             # ecovacs returns a json but content_type header is set to text
             content_type = res.headers.get(hdrs.CONTENT_TYPE, "").lower()
-            json = await res.json(content_type=content_type)
+            json = await res.json(loads=json_loads, content_type=content_type)
             _LOGGER.debug("got %s", json)
             # TODO better error handling # pylint: disable=fixme
             if json["code"] == "0000":
@@ -264,8 +417,14 @@ class _AuthClient:
         query_params: dict[str, Any] | None = None,
         headers: dict[str, Any] | None = None,
         credentials: Credentials | None = None,
+        request_timeout: float | None = None,
     ) -> dict[str, Any]:
-        """Perform a post request."""
+        """Perform a post request.
+
+        The request_timeout (in seconds) overrides the default timeout of each attempt.
+        If it is not positive, ApiTimeoutError is raised without sending the request.
+        """
+        timeout = _get_timeout(path, request_timeout)
         url = urljoin(self._config.portal_url, "api/" + path)
         logger_request_params = f"url={url}, params={query_params}, json={json}"
 
@@ -282,24 +441,38 @@ class _AuthClient:
                 }
             )
 
-        for i in range(MAX_RETRIES):
+        retry_policy = self._retry_policy
+        circuit_breaker = self._circuit_breakers[path]
+        for i in range(retry_policy.max_attempts):
+            if not circuit_breaker.allow_request():
+                _LOGGER.debug("Circuit breaker is open for path: %s", path)
+                raise ApiCircuitOpenError(path)
+
             _LOGGER.debug(
                 "Calling api(%d/%d): %s",
                 i + 1,
-                MAX_RETRIES,
+                retry_policy.max_attempts,
                 logger_request_params,
             )
 
             try:
                 async with self._config.session.post(
                     url,
-                    json=json,
+                    data=JsonPayload(json, dumps=json_dumps),
                     params=query_params,
                     headers=headers,
-                    timeout=_TIMEOUT,
+                    timeout=timeout,
                 ) as res:
                     if res.status == HTTPStatus.OK:
-                        response_data: dict[str, Any] = await res.json()
+                        response_data: dict[str, Any] = await res.json(loads=json_loads)
+                        circuit_breaker.record_success()
+                        if self._recorder and path not in _NOT_RECORDED_PATHS:
+                            self._recorder.record(
+                                TrafficKind.REST,
+                                path,
+                                response_data,
+                                command=json.get("cmdName"),
+                            )
                         _LOGGER.debug(
                             "Success calling api %s, response=%s",
                             logger_request_params,
@@ -318,14 +491,28 @@ class _AuthClient:
                         headers=res.headers,
                     )
             except TimeoutError as ex:
-                _LOGGER.debug("Timeout (%d) reached on path: %s", _TIMEOUT, path)
-                raise ApiTimeoutError(path=path, timeout=_TIMEOUT) from ex
+                circuit_breaker.record_failure()
+                _LOGGER.debug("Timeout (%s) reached on path: %s", timeout, path)
+                raise ApiTimeoutError(path=path, timeout=timeout) from ex
             except ClientResponseError as ex:
                 _LOGGER.debug("Error: %s", logger_request_params, exc_info=True)
-                if ex.status == HTTPStatus.BAD_GATEWAY:
-                    seconds_to_sleep = 10
+                if ex.status < HTTPStatus.INTERNAL_SERVER_ERROR:
+                    # The api is reachable, only the request was not accepted
+                    circuit_breaker.record_success()
+                    if ex.status in _REJECTED_CREDENTIALS_STATUSES:
+                        raise ApiUnauthorizedError from ex
+                    raise ApiError from ex
+
+                circuit_breaker.record_failure()
+                if (
+                    ex.status in _RETRY_STATUSES
+                    and i + 1 < retry_policy.max_attempts
+                    and retry_policy.try_acquire_retry()
+                ):
+                    seconds_to_sleep = retry_policy.get_delay(i)
                     _LOGGER.info(
-                        "Retry calling API due 502: Unfortunately the ecovacs api is unreliable. Retrying in %d seconds",
+                        "Retry calling API due %d: Unfortunately the ecovacs api is unreliable. Retrying in %.1f seconds",
+                        ex.status,
                         seconds_to_sleep,
                     )
 
@@ -333,6 +520,9 @@ class _AuthClient:
                     continue
 
                 raise ApiError from ex
+            except Exception:
+                circuit_breaker.record_failure()
+                raise
 
         raise ApiError("Unknown error occurred")
 
@@ -345,11 +535,17 @@ class Authenticator:
         config: RestConfiguration,
         account_id: str,
         password_hash: str,
+        *,
+        credential_store: CredentialStore | None = None,
+        retry_policy: RetryPolicy | None = None,
+        recorder: TrafficRecorder | None = None,
     ) -> None:
         self._auth_client = _AuthClient(
             config,
             account_id,
             password_hash,
+            retry_policy=retry_policy,
+            recorder=recorder,
         )
 
         self._lock = asyncio.Lock()
@@ -357,26 +553,120 @@ class Authenticator:
             Callable[[Credentials], Coroutine[Any, Any, None]]
         ] = set()
         self._credentials: Credentials | None = None
+        self._credential_store = credential_store
+        # Credentials loaded from the store, which were not verified by a login
+        self._stored_credentials: Credentials | None = None
+        self._load_from_store = credential_store is not None
         self._refresh_handle: asyncio.TimerHandle | None = None
         self._tasks: set[asyncio.Future[Any]] = set()
+        self._limiter = AdaptiveLimiter(
+            10, min_limit=2, max_limit=50, latency_threshold=_REQUEST_LATENCY_THRESHOLD
+        )
+        self._refresh_bucket = create_refresh_bucket()
+
+    @property
+    def limiter(self) -> AdaptiveLimiter:
+        """Return the account wide limiter for authenticated requests."""
+        return self._limiter
+
+    @property
+    def refresh_bucket(self) -> TokenBucket:
+        """Return the account wide bucket, which limits the refreshes of all devices."""
+        return self._refresh_bucket
 
     async def authenticate(self, *, force: bool = False) -> Credentials:
-        """Authenticate on ecovacs servers."""
+        """Authenticate on ecovacs servers.
+
+        Valid credentials are returned without acquiring the lock,
+        which is only needed to perform a login.
+        On the first call, valid credentials of the credential store are used instead of a login.
+        """
+        if not force and (credentials := self._get_valid_credentials()):
+            return credentials
+
         async with self._lock:
+            # Another call could have performed the login while we were waiting
+            if not force and (credentials := self._get_valid_credentials()):
+                return credentials
+
             if (
-                self._credentials is None
-                or force
-                or self._credentials.expires_at < time.time()
+                not force
+                and self._load_from_store
+                and (credentials := await self._load_stored_credentials())
             ):
+                _LOGGER.debug("Using stored credentials")
+                self._stored_credentials = credentials
+            else:
                 _LOGGER.debug("Performing login")
-                self._credentials = await self._auth_client.login()
-                self._cancel_refresh_task()
-                self._create_refresh_task(self._credentials)
+                credentials = await self._auth_client.login()
+                self._stored_credentials = None
+                await self._store_credentials(credentials)
+
+            self._credentials = credentials
+            self._cancel_refresh_task()
+            self._create_refresh_task(credentials)
 
-                for on_changed in self._on_credentials_changed:
-                    create_task(self._tasks, on_changed(self._credentials))
+            for on_changed in self._on_credentials_changed:
+                create_task(self._tasks, on_changed(credentials))
 
-            return self._credentials
+            return credentials
+
+    async def handle_rejected_credentials(self, credentials: Credentials) -> None:
+        """Handle credentials, which were rejected by the ecovacs servers.
+
+        If the rejected credentials are the current ones and were loaded from the
+        credential store, they will be removed and a new login will be performed.
+        Credentials of a login are not touched to avoid login loops.
+        """
+        async with self._lock:
+            if (
+                self._stored_credentials is None
+                or self._stored_credentials != credentials
+                or self._credentials != credentials
+            ):
+                return
+
+            _LOGGER.info("Stored credentials were rejected")
+            self._stored_credentials = None
+            self._credentials = None
+            if self._credential_store:
+                try:
+                    await self._credential_store.clear()
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Could not clear stored credentials")
+
+        await self.authenticate()
+
+    async def _load_stored_credentials(self) -> Credentials | None:
+        # The store is only used once on startup
+        self._load_from_store = False
+        if self._credential_store is None:
+            return None
+
+        try:
+            credentials = await self._credential_store.load()
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Could not load stored credentials")
+            return None
+
+        if credentials is None or credentials.expires_at < time.time():
+            return None
+        return credentials
+
+    async def _store_credentials(self, credentials: Credentials) -> None:
+        if self._credential_store is None:
+            return
+
+        try:
+            await self._credential_store.save(credentials)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Could not store credentials")
+
+    def _get_valid_credentials(self) -> Credentials | None:
+        credentials = self._credentials
+        if credentials is not None and credentials.expires_at >= time.time():
+            return credentials
+        return None
 
     def subscribe(
         self, callback: Callable[[Credentials], Coroutine[Any, Any, None]]
@@ -396,15 +686,27 @@ class Authenticator:
         *,
         query_params: dict[str, Any] | None = None,
         headers: dict[str, Any] | None = None,
+        request_timeout: float | None = None,
     ) -> dict[str, Any]:
-        """Perform an authenticated post request."""
-        return await self._auth_client.post(
-            path,
-            json,
-            query_params=query_params,
-            headers=headers,
-            credentials=await self.authenticate(),
-        )
+        """Perform an authenticated post request.
+
+        The request_timeout (in seconds) overrides the default timeout of the request.
+        If the credentials are rejected, they are handled by handle_rejected_credentials.
+        """
+        credentials = await self.authenticate()
+        try:
+            async with self._limiter.slot():
+                return await self._auth_client.post(
+                    path,
+                    json,
+                    query_params=query_params,
+                    headers=headers,
+                    credentials=credentials,
+                    request_timeout=request_timeout,
+                )
+        except ApiUnauthorizedError:
+            await self.handle_rejected_credentials(credentials)
+            raise
 
     async def teardown(self) -> None:
         """Teardown authenticator."""
@@ -416,7 +718,8 @@ class Authenticator:
             self._refresh_handle.cancel()
 
     def _create_refresh_task(self, credentials: Credentials) -> None:
-        # refresh at 99% of validity
+        # refresh at 99% of validity.
+        # The old credentials are still valid and returned until the login is done
         def refresh() -> None:
             _LOGGER.debug("Refresh token")
 
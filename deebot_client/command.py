@@ -4,13 +4,19 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 import asyncio
+from contextvars import ContextVar
 from dataclasses import dataclass, field
+from enum import IntEnum
 from typing import TYPE_CHECKING, Any, final
 
+from cachetools import TLRUCache
+
 from deebot_client.events import AvailabilityEvent
 from deebot_client.exceptions import (
+    ApiCircuitOpenError,
     ApiTimeoutError,
     DeebotError,
+    MqttError,
 )
 from deebot_client.util import verify_required_class_variables_exists
 
@@ -19,14 +25,29 @@ from .logging_filter import get_logger
 from .message import HandlingResult, HandlingState, Message
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
     from types import MappingProxyType
 
     from .authentication import Authenticator
     from .event_bus import EventBus
     from .models import ApiDeviceInfo
+    from .mqtt_client import MqttClient
 
 _LOGGER = get_logger(__name__)
 
+# Deadline (loop time) of the command, which is executed in the current context
+_COMMAND_DEADLINE: ContextVar[float | None] = ContextVar(
+    "command_deadline", default=None
+)
+
+
+class CommandPriority(IntEnum):
+    """Command priority. Commands with lower values are executed first."""
+
+    INTERACTIVE = 1
+    NORMAL = 2
+    BULK = 3
+
 
 @dataclass(frozen=True)
 class CommandResult(HandlingResult):
@@ -54,11 +75,17 @@ class DeviceCommandResult:
         device_reached (bool): True if the command was targeting the bot, and it responded in time. False otherwise.
                                This value is not indicating if the command was executed successfully.
         raw_response (dict[str, Any]): The command response data.
+        timed_out (bool): True if the command didn't complete before its deadline.
+        from_cache (bool): True if a cached response of the bot was used instead of requesting it.
+        transport_error (bool): True if the command could not be sent or no response was received (e.g. network error).
 
     """
 
     device_reached: bool
     raw_response: dict[str, Any] = field(default_factory=dict)
+    timed_out: bool = False
+    from_cache: bool = False
+    transport_error: bool = False
 
 
 class Command(ABC):
@@ -67,6 +94,19 @@ class Command(ABC):
     _targets_bot: bool = True
     NAME: str
     DATA_TYPE: DataType
+    # True if executing the command doesn't change anything on the device.
+    # Equal idempotent commands, which are executed at the same time, are sent only once.
+    IS_IDEMPOTENT: bool = True
+    # Seconds a successful response is cached. None disables caching.
+    # Should only be set on idempotent commands, which return slow-changing data.
+    CACHE_TTL: float | None = None
+    # Pushed messages, which make a cached response outdated.
+    # Messages handled by the command itself (on*/report*) always do.
+    CACHE_INVALIDATED_BY: tuple[type[Message], ...] = ()
+    # Seconds until the command including its requested commands is cancelled.
+    TIMEOUT: float = 20
+    # Priority of the command, when the device is busy.
+    PRIORITY: CommandPriority = CommandPriority.NORMAL
 
     def __init_subclass__(cls) -> None:
         verify_required_class_variables_exists(cls, ("NAME", "DATA_TYPE"))
@@ -87,32 +127,85 @@ class Command(ABC):
         authenticator: Authenticator,
         device_info: ApiDeviceInfo,
         event_bus: EventBus,
+        *,
+        response_cache: ResponseCache | None = None,
+        mqtt_client: MqttClient | None = None,
+        schedule_command: Callable[[Command], None] | None = None,
+        command_timeout: float | None = None,
     ) -> DeviceCommandResult:
-        """Execute command."""
-        try:
-            result, response = await self._execute(
-                authenticator, device_info, event_bus
-            )
-            if result.state == HandlingState.SUCCESS:
-                # Execute command which are requested by the handler
-                async with asyncio.TaskGroup() as tg:
-                    for requested_command in result.requested_commands:
-                        tg.create_task(
-                            requested_command.execute(
-                                authenticator, device_info, event_bus
-                            )
-                        )
+        """Execute command.
+
+        The command is cancelled, if it doesn't complete within command_timeout
+        seconds (defaults to TIMEOUT). The deadline includes the requested commands,
+        which are executed directly.
+        If a response cache is given, a cached response will be handled instead of
+        calling the api and the cache will be updated after a successful execution.
+        If a mqtt client is given, the command is sent over mqtt p2p first.
+        If schedule_command is given, the commands requested by the handler are
+        passed to it instead of executing them directly.
+        """
+        if command_timeout is None:
+            command_timeout = self.TIMEOUT
 
-                return DeviceCommandResult(
-                    device_reached=self._targets_bot, raw_response=response
-                )
+        try:
+            async with asyncio.timeout(command_timeout) as timeout_cm:
+                _COMMAND_DEADLINE.set(timeout_cm.when())
+                from_cache = False
+                if response_cache is not None and (
+                    cached_response := response_cache.get(self)
+                ):
+                    _LOGGER.debug("Using cached response for command %s", self.NAME)
+                    response = cached_response
+                    result = self.__handle_response(event_bus, response)
+                    from_cache = True
+                else:
+                    result, response = await self._execute(
+                        authenticator, device_info, event_bus, mqtt_client=mqtt_client
+                    )
+                    if (
+                        response_cache is not None
+                        and result.state == HandlingState.SUCCESS
+                    ):
+                        response_cache.update(self, response)
+
+                if result.state == HandlingState.SUCCESS:
+                    if schedule_command:
+                        # The caller is responsible for executing the requested commands
+                        for requested_command in result.requested_commands:
+                            schedule_command(requested_command)
+                    else:
+                        # Execute command which are requested by the handler
+                        async with asyncio.TaskGroup() as tg:
+                            for requested_command in result.requested_commands:
+                                tg.create_task(
+                                    requested_command.execute(
+                                        authenticator,
+                                        device_info,
+                                        event_bus,
+                                        response_cache=response_cache,
+                                        mqtt_client=mqtt_client,
+                                    )
+                                )
+
+                    return DeviceCommandResult(
+                        device_reached=self._targets_bot,
+                        raw_response=response,
+                        from_cache=from_cache,
+                    )
 
+        except (TimeoutError, ApiTimeoutError):
+            _LOGGER.warning(
+                "Could not execute command %s: Timeout reached",
+                self.NAME,
+            )
+            return DeviceCommandResult(device_reached=False, timed_out=True)
         except Exception:  # pylint: disable=broad-except
             _LOGGER.warning(
                 "Could not execute command %s",
                 self.NAME,
                 exc_info=True,
             )
+            return DeviceCommandResult(device_reached=False, transport_error=True)
         return DeviceCommandResult(device_reached=False)
 
     async def _execute(
@@ -120,13 +213,25 @@ class Command(ABC):
         authenticator: Authenticator,
         device_info: ApiDeviceInfo,
         event_bus: EventBus,
+        *,
+        mqtt_client: MqttClient | None = None,
     ) -> tuple[CommandResult, dict[str, Any]]:
         """Execute command."""
         try:
-            response = await self._execute_api_request(authenticator, device_info)
-        except ApiTimeoutError:
+            response = None
+            if (
+                mqtt_client is not None
+                and self._targets_bot
+                and self.DATA_TYPE == DataType.JSON
+            ):
+                response = await self._execute_mqtt_p2p_request(
+                    mqtt_client, device_info
+                )
+            if response is None:
+                response = await self._execute_api_request(authenticator, device_info)
+        except ApiCircuitOpenError:
             _LOGGER.warning(
-                "Could not execute command %s: Timeout reached",
+                "Could not execute command %s: Api is unavailable",
                 self.NAME,
             )
             return CommandResult(HandlingState.ERROR), {}
@@ -148,6 +253,40 @@ class Command(ABC):
             _LOGGER.warning("Could not parse %s: %s", self.NAME, response)
         return result, response
 
+    async def _execute_mqtt_p2p_request(
+        self, mqtt_client: MqttClient, device_info: ApiDeviceInfo
+    ) -> dict[str, Any] | None:
+        """Send the command over mqtt p2p.
+
+        If the command could not be sent, None is returned to fall back to the api.
+        If no response was received in time, the bot may have executed the command
+        already. Therefore only idempotent commands fall back to the api and
+        TimeoutError is raised for all others.
+
+        :return: The response in the same format as the api returns it or None on failure
+        """
+        try:
+            response = await mqtt_client.send_p2p_command(
+                self.NAME, self._get_payload(), device_info, self.DATA_TYPE
+            )
+        except MqttError:
+            _LOGGER.debug(
+                "Could not send command %s over mqtt p2p. Falling back to the api",
+                self.NAME,
+                exc_info=True,
+            )
+            return None
+        except TimeoutError:
+            if not self.IS_IDEMPOTENT:
+                raise
+            _LOGGER.debug(
+                "No mqtt p2p response for command %s. Falling back to the api",
+                self.NAME,
+            )
+            return None
+
+        return {"ret": "ok", "resp": response}
+
     async def _execute_api_request(
         self, authenticator: Authenticator, device_info: ApiDeviceInfo
     ) -> dict[str, Any]:
@@ -177,8 +316,15 @@ class Command(ABC):
             payload,
             query_params=query_params,
             headers=REQUEST_HEADERS,
+            request_timeout=self._get_request_timeout(),
         )
 
+    def _get_request_timeout(self) -> float | None:
+        """Return the seconds until the deadline of the command or None if unknown."""
+        if (deadline := _COMMAND_DEADLINE.get()) is None:
+            return None
+        return max(deadline - asyncio.get_running_loop().time(), 0)
+
     def __handle_response(
         self, event_bus: EventBus, response: dict[str, Any]
     ) -> CommandResult:
@@ -223,7 +369,16 @@ class Command(ABC):
         return False
 
     def __hash__(self) -> int:
-        return hash(self.NAME) + hash(self._args)
+        return hash(self.NAME) + hash(_make_hashable(self._args))
+
+
+def _make_hashable(value: Any) -> Any:
+    """Convert dicts and lists recursively into their hashable counterparts."""
+    if isinstance(value, dict):
+        return frozenset((key, _make_hashable(val)) for key, val in value.items())
+    if isinstance(value, list):
+        return tuple(_make_hashable(val) for val in value)
+    return value
 
 
 class CommandWithMessageHandling(Command, Message, ABC):
@@ -338,6 +493,8 @@ class SetCommand(CommandWithMessageHandling, CommandMqttP2P, ABC):
     Command needs to be linked to the "get" command, for handling (updating) the sensors.
     """
 
+    IS_IDEMPOTENT = False
+
     @property
     @abstractmethod
     def get_command(self) -> type[GetCommand]:
@@ -349,3 +506,53 @@ class SetCommand(CommandWithMessageHandling, CommandMqttP2P, ABC):
         result = self.handle(event_bus, response)
         if result.state == HandlingState.SUCCESS and isinstance(self._args, dict):
             self.get_command.handle_set_args(event_bus, self._args)
+
+
+def _get_expire_time(command: Command, _: dict[str, Any], now: float) -> float:
+    return now + (command.CACHE_TTL or 0)
+
+
+class ResponseCache:
+    """Cache for the responses of commands, which have a CACHE_TTL set."""
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self._cache: TLRUCache[Command, dict[str, Any]] = TLRUCache(
+            maxsize, _get_expire_time
+        )
+
+    def get(self, command: Command) -> dict[str, Any] | None:
+        """Return the cached response for the given command or None."""
+        return self._cache.get(command)
+
+    def update(self, command: Command, response: dict[str, Any]) -> None:
+        """Update the cache after the given command was executed successfully."""
+        if not command.IS_IDEMPOTENT:
+            self.invalidate_by(command)
+        elif command.CACHE_TTL:
+            self._cache[command] = response
+
+    def invalidate_by(self, command: Command) -> None:
+        """Invalidate all cached responses, which could be outdated by executing the given command."""
+        if isinstance(command, SetCommand):
+            self.invalidate(command.get_command)
+        elif not command.IS_IDEMPOTENT:
+            # We don't know what is changed by the command
+            self.invalidate()
+
+    def invalidate_by_message(self, message: type[Message]) -> None:
+        """Invalidate all cached responses, which are outdated by the given pushed message."""
+        for command in [
+            c
+            for c in self._cache
+            if isinstance(c, message) or message in c.CACHE_INVALIDATED_BY
+        ]:
+            self._cache.pop(command, None)
+
+    def invalidate(self, type_: type[Any] | None = None) -> None:
+        """Invalidate all cached responses or only the ones of commands of the given type."""
+        if type_ is None:
+            self._cache.clear()
+            return
+
+        for command in [c for c in self._cache if isinstance(c, type_)]:
+            self._cache.pop(command, None)
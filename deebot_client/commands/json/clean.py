@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, TypedDict
 
 from deebot_client.events import StateEvent
 from deebot_client.logging_filter import get_logger
@@ -15,10 +15,23 @@ if TYPE_CHECKING:
     from deebot_client.authentication import Authenticator
     from deebot_client.command import CommandResult
     from deebot_client.event_bus import EventBus
+    from deebot_client.mqtt_client import MqttClient
 
 _LOGGER = get_logger(__name__)
 
 
+class _CleanState(TypedDict, total=False):
+    motionState: str
+    type: str
+    content: dict[str, Any]
+
+
+class _CleanInfoData(TypedDict, total=False):
+    trigger: str
+    state: str
+    cleanState: _CleanState
+
+
 class Clean(ExecuteCommand):
     """Clean command."""
 
@@ -32,6 +45,8 @@ class Clean(ExecuteCommand):
         authenticator: Authenticator,
         device_info: ApiDeviceInfo,
         event_bus: EventBus,
+        *,
+        mqtt_client: MqttClient | None = None,
     ) -> tuple[CommandResult, dict[str, Any]]:
         """Execute command."""
         state = event_bus.get_last_event(StateEvent)
@@ -47,7 +62,9 @@ class Clean(ExecuteCommand):
             ):
                 self._args = self._get_args(CleanAction.RESUME)
 
-        return await super()._execute(authenticator, device_info, event_bus)
+        return await super()._execute(
+            authenticator, device_info, event_bus, mqtt_client=mqtt_client
+        )
 
     def _get_args(self, action: CleanAction) -> dict[str, Any]:
         args = {"act": action.value}
@@ -108,6 +125,7 @@ class GetCleanInfo(JsonCommandWithMessageHandling, MessageBodyDataDict):
     """Get clean info command."""
 
     NAME = "getCleanInfo"
+    SCHEMA = _CleanInfoData
 
     @classmethod
     def _handle_body_data_dict(
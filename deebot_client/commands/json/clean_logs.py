@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any
 
-from deebot_client.command import CommandResult
+from deebot_client.command import CommandPriority, CommandResult
 from deebot_client.const import PATH_API_LG_LOG, REQUEST_HEADERS
 from deebot_client.events import CleanJobStatus, CleanLogEntry, CleanLogEvent
 from deebot_client.logging_filter import get_logger
@@ -24,6 +24,7 @@ class GetCleanLogs(JsonCommand):
 
     _targets_bot: bool = False
     NAME = "GetCleanLogs"
+    PRIORITY = CommandPriority.BULK
 
     def __init__(self, count: int = 0) -> None:
         super().__init__({"count": count})
@@ -51,6 +52,7 @@ class GetCleanLogs(JsonCommand):
             json,
             query_params=query_params,
             headers=REQUEST_HEADERS,
+            request_timeout=self._get_request_timeout(),
         )
 
     def _handle_response(
@@ -9,6 +9,7 @@ from typing import TYPE_CHECKING, Any
 
 from deebot_client.command import (
     Command,
+    CommandPriority,
     CommandWithMessageHandling,
     GetCommand,
     InitParam,
@@ -63,6 +64,9 @@ class JsonCommandWithMessageHandling(
 class ExecuteCommand(JsonCommandWithMessageHandling, ABC):
     """Command, which is executing something (ex. Charge)."""
 
+    IS_IDEMPOTENT = False
+    PRIORITY = CommandPriority.INTERACTIVE
+
     @classmethod
     def _handle_body(cls, _: EventBus, body: dict[str, Any]) -> HandlingResult:
         """Handle message->body and notify the correct event subscribers.
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any
 
-from deebot_client.command import CommandResult
+from deebot_client.command import CommandPriority, CommandResult
 from deebot_client.commands.json.common import JsonCommand
 from deebot_client.events import CustomCommandEvent
 from deebot_client.logging_filter import get_logger
@@ -20,6 +20,9 @@ class CustomCommand(JsonCommand):
     """Custom command, used when user wants to execute a command, which is not part of this library."""
 
     NAME: str = "CustomCommand"
+    # We don't know what the command is doing
+    IS_IDEMPOTENT = False
+    PRIORITY = CommandPriority.INTERACTIVE
 
     def __init__(
         self, name: str, args: dict[str, Any] | list[Any] | None = None
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from types import MappingProxyType
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, TypedDict
 
 from deebot_client.command import CommandMqttP2P, InitParam
 from deebot_client.events import LifeSpan, LifeSpanEvent
@@ -16,10 +16,18 @@ if TYPE_CHECKING:
     from deebot_client.util import LST
 
 
+class _LifeSpanData(TypedDict):
+    type: str
+    left: int
+    total: int
+
+
 class GetLifeSpan(JsonCommandWithMessageHandling, MessageBodyDataList):
     """Get life span command."""
 
     NAME = "getLifeSpan"
+    SCHEMA = list[_LifeSpanData]
+    CACHE_TTL = 300
 
     def __init__(self, life_spans: LST[LifeSpan]) -> None:
         args = [life_span.value for life_span in life_spans]
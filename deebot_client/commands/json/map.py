@@ -2,11 +2,10 @@
 
 from __future__ import annotations
 
-import json
 from types import MappingProxyType
 from typing import TYPE_CHECKING, Any
 
-from deebot_client.command import Command, CommandResult
+from deebot_client.command import Command, CommandPriority, CommandResult
 from deebot_client.events import (
     MajorMapEvent,
     MapSetEvent,
@@ -18,7 +17,9 @@ from deebot_client.events import (
 from deebot_client.events.map import CachedMapInfoEvent
 from deebot_client.logging_filter import get_logger
 from deebot_client.message import HandlingResult, HandlingState, MessageBodyDataDict
+from deebot_client.messages.json.map import OnMapSetV2
 from deebot_client.rs.util import decompress_7z_base64_data
+from deebot_client.util.json import json_loads
 
 from .common import JsonCommandWithMessageHandling
 
@@ -33,6 +34,9 @@ class GetCachedMapInfo(JsonCommandWithMessageHandling, MessageBodyDataDict):
     """Get cached map info command."""
 
     NAME = "getCachedMapInfo"
+    # Map data is large, therefore the bot needs more time to respond
+    TIMEOUT = 60
+    PRIORITY = CommandPriority.BULK
     # version definition for using type of getMapSet v1 or v2
     _map_set_command: type[GetMapSet | GetMapSetV2]
 
@@ -95,6 +99,8 @@ class GetMajorMap(JsonCommandWithMessageHandling, MessageBodyDataDict):
     """Get major map command."""
 
     NAME = "getMajorMap"
+    TIMEOUT = 60
+    PRIORITY = CommandPriority.BULK
 
     @classmethod
     def _handle_body_data_dict(
@@ -136,6 +142,8 @@ class GetMapSet(JsonCommandWithMessageHandling, MessageBodyDataDict):
     _ARGS_SUBSETS = "subsets"
 
     NAME = "getMapSet"
+    TIMEOUT = 60
+    PRIORITY = CommandPriority.BULK
 
     def __init__(
         self,
@@ -223,6 +231,11 @@ class GetMapSubSet(JsonCommandWithMessageHandling, MessageBodyDataDict):
     )
 
     NAME = "getMapSubSet"
+    TIMEOUT = 60
+    PRIORITY = CommandPriority.BULK
+    # Already known subsets are not requested again on each map set refresh
+    CACHE_TTL = 300
+    CACHE_INVALIDATED_BY = (OnMapSetV2,)
 
     def __init__(
         self,
@@ -305,7 +318,7 @@ class GetMapSetV2(GetMapSet):
     ) -> list[int] | None:
         """Return subset ids."""
         # subset is based64 7z compressed
-        subsets = json.loads(decompress_7z_base64_data(data["subsets"]).decode())
+        subsets = json_loads(decompress_7z_base64_data(data["subsets"]))
 
         match data["type"]:
             case MapSetType.ROOMS:
@@ -342,6 +355,8 @@ class GetMapTrace(JsonCommandWithMessageHandling, MessageBodyDataDict):
     _TRACE_POINT_COUNT = 200
 
     NAME = "getMapTrace"
+    TIMEOUT = 60
+    PRIORITY = CommandPriority.BULK
 
     def __init__(self, trace_start: int = 0) -> None:
         super().__init__(
@@ -388,6 +403,8 @@ class GetMinorMap(JsonCommandWithMessageHandling, MessageBodyDataDict):
     """Get minor map command."""
 
     NAME = "getMinorMap"
+    TIMEOUT = 60
+    PRIORITY = CommandPriority.BULK
 
     def __init__(self, *, map_id: str, piece_index: int) -> None:
         super().__init__({"mid": map_id, "type": "ol", "pieceIndex": piece_index})
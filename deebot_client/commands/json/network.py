@@ -17,6 +17,7 @@ class GetNetInfo(JsonCommandWithMessageHandling, MessageBodyDataDict):
     """Get network info command."""
 
     NAME = "getNetInfo"
+    CACHE_TTL = 600
 
     @classmethod
     def _handle_body_data_dict(
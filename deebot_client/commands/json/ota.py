@@ -19,6 +19,7 @@ class GetOta(JsonGetCommand):
     """Get ota command."""
 
     NAME = "getOta"
+    CACHE_TTL = 600
 
     @classmethod
     def _handle_body_data_dict(
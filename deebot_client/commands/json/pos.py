@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, NotRequired, TypedDict
 
 from deebot_client.events import Position, PositionsEvent
 from deebot_client.message import HandlingResult, MessageBodyDataDict
@@ -14,10 +14,22 @@ if TYPE_CHECKING:
     from deebot_client.event_bus import EventBus
 
 
+class _Position(TypedDict):
+    x: int
+    y: int
+    a: NotRequired[int]
+
+
+class _PosData(TypedDict, total=False):
+    deebotPos: _Position | list[_Position]
+    chargePos: _Position | list[_Position]
+
+
 class GetPos(JsonCommandWithMessageHandling, MessageBodyDataDict):
     """Get volume command."""
 
     NAME = "getPos"
+    SCHEMA = _PosData
 
     def __init__(self) -> None:
         super().__init__(["chargePos", "deebotPos"])
@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, TypedDict
 
 from deebot_client.events import StatsEvent, TotalStatsEvent
 from deebot_client.message import HandlingResult, MessageBodyDataDict
+from deebot_client.messages.json.stats import ReportStats
 
 from .common import JsonCommandWithMessageHandling
 
@@ -13,10 +14,17 @@ if TYPE_CHECKING:
     from deebot_client.event_bus import EventBus
 
 
+class _StatsData(TypedDict, total=False):
+    area: int
+    time: int
+    type: str
+
+
 class GetStats(JsonCommandWithMessageHandling, MessageBodyDataDict):
     """Get stats command."""
 
     NAME = "getStats"
+    SCHEMA = _StatsData
 
     @classmethod
     def _handle_body_data_dict(
@@ -39,6 +47,9 @@ class GetTotalStats(JsonCommandWithMessageHandling, MessageBodyDataDict):
     """Get stats command."""
 
     NAME = "getTotalStats"
+    CACHE_TTL = 300
+    # A finished clean job changes the totals
+    CACHE_INVALIDATED_BY = (ReportStats,)
 
     @classmethod
     def _handle_body_data_dict(
@@ -19,6 +19,7 @@ class GetVolume(JsonGetCommand):
     """Get volume command."""
 
     NAME = "getVolume"
+    CACHE_TTL = 300
 
     @classmethod
     def _handle_body_data_dict(
@@ -8,7 +8,12 @@ from xml.etree.ElementTree import Element, SubElement
 
 from defusedxml import ElementTree  # type: ignore[import-untyped]
 
-from deebot_client.command import Command, CommandWithMessageHandling, SetCommand
+from deebot_client.command import (
+    Command,
+    CommandPriority,
+    CommandWithMessageHandling,
+    SetCommand,
+)
 from deebot_client.const import DataType
 from deebot_client.logging_filter import get_logger
 from deebot_client.message import HandlingResult, HandlingState, MessageStr
@@ -65,6 +70,9 @@ class XmlCommandWithMessageHandling(
 class ExecuteCommand(XmlCommandWithMessageHandling, ABC):
     """Command, which is executing something (ex. Charge)."""
 
+    IS_IDEMPOTENT = False
+    PRIORITY = CommandPriority.INTERACTIVE
+
     @classmethod
     def _handle_xml(cls, _: EventBus, xml: Element) -> HandlingResult:
         """Handle message->xml and notify the correct event subscribers.
@@ -3,17 +3,19 @@
 from __future__ import annotations
 
 import asyncio
+from collections import Counter, deque
 from collections.abc import Callable, Coroutine
 from contextlib import suppress
 from datetime import datetime
-import json
+import time
 from typing import TYPE_CHECKING, Any, Final
 
 from deebot_client.events.network import NetworkInfoEvent
 from deebot_client.mqtt_client import MqttClient, SubscriberInfo
-from deebot_client.util import cancel
+from deebot_client.util import AdaptiveLimiter, TokenBucket, cancel, create_task
 
-from .command import Command
+from .command import Command, DeviceCommandResult, ResponseCache
+from .commands import COMMANDS
 from .event_bus import EventBus
 from .events import (
     AvailabilityEvent,
@@ -27,21 +29,129 @@ from .events import (
 )
 from .logging_filter import get_logger
 from .map import Map
+from .message import Message
 from .messages import get_message
 from .models import DeviceInfo, State
 from .rs.map import PositionType
 
 if TYPE_CHECKING:
     from .authentication import Authenticator
-    from .command import DeviceCommandResult
 
 _LOGGER = get_logger(__name__)
 _AVAILABLE_CHECK_INTERVAL = 60
+# Commands are waiting for the device response, which can take some seconds
+_COMMAND_LATENCY_THRESHOLD = 10
+_REQUESTED_COMMANDS_WORKERS = 2
 
 
 DeviceCommandExecute = Callable[[Command], Coroutine[Any, Any, dict[str, Any]]]
 
 
+class _RequestedCommands:
+    """Join handle for the commands requested by one command.
+
+    The requested commands inherit the deadline (loop time) of the requesting one.
+    """
+
+    def __init__(self, planner: _CommandPlanner, deadline: float) -> None:
+        self._planner = planner
+        self._deadline = deadline
+        self._futures: list[asyncio.Future[None]] = []
+
+    def schedule(self, command: Command) -> None:
+        """Schedule the given requested command."""
+        self._futures.append(self._planner.schedule(command, self._deadline))
+
+    async def wait(self) -> None:
+        """Wait until the requested commands and their requested ones are done."""
+        if self._futures:
+            await asyncio.wait(self._futures)
+
+
+class _CommandPlanner:
+    """Planner, which executes the commands requested by other commands.
+
+    The requested commands (e.g. all map subsets of a map set) are executed by a
+    bounded amount of workers instead of all at once.
+    A command equal to an already queued one is skipped.
+    Each scheduled command has a future, which is done after the command and
+    all commands requested by it are done.
+    Commands, which are still queued at their deadline, are skipped.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[Command, float], Coroutine[Any, Any, _RequestedCommands]],
+    ) -> None:
+        self._execute = execute
+        self._queue: deque[tuple[Command, float, asyncio.Future[None]]] = deque()
+        self._queued: dict[Command, asyncio.Future[None]] = {}
+        self._tasks: set[asyncio.Future[Any]] = set()
+        self._workers = 0
+
+    def schedule(self, command: Command, deadline: float) -> asyncio.Future[None]:
+        """Schedule the given command and return its future."""
+        if (future := self._queued.get(command)) is not None:
+            _LOGGER.debug("Command %s is already scheduled", command.NAME)
+            return future
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((command, deadline, future))
+        self._queued[command] = future
+        if self._workers < _REQUESTED_COMMANDS_WORKERS:
+            self._workers += 1
+            create_task(self._tasks, self._work())
+        return future
+
+    async def teardown(self) -> None:
+        """Clear all scheduled commands and cancel the running ones."""
+        for _, _, future in self._queue:
+            future.cancel()
+        self._queue.clear()
+        self._queued.clear()
+        await cancel(self._tasks)
+        self._workers = 0
+
+    async def _work(self) -> None:
+        while self._queue:
+            command, deadline, future = self._queue.popleft()
+            self._queued.pop(command, None)
+            if deadline <= asyncio.get_running_loop().time():
+                _LOGGER.debug(
+                    "Skipping requested command %s: Deadline reached", command.NAME
+                )
+                future.set_result(None)
+                continue
+
+            try:
+                requested = await self._execute(command, deadline)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Could not execute requested command %s", command.NAME
+                )
+                future.set_result(None)
+                continue
+
+            # The requested commands need a worker too, therefore don't wait here
+            create_task(self._tasks, self._join(requested, future))
+
+        self._workers -= 1
+
+    @staticmethod
+    async def _join(
+        requested: _RequestedCommands, future: asyncio.Future[None]
+    ) -> None:
+        try:
+            await requested.wait()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        future.set_result(None)
+
+
 class Device:
     """Device representation."""
 
@@ -49,22 +159,45 @@ class Device:
         self,
         device_info: DeviceInfo,
         authenticator: Authenticator,
+        *,
+        refresh_bucket: TokenBucket | None = None,
     ) -> None:
+        """Init.
+
+        By default, the refreshes of all devices of the account are limited by
+        the refresh bucket of the authenticator. Another bucket (see
+        create_refresh_bucket) can be given to share it between other devices.
+        """
         self._device_info = device_info
         self.device_info: Final = device_info.api
         self.capabilities: Final = device_info.static.capabilities
         self._authenticator = authenticator
 
-        self._semaphore = asyncio.Semaphore(3)
+        self.limiter: Final = AdaptiveLimiter(
+            3, max_limit=10, latency_threshold=_COMMAND_LATENCY_THRESHOLD
+        )
+        self._tasks: set[asyncio.Future[Any]] = set()
+        self._commands_in_flight: dict[
+            Command, asyncio.Task[tuple[DeviceCommandResult, _RequestedCommands]]
+        ] = {}
+        self._response_cache: Final = ResponseCache()
+        self._command_planner: Final = _CommandPlanner(self._start_requested_command)
+        # Number of timed out commands by command name
+        self.command_timeouts: Final[Counter[str]] = Counter()
         self._state: StateEvent | None = None
         self._last_time_available: datetime = datetime.now()
         self._available_task: asyncio.Task[Any] | None = None
         self._unsubscribe: Callable[[], None] | None = None
+        self._mqtt_client: MqttClient | None = None
 
         self.fw_version: str | None = None
         self.mac: str | None = None
         self.events: Final[EventBus] = EventBus(
-            self.execute_command, self.capabilities.get_refresh_commands
+            self.execute_command,
+            self.capabilities.get_refresh_commands,
+            refresh_bucket=authenticator.refresh_bucket
+            if refresh_bucket is None
+            else refresh_bucket,
         )
 
         self.map: Final[Map] = Map(self.execute_command, self.events)
@@ -110,21 +243,41 @@ class Device:
 
         self.events.subscribe(NetworkInfoEvent, on_network)
 
-    async def execute_command(self, command: Command) -> dict[str, Any]:
+    async def execute_command(
+        self, command: Command, *, command_timeout: float | None = None
+    ) -> dict[str, Any]:
         """Execute given command.
 
+        The command_timeout overrides the TIMEOUT of the command.
+
         Returns
         -------
             command_response (dict[str, Any]) The command raw response.
 
         """
-        return (await self._execute_command(command)).raw_response
+        return (
+            await self._execute_command(command, command_timeout=command_timeout)
+        ).raw_response
+
+    async def initialize(
+        self, client: MqttClient, *, use_p2p_transport: bool = False
+    ) -> None:
+        """Initialize vacumm bot, which includes MQTT-subscription and starting the available check.
+
+        If use_p2p_transport is True, commands are sent over mqtt p2p instead of the api.
+        The api is still used as fallback.
+        """
+        if use_p2p_transport:
+            self._mqtt_client = client
 
-    async def initialize(self, client: MqttClient) -> None:
-        """Initialize vacumm bot, which includes MQTT-subscription and starting the available check."""
         if self._unsubscribe is None:
             self._unsubscribe = await client.subscribe(
-                SubscriberInfo(self._device_info, self.events, self._handle_message)
+                SubscriberInfo(
+                    self._device_info,
+                    self.events,
+                    self._handle_message,
+                    self._response_cache.invalidate_by,
+                )
             )
 
         if self._available_task is None or self._available_task.done():
@@ -135,11 +288,15 @@ class Device:
         if self._unsubscribe:
             self._unsubscribe()
             self._unsubscribe = None
+        self._mqtt_client = None
 
         if self._available_task and self._available_task.cancel():
             with suppress(asyncio.CancelledError):
                 await self._available_task
 
+        await self._command_planner.teardown()
+        await cancel(self._tasks)
+
         await self.events.teardown()
         await self.map.teardown()
 
@@ -156,7 +313,11 @@ class Device:
                         tasks.add(asyncio.create_task(self._execute_command(command)))
 
                     result = await asyncio.gather(*tasks)
-                    self._set_available(available=all(r.device_reached for r in result))
+                    self._set_available(
+                        available=all(
+                            r.device_reached and not r.from_cache for r in result
+                        )
+                    )
                 except Exception:  # pylint: disable=broad-exception-caught
                     _LOGGER.debug(
                         "An exception occurred during the available check",
@@ -168,16 +329,125 @@ class Device:
     async def _execute_command(
         self,
         command: Command,
+        *,
+        command_timeout: float | None = None,
     ) -> DeviceCommandResult:
-        """Execute given command."""
-        async with self._semaphore:
+        """Execute given command and wait for the commands requested by it.
+
+        The command_timeout (defaults to TIMEOUT of the command) includes
+        the requested commands.
+        """
+        if command_timeout is None:
+            command_timeout = command.TIMEOUT
+        deadline = asyncio.get_running_loop().time() + command_timeout
+        result, requested = await self._start_command(command, deadline)
+        try:
+            async with asyncio.timeout_at(deadline):
+                await requested.wait()
+        except TimeoutError:
+            _LOGGER.warning(
+                "Requested commands of %s were not done before the deadline",
+                command.NAME,
+            )
+        return result
+
+    async def _start_requested_command(
+        self, command: Command, deadline: float
+    ) -> _RequestedCommands:
+        """Execute given requested command without waiting for its requested ones."""
+        _, requested = await self._start_command(command, deadline)
+        return requested
+
+    async def _start_command(
+        self, command: Command, deadline: float
+    ) -> tuple[DeviceCommandResult, _RequestedCommands]:
+        """Execute given command and return the handle of its requested commands.
+
+        An idempotent command, which is equal to a command already in flight,
+        is not sent again. Instead, it will get the result of the in-flight one.
+        """
+        if not command.IS_IDEMPOTENT:
+            return await self._send_command(command, deadline)
+
+        if (task := self._commands_in_flight.get(command)) is None:
+            task = create_task(self._tasks, self._send_command(command, deadline))
+            self._commands_in_flight[command] = task
+
+            def remove_in_flight(
+                _: asyncio.Task[tuple[DeviceCommandResult, _RequestedCommands]],
+            ) -> None:
+                if self._commands_in_flight.get(command) is task:
+                    del self._commands_in_flight[command]
+
+            task.add_done_callback(remove_in_flight)
+        else:
+            _LOGGER.debug(
+                "Command %s is already in flight. Waiting for its result", command.NAME
+            )
+
+        # Shield the task, so one cancelled caller doesn't cancel it for all others
+        return await asyncio.shield(task)
+
+    async def _send_command(
+        self,
+        command: Command,
+        deadline: float,
+    ) -> tuple[DeviceCommandResult, _RequestedCommands]:
+        """Send given command to the device.
+
+        A command, which reaches its deadline while waiting for the limiter,
+        is not sent and reported as timed out.
+        """
+        requested = _RequestedCommands(self._command_planner, deadline)
+        try:
+            # The time waited for the limiter counts towards the deadline
+            async with asyncio.timeout_at(deadline):
+                await self.limiter.acquire(command.PRIORITY)
+        except TimeoutError:
+            return self._handle_expired_command(command), requested
+
+        command_timeout = deadline - asyncio.get_running_loop().time()
+        if command_timeout <= 0:
+            self.limiter.release_unmeasured()
+            return self._handle_expired_command(command), requested
+
+        start = time.monotonic()
+        result: DeviceCommandResult | None = None
+        try:
             result = await command.execute(
-                self._authenticator, self.device_info, self.events
+                self._authenticator,
+                self.device_info,
+                self.events,
+                response_cache=self._response_cache,
+                mqtt_client=self._mqtt_client,
+                schedule_command=requested.schedule,
+                command_timeout=command_timeout,
             )
-            if result.device_reached:
-                self._set_available(available=True)
+        finally:
+            if result is None or result.from_cache:
+                self.limiter.release_unmeasured()
+            else:
+                # Execute doesn't raise, therefore check the result for failures.
+                # An unreached bot (e.g. offline) is answered by the api and no failure
+                self.limiter.release(
+                    time.monotonic() - start,
+                    failed=result.timed_out or result.transport_error,
+                )
 
-            return result
+        if result.device_reached and not result.from_cache:
+            self._set_available(available=True)
+        elif result.timed_out:
+            self.command_timeouts[command.NAME] += 1
+
+        return result, requested
+
+    def _handle_expired_command(self, command: Command) -> DeviceCommandResult:
+        _LOGGER.warning(
+            "Could not execute command %s: Deadline reached before sending",
+            command.NAME,
+        )
+        self.command_timeouts[command.NAME] += 1
+        return DeviceCommandResult(device_reached=False, timed_out=True)
 
     def _set_available(self, *, available: bool) -> None:
         """Set available."""
@@ -186,6 +456,31 @@ class Device:
 
         self.events.notify(AvailabilityEvent(available=available))
 
+    def inject_message(
+        self, message_name: str, message_data: str | bytes | bytearray | dict[str, Any]
+    ) -> None:
+        """Handle the given message as it would have been received over mqtt.
+
+        Used to replay recorded traffic.
+        """
+        self._handle_message(message_name, message_data)
+
+    def inject_response(self, command_name: str, response: dict[str, Any]) -> None:
+        """Handle the given api response of a command as it would have been received.
+
+        The response is handled by the message handling of the command,
+        therefore no requested commands are executed.
+        Used to replay recorded traffic.
+        """
+        command = COMMANDS.get(self._device_info.static.data_type, {}).get(command_name)
+        if command is None or not issubclass(command, Message):
+            _LOGGER.debug("Command %s doesn't support message handling", command_name)
+            return
+
+        if response.get("ret") == "ok":
+            self._set_available(available=True)
+            self._process_message(command, response.get("resp", response))
+
     def _handle_message(
         self, message_name: str, message_data: str | bytes | bytearray | dict[str, Any]
     ) -> None:
@@ -197,19 +492,27 @@ class Device:
         """
         self._set_available(available=True)
 
-        try:
-            _LOGGER.debug("Try to handle message %s: %s", message_name, message_data)
-
-            if message := get_message(message_name, self._device_info.static.data_type):
-                if isinstance(message_data, dict):
-                    data = message_data
-                else:
-                    data = json.loads(message_data)
+        _LOGGER.debug("Try to handle message %s: %s", message_name, message_data)
+        if message := get_message(message_name, self._device_info.static.data_type):
+            self._process_message(message, message_data)
 
-                fw_version = data.get("header", {}).get("fwVer", None)
-                if fw_version:
-                    self.fw_version = fw_version
-
-                message.handle(self.events, data)
+    def _process_message(
+        self,
+        message: type[Message],
+        message_data: str | bytes | bytearray | dict[str, Any],
+    ) -> None:
+        try:
+            if isinstance(message_data, dict):
+                data = message_data
+            else:
+                data = message.decode(message_data)
+
+            fw_version = data.get("header", {}).get("fwVer", None)
+            if fw_version:
+                self.fw_version = fw_version
+
+            # The pushed message makes cached responses of the same type outdated
+            self._response_cache.invalidate_by_message(message)
+            message.handle(self.events, data)
         except Exception:  # pylint: disable=broad-except
             _LOGGER.exception("An exception occurred during handling message")
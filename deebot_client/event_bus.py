@@ -4,13 +4,30 @@ from __future__ import annotations
 
 import asyncio
 from datetime import UTC, datetime, timedelta
+from enum import IntEnum, unique
+import heapq
+import itertools
 import threading
+from types import MappingProxyType
 from typing import TYPE_CHECKING, Any, Final, Generic, TypeVar
 
-from .events import AvailabilityEvent, Event, StateEvent
+from .events import (
+    AvailabilityEvent,
+    BatteryEvent,
+    CleanLogEvent,
+    ErrorEvent,
+    Event,
+    LifeSpanEvent,
+    NetworkInfoEvent,
+    OtaEvent,
+    ReportStatsEvent,
+    StateEvent,
+    StatsEvent,
+    TotalStatsEvent,
+)
 from .logging_filter import get_logger
 from .models import State
-from .util import cancel, create_task
+from .util import TokenBucket, cancel, create_task
 
 if TYPE_CHECKING:
     from collections.abc import Callable, Coroutine
@@ -23,6 +40,43 @@ _LOGGER = get_logger(__name__)
 T = TypeVar("T", bound=Event)
 
 
+@unique
+class RefreshPriority(IntEnum):
+    """Refresh priority. Lower values are refreshed first."""
+
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+
+_REFRESH_PRIORITIES: Final[MappingProxyType[type[Event], RefreshPriority]] = (
+    MappingProxyType(
+        {
+            AvailabilityEvent: RefreshPriority.HIGH,
+            BatteryEvent: RefreshPriority.HIGH,
+            ErrorEvent: RefreshPriority.HIGH,
+            StateEvent: RefreshPriority.HIGH,
+            CleanLogEvent: RefreshPriority.LOW,
+            LifeSpanEvent: RefreshPriority.LOW,
+            NetworkInfoEvent: RefreshPriority.LOW,
+            OtaEvent: RefreshPriority.LOW,
+            ReportStatsEvent: RefreshPriority.LOW,
+            StatsEvent: RefreshPriority.LOW,
+            TotalStatsEvent: RefreshPriority.LOW,
+        }
+    )
+)
+
+
+def create_refresh_bucket() -> TokenBucket:
+    """Create a bucket, which can be shared by devices to limit their total refreshes."""
+    return TokenBucket(rate=20, capacity=50, jitter=0.5)
+
+
+def _create_device_refresh_bucket() -> TokenBucket:
+    return TokenBucket(rate=2, capacity=10, jitter=0.5)
+
+
 class _OnSubscriptionCallback:
     def __init__(
         self, callback: Callable[[], Coroutine[Any, Any, Callable[[], None]]]
@@ -59,6 +113,70 @@ class _EventProcessingData(Generic[T]):
         self.on_subscription_callbacks: Final[list[_OnSubscriptionCallback]] = []
 
 
+class _RefreshScheduler:
+    """Scheduler, which starts the requested refreshes by priority.
+
+    Each started refresh consumes a token of the device and of the shared bucket
+    (if given), so that a refresh storm (e.g. after a reconnect) is smoothed out.
+    Initial refreshes on the first subscription don't consume tokens, so a new
+    device shows its state without delay.
+    """
+
+    def __init__(
+        self,
+        tasks: set[asyncio.Future[Any]],
+        refresh: Callable[[type[Event]], Coroutine[Any, Any, None]],
+        shared_bucket: TokenBucket | None = None,
+    ) -> None:
+        self._tasks = tasks
+        self._refresh = refresh
+        self._bucket: Final = _create_device_refresh_bucket()
+        self._shared_bucket: Final = shared_bucket
+        self._queue: list[tuple[RefreshPriority, int, type[Event]]] = []
+        self._queued: set[type[Event]] = set()
+        self._initial: set[type[Event]] = set()
+        self._counter = itertools.count()
+        self._worker: asyncio.Task[None] | None = None
+
+    def schedule(self, event_class: type[Event], *, initial: bool = False) -> None:
+        """Schedule a refresh for the given event."""
+        if event_class in self._queued:
+            _LOGGER.debug("Refresh for %s already scheduled", event_class.__name__)
+            return
+
+        if initial:
+            self._initial.add(event_class)
+
+        priority = _REFRESH_PRIORITIES.get(event_class, RefreshPriority.NORMAL)
+        heapq.heappush(self._queue, (priority, next(self._counter), event_class))
+        self._queued.add(event_class)
+
+        if self._worker is None or self._worker.done():
+            self._worker = create_task(self._tasks, self._work())
+
+    def clear(self) -> None:
+        """Clear all scheduled refreshes."""
+        self._queue.clear()
+        self._queued.clear()
+        self._initial.clear()
+
+    async def _work(self) -> None:
+        while self._queue:
+            if self._queue[0][2] not in self._initial:
+                # Wait for the tokens first, so a refresh with a higher priority,
+                # which is scheduled in the meantime, is started first
+                await self._bucket.acquire()
+                if self._shared_bucket:
+                    await self._shared_bucket.acquire()
+                if not self._queue:
+                    return
+
+            _, _, event_class = heapq.heappop(self._queue)
+            self._queued.discard(event_class)
+            self._initial.discard(event_class)
+            create_task(self._tasks, self._refresh(event_class))
+
+
 class EventBus:
     """A very simple event bus system."""
 
@@ -66,6 +184,8 @@ class EventBus:
         self,
         execute_command: DeviceCommandExecute,
         get_refresh_commands: Callable[[type[Event]], list[Command]],
+        *,
+        refresh_bucket: TokenBucket | None = None,
     ) -> None:
         self._event_processing_dict: dict[type[Event], _EventProcessingData[Any]] = {}
         self._lock = threading.Lock()
@@ -73,6 +193,9 @@ class EventBus:
 
         self._execute_command: Final = execute_command
         self._get_refresh_commands = get_refresh_commands
+        self._refresh_scheduler: Final = _RefreshScheduler(
+            self._tasks, self._call_refresh_function, refresh_bucket
+        )
 
     def has_subscribers(self, event: type[T]) -> bool:
         """Return True, if emitter has subscribers."""
@@ -103,7 +226,7 @@ class EventBus:
             create_task(self._tasks, callback(event_processing_data.last_event))
         elif len(event_processing_data.subscriber_callbacks) == 1:
             # first subscriber therefore do refresh
-            self.request_refresh(event_type)
+            self._refresh_scheduler.schedule(event_type, initial=True)
             _LOGGER.debug("Calling on_first_subscription callbacks for %s", event_type)
             for _callback in event_processing_data.on_subscription_callbacks:
                 create_task(self._tasks, _callback.call())
@@ -143,7 +266,7 @@ class EventBus:
                     if event_type != AvailabilityEvent:
                         self.request_refresh(event_type)
 
-            if event == event_processing_data.last_event:
+            if event.is_duplicate_of(event_processing_data.last_event):
                 _LOGGER.debug("Event is the same! Skipping (%s)", event)
                 return
 
@@ -168,16 +291,17 @@ class EventBus:
     def request_refresh(self, event_class: type[T]) -> None:
         """Request manual refresh."""
         if self.has_subscribers(event_class):
-            create_task(self._tasks, self._call_refresh_function(event_class))
+            self._refresh_scheduler.schedule(event_class)
 
     async def teardown(self) -> None:
         """Teardown eventbus."""
+        self._refresh_scheduler.clear()
         await cancel(self._tasks)
         for data in self._event_processing_dict.values():
             if handle := data.notify_handle:
                 handle.cancel()
 
-    async def _call_refresh_function(self, event_class: type[T]) -> None:
+    async def _call_refresh_function(self, event_class: type[Event]) -> None:
         processing_data = self._event_processing_dict[event_class]
         semaphore = processing_data.semaphore
         if semaphore.locked():
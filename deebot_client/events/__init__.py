@@ -8,7 +8,7 @@ from typing import TYPE_CHECKING, Any, Self
 
 from . import auto_empty, station
 from .auto_empty import AutoEmptyEvent
-from .base import Event
+from .base import Event, FingerprintEvent, InternedEventMeta
 from .efficiency_mode import EfficiencyMode, EfficiencyModeEvent
 from .fan_speed import FanSpeedEvent, FanSpeedLevel
 from .map import (
@@ -64,7 +64,7 @@ __all__ = [
 ]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BatteryEvent(Event):
     """Battery event representation."""
 
@@ -83,7 +83,7 @@ class CleanJobStatus(IntEnum):
     FINISHED_WITH_WARNINGS = 3
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CleanLogEntry:
     """Clean log entry representation."""
 
@@ -95,21 +95,21 @@ class CleanLogEntry:
     duration: int  # in seconds
 
 
-@dataclass(frozen=True)
-class CleanLogEvent(Event):
+@dataclass(frozen=True, slots=True)
+class CleanLogEvent(FingerprintEvent):
     """Clean log event representation."""
 
     logs: list[CleanLogEntry]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CleanCountEvent(Event):
     """Clean count event representation."""
 
     count: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CustomCommandEvent(Event):
     """Custom command event representation."""
 
@@ -117,7 +117,7 @@ class CustomCommandEvent(Event):
     response: dict[str, Any]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ErrorEvent(Event):
     """Error event representation."""
 
@@ -166,7 +166,7 @@ class LifeSpan(StrEnum):
     STATION_FILTER = "spHeap", "SpHeap"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LifeSpanEvent(Event):
     """Life span event representation."""
 
@@ -175,14 +175,14 @@ class LifeSpanEvent(Event):
     remaining: int  # in minutes
 
 
-@dataclass(frozen=True)
-class RoomsEvent(Event):
+@dataclass(frozen=True, slots=True)
+class RoomsEvent(FingerprintEvent):
     """Room event representation."""
 
     rooms: list[Room]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class StatsEvent(Event):
     """Stats event representation."""
 
@@ -191,7 +191,7 @@ class StatsEvent(Event):
     type: str | None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ReportStatsEvent(StatsEvent):
     """Report stats event representation."""
 
@@ -200,7 +200,7 @@ class ReportStatsEvent(StatsEvent):
     content: list[int]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TotalStatsEvent(Event):
     """Total stats event representation."""
 
@@ -209,14 +209,14 @@ class TotalStatsEvent(Event):
     cleanings: int
 
 
-@dataclass(frozen=True, kw_only=True)
-class AvailabilityEvent(Event):
+@dataclass(frozen=True, kw_only=True, slots=True)
+class AvailabilityEvent(Event, metaclass=InternedEventMeta):
     """Availability event."""
 
     available: bool
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OtaEvent(Event):
     """Ota event."""
 
@@ -227,14 +227,14 @@ class OtaEvent(Event):
     progress: int | None = None
 
 
-@dataclass(frozen=True)
-class StateEvent(Event):
+@dataclass(frozen=True, slots=True)
+class StateEvent(Event, metaclass=InternedEventMeta):
     """State event representation."""
 
     state: State
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class VolumeEvent(Event):
     """Volume event."""
 
@@ -242,79 +242,79 @@ class VolumeEvent(Event):
     maximum: int | None
 
 
-@dataclass(frozen=True)
-class EnableEvent(Event):
+@dataclass(frozen=True, slots=True)
+class EnableEvent(Event, metaclass=InternedEventMeta):
     """Enabled event."""
 
     enabled: bool
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AdvancedModeEvent(EnableEvent):
     """Advanced mode event."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ContinuousCleaningEvent(EnableEvent):
     """Continuous cleaning event."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CarpetAutoFanBoostEvent(EnableEvent):
     """Carpet pressure event."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CleanPreferenceEvent(EnableEvent):
     """CleanPreference event."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MultimapStateEvent(EnableEvent):
     """Multimap state event."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TrueDetectEvent(EnableEvent):
     """TrueDetect event."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class VoiceAssistantStateEvent(EnableEvent):
     """VoiceAssistantState event."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SweepModeEvent(EnableEvent):
     """SweepMode event ("Mop-Only" option)."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ChildLockEvent(EnableEvent):
     """Child lock event."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BorderSwitchEvent(EnableEvent):
     """Border switch event."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CrossMapBorderWarningEvent(EnableEvent):
     """Cross map border warning event."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MoveUpWarningEvent(EnableEvent):
     """Move up warning event."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SafeProtectEvent(EnableEvent):
     """Safe protect event."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CutDirectionEvent(Event):
     """Cut direction event representation."""
 
@@ -21,7 +21,7 @@ class Frequency(StrEnum):
     SMART = "smart"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AutoEmptyEvent(_Event):
     """Auto empty event representation."""
 
@@ -2,6 +2,73 @@
 
 from __future__ import annotations
 
+from dataclasses import fields
+from typing import Any, TypeVar
+
+_EventT = TypeVar("_EventT")
+
+_INTERNED_EVENTS: dict[type[Any], dict[Any, Any]] = {}
+
 
 class Event:
     """Event base class."""
+
+    __slots__ = ()
+
+    def is_duplicate_of(self, other: Event | None) -> bool:
+        """Return True, if the other event has the same content."""
+        return self is other or self == other
+
+
+class FingerprintEvent(Event):
+    """Event with a large content, which is compared by a fingerprint.
+
+    The fingerprint is calculated once on first use, so events with a different
+    content are mostly detected without a deep comparison. As different contents
+    can have the same fingerprint, a match is confirmed by comparing the events.
+    """
+
+    __slots__ = ("_fingerprint",)
+    _fingerprint: int
+
+    @property
+    def fingerprint(self) -> int:
+        """Return the fingerprint of the content."""
+        try:
+            return self._fingerprint
+        except AttributeError:
+            values = (getattr(self, field.name) for field in fields(self))  # type: ignore[arg-type]
+            fingerprint = hash(
+                tuple(
+                    tuple(value) if isinstance(value, list) else value
+                    for value in values
+                )
+            )
+            # Events are frozen
+            object.__setattr__(self, "_fingerprint", fingerprint)
+            return fingerprint
+
+    def is_duplicate_of(self, other: Event | None) -> bool:
+        """Return True, if the other event has the same content."""
+        return self is other or (
+            isinstance(other, FingerprintEvent)
+            and type(other) is type(self)
+            and self.fingerprint == other.fingerprint
+            and self == other
+        )
+
+
+class InternedEventMeta(type):
+    """Metaclass for events with only a few possible values.
+
+    Equal events are created only once and shared afterwards (flyweight),
+    so the duplicate detection of the event bus is mostly an identity check.
+    The created events are never removed, therefore it should only be used
+    for events with a small value space.
+    """
+
+    def __call__(cls: type[_EventT], *args: Any, **kwargs: Any) -> _EventT:
+        """Return the shared event with the given values."""
+        event = type.__call__(cls, *args, **kwargs)
+        interned: dict[_EventT, _EventT] = _INTERNED_EVENTS.setdefault(cls, {})
+        return interned.setdefault(event, event)
@@ -16,7 +16,7 @@ class EfficiencyMode(IntEnum):
     ENERGY_EFFICIENT_MODE = 1
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EfficiencyModeEvent(Event):
     """Efficiency mode event representation."""
 
@@ -5,7 +5,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from enum import IntEnum, unique
 
-from .base import Event
+from .base import Event, InternedEventMeta
 
 
 @unique
@@ -19,8 +19,8 @@ class FanSpeedLevel(IntEnum):
     MAX_PLUS = 2
 
 
-@dataclass(frozen=True)
-class FanSpeedEvent(Event):
+@dataclass(frozen=True, slots=True)
+class FanSpeedEvent(Event, metaclass=InternedEventMeta):
     """Fan speed event representation."""
 
     speed: FanSpeedLevel
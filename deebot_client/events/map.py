@@ -7,6 +7,7 @@ from enum import Enum, unique
 from typing import TYPE_CHECKING, Any
 
 from deebot_client.events import Event
+from deebot_client.events.base import FingerprintEvent
 
 if TYPE_CHECKING:
     from datetime import datetime
@@ -14,7 +15,7 @@ if TYPE_CHECKING:
     from deebot_client.rs.map import PositionType
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Position:
     """Position representation."""
 
@@ -24,15 +25,15 @@ class Position:
     a: int
 
 
-@dataclass(frozen=True)
-class PositionsEvent(Event):
+@dataclass(frozen=True, slots=True)
+class PositionsEvent(FingerprintEvent):
     """Position event representation."""
 
     positions: list[Position]
 
 
-@dataclass(frozen=True)
-class MapTraceEvent(Event):
+@dataclass(frozen=True, slots=True)
+class MapTraceEvent(FingerprintEvent):
     """Map trace event representation."""
 
     start: int
@@ -40,7 +41,7 @@ class MapTraceEvent(Event):
     data: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MajorMapEvent(Event):
     """Major map event."""
 
@@ -49,7 +50,7 @@ class MajorMapEvent(Event):
     requested: bool = field(kw_only=True)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MinorMapEvent(Event):
     """Minor map event."""
 
@@ -71,7 +72,7 @@ class MapSetType(str, Enum):
         return value in cls._value2member_map_
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MapSetEvent(Event):
     """Map set event."""
 
@@ -79,7 +80,7 @@ class MapSetEvent(Event):
     subsets: list[int]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MapSubsetEvent(Event):
     """Map subset event."""
 
@@ -89,7 +90,7 @@ class MapSubsetEvent(Event):
     name: str | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CachedMapInfoEvent(Event):
     """Cached map info event."""
 
@@ -97,7 +98,7 @@ class CachedMapInfoEvent(Event):
     active: bool = field(kw_only=True)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MapChangedEvent(Event):
     """Map changed event."""
 
@@ -7,7 +7,7 @@ from dataclasses import dataclass
 from .base import Event
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class NetworkInfoEvent(Event):
     """Network info event representation."""
 
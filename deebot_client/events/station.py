@@ -18,7 +18,7 @@ class State(IntEnum):
     EMPTYING = 1
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class StationEvent(_Event):
     """Base Station Event representation."""
 
@@ -5,7 +5,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from enum import IntEnum, unique
 
-from .base import Event
+from .base import Event, InternedEventMeta
 
 
 @unique
@@ -26,8 +26,8 @@ class SweepType(IntEnum):
     DEEP = 2
 
 
-@dataclass(frozen=True)
-class WaterInfoEvent(Event):
+@dataclass(frozen=True, slots=True)
+class WaterInfoEvent(Event, metaclass=InternedEventMeta):
     """Water info event representation."""
 
     amount: WaterAmount
@@ -18,7 +18,7 @@ class WorkMode(IntEnum):
     MOP_AFTER_VACUUM = 3
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class WorkModeEvent(Event):
     """Work mode event representation."""
 
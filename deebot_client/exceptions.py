@@ -24,6 +24,10 @@ class ApiError(DeebotError):
     """Api error."""
 
 
+class ApiUnauthorizedError(ApiError):
+    """Api unauthorized error, raised if the credentials are rejected."""
+
+
 class ApiTimeoutError(ApiError):
     """Api timeout error."""
 
@@ -31,6 +35,13 @@ class ApiTimeoutError(ApiError):
         super().__init__(f"Timeout ({timeout}) reached on path: {path}", *args)
 
 
+class ApiCircuitOpenError(ApiError):
+    """Api circuit open error."""
+
+    def __init__(self, path: str, *args: object) -> None:
+        super().__init__(f"Circuit breaker is open for path: {path}", *args)
+
+
 class MapError(DeebotError):
     """Map error."""
 
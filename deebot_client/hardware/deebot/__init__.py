@@ -4,11 +4,12 @@ from __future__ import annotations
 
 import asyncio
 import importlib
-import pkgutil
 from typing import TYPE_CHECKING
 
 from deebot_client.logging_filter import get_logger
 
+from ._index import MODULES
+
 if TYPE_CHECKING:
     from deebot_client.models import StaticDeviceInfo
 
@@ -20,18 +21,38 @@ _LOGGER = get_logger(__name__)
 DEVICES: dict[str, StaticDeviceInfo] = {}
 
 
+def _load_device(class_: str) -> StaticDeviceInfo | None:
+    """Import the module of the given class, if not already done.
+
+    Linked models (symlinks) share the module and therefore the device info.
+    """
+    if device := DEVICES.get(class_):
+        return device
+
+    if (module := MODULES.get(class_)) is None:
+        return None
+
+    if module not in DEVICES:
+        # The module adds itself to DEVICES
+        importlib.import_module(f"{__package__}.{module}")
+
+    device = DEVICES[class_] = DEVICES[module]
+    return device
+
+
 def _load() -> None:
-    for _, package_name, _ in pkgutil.iter_modules(__path__):
-        full_package_name = f"{__package__}.{package_name}"
-        importlib.import_module(full_package_name)
+    for class_ in MODULES:
+        _load_device(class_)
 
 
 async def get_static_device_info(class_: str) -> StaticDeviceInfo | None:
     """Get static device info for given class."""
-    if not DEVICES:
-        await asyncio.get_event_loop().run_in_executor(None, _load)
+    if (device := DEVICES.get(class_)) is None and class_ in MODULES:
+        device = await asyncio.get_event_loop().run_in_executor(
+            None, _load_device, class_
+        )
 
-    if device := DEVICES.get(class_):
+    if device:
         _LOGGER.debug("Capabilities found for %s", class_)
         return device
 
@@ -0,0 +1,122 @@
+"""Index of the hardware modules.
+
+Generated by scripts/generate_hardware_index.py. Do not edit manually.
+"""
+
+from __future__ import annotations
+
+# Device class -> module implementing it, with symlinks resolved
+MODULES: dict[str, str] = {
+    "0bdtzz": "x5d34r",
+    "12baap": "7j1tu6",
+    "1b23du": "2o4lnm",
+    "1vxt52": "2o4lnm",
+    "2ap5uq": "5xu9h3",
+    "2o4lnm": "2o4lnm",
+    "36xnxf": "x5d34r",
+    "3w7j5e": "p1jij8",
+    "4bdkrs": "4bdkrs",
+    "4jd37g": "p1jij8",
+    "4vhygi": "p1jij8",
+    "55aiho": "x5d34r",
+    "5xu9h3": "5xu9h3",
+    "626v6g": "p95mgv",
+    "659yh8": "x5d34r",
+    "77atlz": "5xu9h3",
+    "7bryc5": "7bryc5",
+    "7j1tu6": "7j1tu6",
+    "7n95dm": "x5d34r",
+    "7piq03": "kr0277",
+    "7zya6u": "x5d34r",
+    "822x8d": "p1jij8",
+    "85as7h": "x5d34r",
+    "85nbtp": "p1jij8",
+    "87swps": "p1jij8",
+    "8kwdb4": "8kwdb4",
+    "8tyt2y": "4bdkrs",
+    "9gqyaq": "4bdkrs",
+    "9kpees": "buom7k",
+    "9ku8nu": "p1jij8",
+    "9s1s80": "9s1s80",
+    "b2jqs4": "b2jqs4",
+    "b742vd": "x5d34r",
+    "bro5wu": "2o4lnm",
+    "bs40nz": "x5d34r",
+    "buom7k": "buom7k",
+    "c0lwyn": "7j1tu6",
+    "cb69w5": "xco2fc",
+    "clojes": "umwv6z",
+    "d4v1pm": "7j1tu6",
+    "dlrbzq": "p1jij8",
+    "dqcneu": "x5d34r",
+    "e6ofmn": "e6ofmn",
+    "e6rcnf": "e6ofmn",
+    "e6yxdm": "p1jij8",
+    "edoodo": "kr0277",
+    "ee23uv": "ee23uv",
+    "eqmf84": "4bdkrs",
+    "fqxoiu": "x5d34r",
+    "guzput": "5xu9h3",
+    "gwtll7": "qhe2o2",
+    "h18jkh": "x5d34r",
+    "i35yb6": "buom7k",
+    "ifbw08": "x5d34r",
+    "ipohi5": "x5d34r",
+    "ipzjy0": "x5d34r",
+    "itk04l": "5xu9h3",
+    "jtmf04": "p1jij8",
+    "kr0277": "kr0277",
+    "kr9c86": "4bdkrs",
+    "lf3bn4": "e6ofmn",
+    "lhbd50": "x5d34r",
+    "lr4qcs": "p1jij8",
+    "lx3j7m": "p1jij8",
+    "m1wkuw": "m1wkuw",
+    "m4xnd8": "p1jij8",
+    "n4gstt": "2o4lnm",
+    "n6cwdb": "x5d34r",
+    "nq9yhl": "7j1tu6",
+    "o0a4ju": "p1jij8",
+    "p0l0af": "qhe2o2",
+    "p1jij8": "p1jij8",
+    "p7l7iu": "p7l7iu",
+    "p95mgv": "p95mgv",
+    "paeygf": "p1jij8",
+    "py3qif": "p1jij8",
+    "qhe2o2": "qhe2o2",
+    "r5y7re": "x5d34r",
+    "r5zxjr": "x5d34r",
+    "rss8xk": "p95mgv",
+    "rvflzn": "p1jij8",
+    "rvo6ev": "ts2ofl",
+    "s1f8g7": "x5d34r",
+    "s523z1": "2o4lnm",
+    "s69g6z": "5xu9h3",
+    "snxbvc": "x5d34r",
+    "tlthqk": "p1jij8",
+    "ts2ofl": "ts2ofl",
+    "ty84oi": "x5d34r",
+    "u4h1uk": "7j1tu6",
+    "u6eqoa": "7j1tu6",
+    "ucn2xe": "x5d34r",
+    "ue8kcc": "ue8kcc",
+    "um2ywg": "x5d34r",
+    "umwv6z": "umwv6z",
+    "vdehg6": "x5d34r",
+    "vi829v": "yna5xi",
+    "w16crm": "x5d34r",
+    "w7k3yc": "p1jij8",
+    "wlqdkp": "ts2ofl",
+    "x5d34r": "x5d34r",
+    "xco2fc": "xco2fc",
+    "y2qy3m": "7j1tu6",
+    "yi396x": "p1jij8",
+    "yinacl": "kr0277",
+    "yna5xi": "yna5xi",
+    "yu362x": "x5d34r",
+    "z0gd1j": "x5d34r",
+    "z4lvk7": "p1jij8",
+    "zgsvkq": "x5d34r",
+    "zjavof": "p95mgv",
+    "zwkcqc": "p1jij8",
+}
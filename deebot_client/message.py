@@ -6,9 +6,10 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import IntEnum, auto
 import functools
-from typing import TYPE_CHECKING, Any, TypeVar, final
+from typing import TYPE_CHECKING, Any, ClassVar, Generic, TypedDict, TypeVar, final
 
 from deebot_client.util import verify_required_class_variables_exists
+from deebot_client.util.json import create_typed_loads, json_loads
 
 from .logging_filter import get_logger
 
@@ -16,6 +17,7 @@ if TYPE_CHECKING:
     from collections.abc import Callable
 
     from .event_bus import EventBus
+    from .util.json import JsonLoads
 
 _LOGGER = get_logger(__name__)
 
@@ -49,17 +51,37 @@ class HandlingResult:
 
 
 _MessageT = TypeVar("_MessageT", bound="Message")
+_DataT = TypeVar("_DataT")
+
+
+class _Header(TypedDict, total=False):
+    fwVer: str
+
+
+class _Body(TypedDict, Generic[_DataT], total=False):
+    data: _DataT
+
+
+class _Envelope(TypedDict, Generic[_DataT], total=False):
+    header: _Header
+    body: _Body[_DataT]
+
+
+@functools.cache
+def _create_loads(schema: Any) -> JsonLoads:
+    """Create the loads function for messages with the given body->data schema."""
+    if schema is None:
+        return json_loads
+    return create_typed_loads(_Envelope[schema])
 
 
 def _handle_error_or_analyse(
-    func: Callable[[type[_MessageT], EventBus, dict[str, Any]], HandlingResult],
-) -> Callable[[type[_MessageT], EventBus, dict[str, Any]], HandlingResult]:
+    func: Callable[[type[_MessageT], EventBus, Any], HandlingResult],
+) -> Callable[[type[_MessageT], EventBus, Any], HandlingResult]:
     """Handle error or None response."""
 
     @functools.wraps(func)
-    def wrapper(
-        cls: type[_MessageT], event_bus: EventBus, data: dict[str, Any]
-    ) -> HandlingResult:
+    def wrapper(cls: type[_MessageT], event_bus: EventBus, data: Any) -> HandlingResult:
         try:
             response = func(cls, event_bus, data)
             if response.state == HandlingState.ANALYSE:
@@ -79,9 +101,18 @@ class Message(ABC):
     """Message."""
 
     NAME: str
+    # Type of message->body->data (e.g. a TypedDict). If msgspec is installed, raw
+    # payloads are decoded directly into it and keys, which are not declared, are skipped.
+    SCHEMA: ClassVar[Any] = None
+    _handler: Callable[[EventBus, dict[str, Any] | str], HandlingResult]
+    _loads: JsonLoads
 
     def __init_subclass__(cls) -> None:
         verify_required_class_variables_exists(cls, ("NAME",))
+        cls._loads = _create_loads(cls.SCHEMA)
+        if cls.__module__ != __name__:
+            # The base classes of this module are not defined yet
+            cls._handler = _compile_handler(cls)
         return super().__init_subclass__()
 
     @classmethod
@@ -95,7 +126,12 @@ class Message(ABC):
         """
 
     @classmethod
-    @_handle_error_or_analyse
+    @final
+    def decode(cls, payload: str | bytes | bytearray) -> Any:
+        """Decode the raw payload of the message."""
+        return cls._loads(payload)
+
+    @classmethod
     @final
     def handle(
         cls, event_bus: EventBus, message: dict[str, Any] | str
@@ -104,6 +140,14 @@ class Message(ABC):
 
         :return: A message response
         """
+        return cls._handler(event_bus, message)
+
+    @classmethod
+    @_handle_error_or_analyse
+    @final
+    def _handle_generic(
+        cls, event_bus: EventBus, message: dict[str, Any] | str
+    ) -> HandlingResult:
         return cls._handle(event_bus, message)
 
 
@@ -262,3 +306,79 @@ class MessageBodyDataList(MessageBodyData, ABC):
             return cls._handle_body_data_list(event_bus, data)
 
         return super()._handle_body_data(event_bus, data)
+
+
+def _is_inherited(cls: type[Message], name: str, base: type[Any]) -> bool:
+    """Return True if the method is not overridden between base and cls."""
+    return bool(getattr(cls, name).__func__ is getattr(base, name).__func__)
+
+
+def _get_leaf(cls: type[Message]) -> tuple[str, type[Any] | None] | None:
+    """Return the name of the method handling the innermost level and the type of body->data.
+
+    The type is None, if the method handles the body.
+    """
+    if not issubclass(cls, MessageBody) or not _is_inherited(
+        cls, "_handle", MessageBody
+    ):
+        return None
+
+    if issubclass(cls, MessageBodyData) and _is_inherited(
+        cls, "_handle_body", MessageBodyData
+    ):
+        if issubclass(cls, MessageBodyDataDict) and _is_inherited(
+            cls, "_handle_body_data", MessageBodyDataDict
+        ):
+            return "_handle_body_data_dict", dict
+        if issubclass(cls, MessageBodyDataList) and _is_inherited(
+            cls, "_handle_body_data", MessageBodyDataList
+        ):
+            return "_handle_body_data_list", list
+
+    return "_handle_body", None
+
+
+def _compile_handler(
+    cls: type[Message],
+) -> Callable[[EventBus, dict[str, Any] | str], HandlingResult]:
+    """Compile the handler of the given message class.
+
+    Instead of walking through all levels (body, data, data dict/list), which
+    results in a lot of calls and checks per message, the leaf method is called
+    directly with a single error boundary. Messages with overridden levels or
+    an unexpected structure use the generic handling.
+    The leaf method is looked up on each call, so it can still be patched.
+    Only which level is the leaf is decided on class creation.
+    """
+    # pylint: disable=protected-access
+    generic = cls._handle_generic
+    if ABC in cls.__bases__ or (leaf_info := _get_leaf(cls)) is None:
+        return generic
+
+    leaf_name, data_type = leaf_info
+    name = cls.NAME
+
+    def handler(event_bus: EventBus, message: dict[str, Any] | str) -> HandlingResult:
+        if not isinstance(message, dict) or not isinstance(
+            data := message.get("body"), dict
+        ):
+            return generic(event_bus, message)
+        if data_type is not None and not isinstance(
+            data := data.get("data"), data_type
+        ):
+            return generic(event_bus, message)
+
+        try:
+            result: HandlingResult = getattr(cls, leaf_name)(event_bus, data)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.warning("Could not parse %s: %s", name, data, exc_info=True)
+            return HandlingResult(HandlingState.ERROR)
+
+        if result.state == HandlingState.ANALYSE:
+            _LOGGER.debug("Could not handle %s message: %s", name, data)
+            return HandlingResult(HandlingState.ANALYSE_LOGGED, result.args)
+        if result.state == HandlingState.ERROR:
+            _LOGGER.warning("Could not parse %s: %s", name, data)
+        return result
+
+    return handler
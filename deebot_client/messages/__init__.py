@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 import re
 
 from deebot_client.const import DataType
@@ -16,41 +17,51 @@ MESSAGES = {
     DataType.JSON: JSON_MESSAGES,
 }
 
-_LEGACY_USE_GET_COMMAND = [
-    "getAdvancedMode",
-    "getBreakPoint",
-    "getCachedMapInfo",
-    "getCarpertPressure",
-    "getChargeState",
-    "getCleanCount",
-    "getCleanInfo",
-    "getCleanPreference",
-    "getEfficiency",
-    "getError",
-    "getLifeSpan",
-    "getMajorMap",
-    "getMapSet",
-    "getMapSubSet",
-    "getMapTrace",
-    "getMinorMap",
-    "getMultiMapState",
-    "getNetInfo",
-    "getPos",
-    "getSpeed",
-    "getSweepMode",
-    "getTotalStats",
-    "getTrueDetect",
-    "getVoiceAssistantState",
-    "getVolume",
-    "getWaterInfo",
-    "getWorkMode",
-]
-
-
+_LEGACY_USE_GET_COMMAND = frozenset(
+    {
+        "getAdvancedMode",
+        "getBreakPoint",
+        "getCachedMapInfo",
+        "getCarpertPressure",
+        "getChargeState",
+        "getCleanCount",
+        "getCleanInfo",
+        "getCleanPreference",
+        "getEfficiency",
+        "getError",
+        "getLifeSpan",
+        "getMajorMap",
+        "getMapSet",
+        "getMapSubSet",
+        "getMapTrace",
+        "getMinorMap",
+        "getMultiMapState",
+        "getNetInfo",
+        "getPos",
+        "getSpeed",
+        "getSweepMode",
+        "getTotalStats",
+        "getTrueDetect",
+        "getVoiceAssistantState",
+        "getVolume",
+        "getWaterInfo",
+        "getWorkMode",
+    }
+)
+
+# Messages starting with "on","off","report" are handled the same as "get" commands
+_GET_PREFIX_PATTERN = re.compile("^((on)|(off)|(report))")
+
+# Size of the message resolution cache
+_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
 def get_message(message_name: str, data_type: DataType) -> type[Message] | None:
     """Try to find the message for the given name.
 
     If there exists no exact match, some conversations are performed on the name to get message object similar to the name.
+    The result is cached, also for unknown messages, as bots send the same messages over and over.
     """
     messages = MESSAGES.get(data_type)
     if messages is None:
@@ -67,12 +78,7 @@ def get_message(message_name: str, data_type: DataType) -> type[Message] | None:
     if message_type := messages.get(converted_name, None):
         return message_type
 
-    # Handle message starting with "on","off","report" the same as "get" commands
-    converted_name = re.sub(
-        "^((on)|(off)|(report))",
-        "get",
-        converted_name,
-    )
+    converted_name = _GET_PREFIX_PATTERN.sub("get", converted_name)
 
     if converted_name not in _LEGACY_USE_GET_COMMAND:
         _LOGGER.debug('Unknown message "%s"', message_name)
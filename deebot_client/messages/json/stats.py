@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, TypedDict
 
 from deebot_client.events import CleanJobStatus, ReportStatsEvent
 from deebot_client.message import HandlingResult, MessageBodyDataDict
@@ -11,10 +11,21 @@ if TYPE_CHECKING:
     from deebot_client.event_bus import EventBus
 
 
+class _ReportStatsData(TypedDict, total=False):
+    cid: str
+    type: str
+    stop: int
+    stopReason: int
+    area: int
+    time: int
+    content: str
+
+
 class ReportStats(MessageBodyDataDict):
     """Report stats message."""
 
     NAME = "reportStats"
+    SCHEMA = _ReportStatsData
 
     @classmethod
     def _handle_body_data_dict(
@@ -3,15 +3,20 @@
 from __future__ import annotations
 
 import asyncio
+from collections import deque
 from contextlib import suppress
 from dataclasses import dataclass
 from datetime import datetime
-import json
+from functools import partial
+from itertools import batched
+import random
 import ssl
+import time
 from typing import TYPE_CHECKING, Any
 from urllib.parse import urlparse
+import uuid
 
-from aiomqtt import Client, Message, MqttError as AioMqttError
+from aiomqtt import Client, Message, MqttCodeError, MqttError as AioMqttError
 from cachetools import TTLCache
 
 from deebot_client.const import UNDEFINED, DataType, UndefinedType
@@ -19,20 +24,68 @@ from deebot_client.exceptions import AuthenticationError, MqttError
 
 from .commands import COMMANDS_WITH_MQTT_P2P_HANDLING
 from .logging_filter import get_logger
+from .util import cancel, create_task, md5
 from .util.continents import get_continent_url_postfix
+from .util.json import json_dumps, json_loads
+from .util.traffic import TrafficKind
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, MutableMapping
+    from collections.abc import Callable, Coroutine, MutableMapping
+    from concurrent.futures import Executor
+
+    import paho.mqtt.client as mqtt
+    from paho.mqtt.properties import Properties
+    from paho.mqtt.reasoncodes import ReasonCode
 
     from .authentication import Authenticator
     from .command import CommandMqttP2P
     from .event_bus import EventBus
-    from .models import Credentials, DeviceInfo
+    from .models import ApiDeviceInfo, Credentials, DeviceInfo
+    from .util.traffic import TrafficRecorder
 
 RECONNECT_INTERVAL = 5  # seconds
+RECONNECT_MAX_INTERVAL = 300  # seconds
+P2P_TIMEOUT = 5  # seconds
 
 _LOGGER = get_logger(__name__)
 _CLIENT_LOGGER = get_logger(f"{__name__}.client")
+# All routed topic prefixes have the same length
+_TOPIC_PREFIX_LENGTH = len("iot/atr/")
+_DATA_TYPES = {data_type.value: data_type for data_type in DataType}
+# Maximum number of topics sent in a single (un)subscribe packet
+_SUBSCRIBE_BATCH_SIZE = 100
+_MAX_DEVICE_QUEUE_SIZE = 100
+_MESSAGE_WORKERS = 4
+# Pushed messages, which contain the complete state of their event.
+# On a full queue, a newer message supersedes a queued one with the same topic.
+# Other messages (e.g. map pieces and traces) are never replaced.
+_STATE_MESSAGES = frozenset(
+    {
+        "onAutoEmpty",
+        "onBattery",
+        "onChargeState",
+        "onCleanInfo",
+        "onCleanInfo_V2",
+        "onError",
+        "onNetInfo",
+        "onSpeed",
+        "onStationState",
+        "onStats",
+        "onSweepMode",
+        "onVolume",
+        "onWaterInfo",
+        "onWorkMode",
+    }
+)
+# Payloads from this size (in bytes) are decoded in the executor, if one is given
+_EXECUTOR_PAYLOAD_SIZE = 10_000
+
+
+def _is_state_topic(topic: str) -> bool:
+    """Return True, if the topic is the one of a pushed state message."""
+    # The message name is the third part of routed topics (iot/atr/[message]/...)
+    parts = topic.split("/", 3)
+    return len(parts) > 3 and parts[1] == "atr" and parts[2] in _STATE_MESSAGES
 
 
 def _get_topics(device_info: DeviceInfo) -> list[str]:
@@ -50,6 +103,67 @@ def _get_topics(device_info: DeviceInfo) -> list[str]:
     ]
 
 
+async def _subscribe(client: Client, topics: list[str], qos: int) -> None:
+    for batch in batched(topics, _SUBSCRIBE_BATCH_SIZE):
+        await client.subscribe([(topic, qos) for topic in batch])
+
+
+async def _unsubscribe(client: Client, topics: list[str]) -> None:
+    for batch in batched(topics, _SUBSCRIBE_BATCH_SIZE):
+        await client.unsubscribe(list(batch))
+
+
+def _get_device_id(topic: str) -> str:
+    topic_split = topic.split("/", 10)
+    if len(topic_split) > 9 and topic_split[1] == "p2p" and topic_split[9] == "q":
+        # The device is the receiver of p2p requests
+        return topic_split[6]
+    return topic_split[3] if len(topic_split) > 3 else ""
+
+
+def _decode_payload(payload: str | bytes | bytearray | dict[str, Any]) -> Any:
+    if isinstance(payload, dict):
+        # Already decoded in the executor
+        return payload
+    return json_loads(payload)
+
+
+def _is_not_authorized(error: AioMqttError) -> bool:
+    if not isinstance(error, MqttCodeError):
+        return False
+    # MQTT 3 return codes "bad username or password" and "not authorized"
+    # and the corresponding MQTT 5 reason codes
+    return getattr(error.rc, "value", error.rc) in {4, 5, 134, 135}
+
+
+def _get_reconnect_delay(attempt: int) -> float:
+    delay = min(RECONNECT_MAX_INTERVAL, RECONNECT_INTERVAL * 2**attempt)
+    # Jitter, so all clients don't reconnect at the same time after a broker restart
+    return random.uniform(delay / 2, delay)  # noqa: S311
+
+
+class _Client(Client):
+    """Client, which stores if the broker resumed a persistent session.
+
+    aiomqtt doesn't expose the connect flags, therefore its connect callback is
+    extended. The callback is private, so the supported aiomqtt versions are
+    pinned in the project dependencies.
+    """
+
+    session_present = False
+
+    def _on_connect(  # pylint: disable=too-many-positional-arguments
+        self,
+        client: mqtt.Client,
+        userdata: Any,
+        flags: mqtt.ConnectFlags,
+        reason_code: ReasonCode,
+        properties: Properties | None = None,
+    ) -> None:
+        self.session_present = flags.session_present
+        super()._on_connect(client, userdata, flags, reason_code, properties)
+
+
 @dataclass(frozen=True, kw_only=True)
 class MqttConfiguration:
     """Mqtt configuration."""
@@ -58,6 +172,10 @@ class MqttConfiguration:
     port: int
     ssl_context: ssl.SSLContext | None
     device_id: str
+    # Keep the session on the broker, while the client is disconnected
+    persistent_session: bool = False
+    # Number of broker connections, the devices are distributed on
+    connections: int = 1
 
 
 def create_mqtt_config(
@@ -66,8 +184,13 @@ def create_mqtt_config(
     country: str,
     override_mqtt_url: str | None = None,
     ssl_context: ssl.SSLContext | None | UndefinedType = UNDEFINED,
+    persistent_session: bool = False,
+    connections: int = 1,
 ) -> MqttConfiguration:
     """Create configuration."""
+    if connections < 1:
+        raise MqttError("At least one connection is required")
+
     continent_postfix = get_continent_url_postfix(country.upper())
     ssl_ctx = None if ssl_context is UNDEFINED else ssl_context
 
@@ -101,6 +224,8 @@ def create_mqtt_config(
         port=port,
         ssl_context=ssl_ctx,
         device_id=device_id,
+        persistent_session=persistent_session,
+        connections=connections,
     )
 
 
@@ -110,7 +235,269 @@ class SubscriberInfo:
 
     device_info: DeviceInfo
     events: EventBus
-    callback: Callable[[str, str | bytes | bytearray], None]
+    callback: Callable[[str, str | bytes | bytearray | dict[str, Any]], None]
+    # Called after a p2p command, sent by another client, was handled
+    p2p_callback: Callable[[CommandMqttP2P], None] | None = None
+
+
+class _MessageDispatcher:
+    """Dispatcher, which processes the messages of each device in order.
+
+    Each device has its own bounded queue. The queues are processed by a bounded
+    pool of workers, which take turns between the devices with queued messages.
+    A device is processed by only one worker at a time to keep the order.
+    The workers exit when all queues are empty.
+    If a queue is full, a queued state message (e.g. battery) with the same topic
+    is replaced by the new one. Otherwise, the oldest message is dropped.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Message], Coroutine[Any, Any, None]],
+        max_queue_size: int,
+        max_workers: int,
+    ) -> None:
+        self._process = process
+        self._max_queue_size = max_queue_size
+        self._max_workers = max_workers
+        self._queues: dict[str, deque[tuple[float, Message]]] = {}
+        # Devices with queued messages, which are not processed by a worker
+        self._ready: deque[str] = deque()
+        self._workers = 0
+        self._tasks: set[asyncio.Future[Any]] = set()
+        self._coalesced = 0
+        self._dropped = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of queued messages."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def lag(self) -> float:
+        """Return the seconds the oldest queued message is waiting."""
+        now = time.monotonic()
+        return max(
+            (now - queue[0][0] for queue in self._queues.values() if queue),
+            default=0,
+        )
+
+    @property
+    def coalesced(self) -> int:
+        """Return the number of state messages replaced by a newer one."""
+        return self._coalesced
+
+    @property
+    def dropped(self) -> int:
+        """Return the number of messages dropped because of a full queue."""
+        return self._dropped
+
+    def dispatch(self, device_id: str, message: Message) -> None:
+        """Queue the message for processing."""
+        if (queue := self._queues.get(device_id)) is None:
+            queue = self._queues[device_id] = deque()
+            self._ready.append(device_id)
+            if self._workers < self._max_workers:
+                self._workers += 1
+                create_task(self._tasks, self._work())
+        elif len(queue) >= self._max_queue_size:
+            self._make_room(device_id, queue, message.topic.value)
+
+        queue.append((time.monotonic(), message))
+
+    async def teardown(self) -> None:
+        """Cancel all workers and drop the queued messages."""
+        await cancel(self._tasks)
+        self._queues.clear()
+        self._ready.clear()
+        self._workers = 0
+
+    def _make_room(
+        self, device_id: str, queue: deque[tuple[float, Message]], topic: str
+    ) -> None:
+        if _is_state_topic(topic):
+            for i, (_, queued) in enumerate(queue):
+                if queued.topic.value == topic:
+                    # The new message supersedes the queued one
+                    del queue[i]
+                    self._coalesced += 1
+                    return
+
+        self._dropped += 1
+        _LOGGER.warning(
+            "Message queue of %s is full. Dropping oldest message (%d dropped in total)",
+            device_id,
+            self._dropped,
+        )
+        queue.popleft()
+
+    async def _work(self) -> None:
+        try:
+            while self._ready:
+                device_id = self._ready.popleft()
+                queue = self._queues[device_id]
+                _, message = queue.popleft()
+                try:
+                    await self._process(message)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("An exception occurred during handling message")
+
+                if queue:
+                    # Take turns with the other devices
+                    self._ready.append(device_id)
+                else:
+                    del self._queues[device_id]
+                # Let the other workers run
+                await asyncio.sleep(0)
+        finally:
+            self._workers -= 1
+
+
+class _Connection:
+    """Broker connection with its own listener and subscription worker."""
+
+    def __init__(
+        self,
+        get_client: Callable[[], Coroutine[Any, Any, _Client]],
+        subscriptions: MutableMapping[str, SubscriberInfo],
+        dispatcher: _MessageDispatcher,
+        handle_not_authorized: Callable[[], Coroutine[Any, Any, None]],
+        *,
+        qos: int,
+    ) -> None:
+        self._get_client = get_client
+        # Subscriptions of all connections
+        self._subscriptions = subscriptions
+        self._dispatcher = dispatcher
+        self._handle_not_authorized = handle_not_authorized
+        self._qos = qos
+
+        # Devices subscribed on this connection
+        self._device_ids: set[str] = set()
+        self._subscription_changes: asyncio.Queue[tuple[SubscriberInfo, bool]] = (
+            asyncio.Queue()
+        )
+        self._mqtt_task: asyncio.Task[Any] | None = None
+        self.client: Client | None = None
+        # False, if the subscriptions may not have been sent to the broker
+        self._subscriptions_synced = False
+
+    def change_subscription(self, info: SubscriberInfo, *, add: bool) -> None:
+        """Queue the (un)subscription of the given device."""
+        self._subscription_changes.put_nowait((info, add))
+
+    async def connect(self) -> None:
+        """Connect, if not already connected."""
+        if self._mqtt_task is None or self._mqtt_task.done():
+            await self.reconnect()
+
+    async def reconnect(self) -> None:
+        """Create a new connection."""
+        await self.disconnect()
+        self._mqtt_task = asyncio.create_task(self._mqtt())
+
+    async def disconnect(self) -> None:
+        """Disconnect."""
+        if self._mqtt_task is not None and self._mqtt_task.cancel():
+            # Wait for the task to be cancelled
+            with suppress(asyncio.CancelledError):
+                await self._mqtt_task
+
+    async def _mqtt(self) -> None:
+        attempt = 0
+        while True:
+            try:
+                async with await self._get_client() as client:
+                    attempt = 0
+                    if client.session_present and self._subscriptions_synced:
+                        _LOGGER.debug("Session resumed. Skipping resubscription")
+                    else:
+                        _LOGGER.debug("Subscribe to all previous subscriptions")
+                        self._subscriptions_synced = False
+                        await _subscribe(
+                            client,
+                            [
+                                topic
+                                for device_id in self._device_ids
+                                for topic in _get_topics(
+                                    self._subscriptions[device_id].device_info
+                                )
+                            ],
+                            self._qos,
+                        )
+                        self._subscriptions_synced = True
+
+                    async def listen() -> None:
+                        async for message in client.messages:
+                            self._dispatcher.dispatch(
+                                _get_device_id(message.topic.value), message
+                            )
+
+                    tasks = [
+                        asyncio.create_task(listen()),
+                        asyncio.create_task(self._pending_subscriptions_worker(client)),
+                    ]
+                    self.client = client
+                    try:
+                        _LOGGER.debug("All mqtt tasks created")
+                        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        self.client = None
+                        for task in tasks:
+                            task.cancel()
+            except AioMqttError as ex:
+                delay = _get_reconnect_delay(attempt)
+                attempt += 1
+                _LOGGER.warning(
+                    "Connection lost; Reconnecting in %d seconds ...",
+                    delay,
+                    exc_info=True,
+                )
+                if _is_not_authorized(ex):
+                    await self._handle_not_authorized()
+            except AuthenticationError:
+                _LOGGER.exception(
+                    "Could not authenticate. Please check your credentials and afterwards reload the integration."
+                )
+                return
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("An exception occurred")
+                return
+            else:
+                delay = _get_reconnect_delay(attempt)
+
+            await asyncio.sleep(delay)
+
+    async def _pending_subscriptions_worker(self, client: Client) -> None:
+        while True:
+            # Drain the queue to send all pending changes in as few packets as possible
+            changes = [await self._subscription_changes.get()]
+            while not self._subscription_changes.empty():
+                changes.append(self._subscription_changes.get_nowait())
+
+            # Only the last change of a device is relevant
+            last_changes = {
+                info.device_info.api["did"]: (info, add) for info, add in changes
+            }
+            topics: dict[bool, list[str]] = {True: [], False: []}
+            # The subscriptions are updated first, so they will be restored on a
+            # reconnect, even if the connection is lost during (un)subscribing
+            for did, (info, add) in last_changes.items():
+                topics[add].extend(_get_topics(info.device_info))
+                if add:
+                    self._subscriptions[did] = info
+                    self._device_ids.add(did)
+                else:
+                    self._subscriptions.pop(did, None)
+                    self._device_ids.discard(did)
+
+            self._subscriptions_synced = False
+            await _unsubscribe(client, topics[False])
+            await _subscribe(client, topics[True], self._qos)
+            self._subscriptions_synced = True
+
+            for _ in changes:
+                self._subscription_changes.task_done()
 
 
 class MqttClient:
@@ -120,23 +507,61 @@ class MqttClient:
         self,
         config: MqttConfiguration,
         authenticator: Authenticator,
+        *,
+        executor: Executor | None = None,
+        recorder: TrafficRecorder | None = None,
     ) -> None:
+        """Initialize the client.
+
+        The devices are distributed by their did on the configured number of
+        connections. Messages are processed per device in order.
+        If an executor is given, large payloads (e.g. map pieces) are decoded in it.
+        If a recorder is given, all received messages are recorded.
+        """
         self._config = config
         self._authenticator = authenticator
+        self._executor = executor
+        self._recorder = recorder
+        self._dispatcher = _MessageDispatcher(
+            self._process_message, _MAX_DEVICE_QUEUE_SIZE, _MESSAGE_WORKERS
+        )
 
         self._subscriptions: MutableMapping[str, SubscriberInfo] = {}
-        self._subscription_changes: asyncio.Queue[tuple[SubscriberInfo, bool]] = (
-            asyncio.Queue()
-        )
-        self._mqtt_task: asyncio.Task[Any] | None = None
+        self._connections = [
+            _Connection(
+                partial(self._get_client, "" if i == 0 else f"-{i}"),
+                self._subscriptions,
+                self._dispatcher,
+                self._handle_not_authorized,
+                # Messages to a persistent session are only queued with QoS 1
+                qos=1 if config.persistent_session else 0,
+            )
+            for i in range(config.connections)
+        ]
 
         self._received_p2p_commands: MutableMapping[str, CommandMqttP2P] = TTLCache(
             maxsize=60 * 60, ttl=60
         )
+        self._pending_p2p_requests: dict[str, asyncio.Future[dict[str, Any]]] = {}
         self._last_message_received_at: datetime | None = None
+        # Topic prefix -> (handler, maxsplit), instead of matching each topic against
+        # the filters. The handlers resolve the subscription and command by fixed
+        # segment positions, so the topic is only split as far as the handler needs it.
+        self._topic_router: dict[
+            str,
+            tuple[
+                Callable[[list[str], str | bytes | bytearray | dict[str, Any]], None],
+                int,
+            ],
+        ] = {
+            # Only the command and did segments are needed
+            "iot/atr/": (self._handle_atr, 4),
+            "iot/p2p/": (self._handle_p2p, -1),
+        }
 
         async def on_credentials_changed(_: Credentials) -> None:
-            await self._create_mqtt_task()
+            for connection in self._connections:
+                await connection.reconnect()
 
         authenticator.subscribe(on_credentials_changed)
 
@@ -145,6 +570,21 @@ class MqttClient:
         """Return the datetime of the last received message or None."""
         return self._last_message_received_at
 
+    @property
+    def message_queue_depth(self) -> int:
+        """Return the number of received messages waiting to be processed."""
+        return self._dispatcher.queue_depth
+
+    @property
+    def message_lag(self) -> float:
+        """Return the seconds the oldest unprocessed message is waiting."""
+        return self._dispatcher.lag
+
+    @property
+    def message_drops(self) -> int:
+        """Return the number of received messages dropped because of a full queue."""
+        return self._dispatcher.dropped
+
     async def verify_config(self) -> None:
         """Verify config by connecting to the broker."""
         try:
@@ -157,29 +597,97 @@ class MqttClient:
     async def subscribe(self, info: SubscriberInfo) -> Callable[[], None]:
         """Subscribe for messages from given device."""
         await self.connect()
-        self._subscription_changes.put_nowait((info, True))
+        connection = self._get_connection(info.device_info.api["did"])
+        connection.change_subscription(info, add=True)
 
         def unsubscribe() -> None:
-            self._subscription_changes.put_nowait((info, False))
+            connection.change_subscription(info, add=False)
 
         return unsubscribe
 
+    async def send_p2p_command(
+        self,
+        name: str,
+        payload: dict[str, Any] | list[Any] | str,
+        device_info: ApiDeviceInfo,
+        data_type: DataType,
+    ) -> dict[str, Any]:
+        """Send a command over the p2p channel and return the response payload.
+
+        Responses can only be received for subscribed devices.
+        Raises MqttError if not connected and TimeoutError if no response was received in time.
+        """
+        if (client := self._get_connection(device_info["did"]).client) is None:
+            raise MqttError("Not connected")
+
+        credentials = await self._authenticator.authenticate()
+        request_id = uuid.uuid4().hex[:8]
+        topic = (
+            f"iot/p2p/{name}/{credentials.user_id}/ecouser/{self._config.device_id}"
+            f"/{device_info['did']}/{device_info['class']}/{device_info['resource']}"
+            f"/q/{request_id}/{data_type.value}"
+        )
+        future: asyncio.Future[dict[str, Any]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._pending_p2p_requests[request_id] = future
+        try:
+            await client.publish(
+                topic, payload if isinstance(payload, str) else json_dumps(payload)
+            )
+            async with asyncio.timeout(P2P_TIMEOUT):
+                return await future
+        except AioMqttError as ex:
+            raise MqttError("Could not publish p2p command") from ex
+        finally:
+            self._pending_p2p_requests.pop(request_id, None)
+
+    def inject_message(self, topic: str, payload: str | bytes) -> None:
+        """Handle the given message as it would have been received from the broker.
+
+        Used to replay recorded traffic.
+        """
+        self._dispatcher.dispatch(
+            _get_device_id(topic),
+            Message(
+                topic,
+                payload.encode() if isinstance(payload, str) else payload,
+                0,
+                retain=False,
+                mid=0,
+                properties=None,
+            ),
+        )
+
     async def connect(self) -> None:
         """Connect to MQTT."""
-        if self._mqtt_task is None or self._mqtt_task.done():
-            # call authenticator to verify that we have valid credentials
-            await self._authenticator.authenticate()
+        # call authenticator to verify that we have valid credentials
+        await self._authenticator.authenticate()
 
-            await self._create_mqtt_task()
+        for connection in self._connections:
+            await connection.connect()
 
     async def disconnect(self) -> None:
         """Disconnect from MQTT."""
-        await self._cancel_mqtt_task()
-
-    async def _get_client(self) -> Client:
+        for connection in self._connections:
+            await connection.disconnect()
+        await self._dispatcher.teardown()
+
+    def _get_connection(self, did: str) -> _Connection:
+        if len(self._connections) == 1:
+            return self._connections[0]
+        # Rendezvous hashing, so only the devices of a removed or added
+        # connection are moved, when the number of connections changes
+        index = max(range(len(self._connections)), key=lambda i: md5(f"{i}/{did}"))
+        return self._connections[index]
+
+    async def _get_client(self, client_id_suffix: str = "") -> _Client:
         credentials = await self._authenticator.authenticate()
-        client_id = f"{credentials.user_id}@ecouser/{self._config.device_id}"
-        return Client(
+        # The client id must be stable to resume a persistent session
+        client_id = (
+            f"{credentials.user_id}@ecouser/{self._config.device_id}{client_id_suffix}"
+        )
+        return _Client(
             hostname=self._config.hostname,
             port=self._config.port,
             username=credentials.user_id,
@@ -187,63 +695,36 @@ class MqttClient:
             logger=_CLIENT_LOGGER,
             identifier=client_id,
             tls_context=self._config.ssl_context,
+            clean_session=not self._config.persistent_session,
         )
 
-    async def _cancel_mqtt_task(self) -> None:
-        if self._mqtt_task is not None and self._mqtt_task.cancel():
-            # Wait for the task to be cancelled
-            with suppress(asyncio.CancelledError):
-                await self._mqtt_task
-
-    async def _create_mqtt_task(self) -> None:
-        async def mqtt() -> None:
-            while True:
-                try:
-                    async with await self._get_client() as client:
-                        _LOGGER.debug("Subscribe to all previous subscriptions")
-                        for info in self._subscriptions.values():
-                            for topic in _get_topics(info.device_info):
-                                await client.subscribe(topic)
-
-                        async def listen() -> None:
-                            async for message in client.messages:
-                                self._handle_message(message)
-
-                        tasks = [
-                            asyncio.create_task(listen()),
-                            asyncio.create_task(
-                                self._pending_subscriptions_worker(client)
-                            ),
-                        ]
-                        try:
-                            _LOGGER.debug("All mqtt tasks created")
-                            await asyncio.wait(
-                                tasks, return_when=asyncio.FIRST_COMPLETED
-                            )
-                        finally:
-                            for task in tasks:
-                                task.cancel()
-                except AioMqttError:
-                    _LOGGER.warning(
-                        "Connection lost; Reconnecting in %d seconds ...",
-                        RECONNECT_INTERVAL,
-                        exc_info=True,
-                    )
-                except AuthenticationError:
-                    _LOGGER.exception(
-                        "Could not authenticate. Please check your credentials and afterwards reload the integration."
-                    )
-                    return
-                except Exception:  # pylint: disable=broad-except
-                    _LOGGER.exception("An exception occurred")
-                    return
-
-                await asyncio.sleep(RECONNECT_INTERVAL)
+    async def _handle_not_authorized(self) -> None:
+        try:
+            await self._authenticator.handle_rejected_credentials(
+                await self._authenticator.authenticate()
+            )
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception(
+                "An exception occurred during handling rejected credentials"
+            )
 
-        await self._cancel_mqtt_task()
-        self._mqtt_task = asyncio.create_task(mqtt())
+    async def _process_message(self, message: Message) -> None:
+        payload = message.payload
+        if (
+            self._executor is not None
+            and isinstance(payload, str | bytes | bytearray)
+            and len(payload) >= _EXECUTOR_PAYLOAD_SIZE
+        ):
+            decoded_payload = await asyncio.get_running_loop().run_in_executor(
+                self._executor, json_loads, payload
+            )
+            self._handle_message(message, decoded_payload)
+        else:
+            self._handle_message(message)
 
-    def _handle_message(self, message: Message) -> None:
+    def _handle_message(
+        self, message: Message, decoded_payload: dict[str, Any] | None = None
+    ) -> None:
         _LOGGER.debug(
             "Got message: topic=%s, payload=%s", message.topic, message.payload
         )
@@ -257,34 +738,23 @@ class MqttClient:
             )
             return
 
-        topic_split = message.topic.value.split("/")
-        if message.topic.matches("iot/atr/#"):
-            self._handle_atr(topic_split, message.payload)
-        elif message.topic.matches("iot/p2p/#"):
-            self._handle_p2p(topic_split, message.payload)
+        topic = message.topic.value
+        if self._recorder:
+            self._recorder.record(TrafficKind.MQTT, topic, message.payload)
+
+        if route := self._topic_router.get(topic[:_TOPIC_PREFIX_LENGTH]):
+            handler, maxsplit = route
+            handler(
+                topic.split("/", maxsplit),
+                message.payload if decoded_payload is None else decoded_payload,
+            )
         else:
             _LOGGER.debug("Got unsupported topic: %s", message.topic)
 
-    async def _pending_subscriptions_worker(self, client: Client) -> None:
-        while True:
-            (info, add) = await self._subscription_changes.get()
-
-            device_info = info.device_info
-            for topic in _get_topics(device_info):
-                if add:
-                    await client.subscribe(topic)
-                else:
-                    await client.unsubscribe(topic)
-
-            if add:
-                self._subscriptions[device_info.api["did"]] = info
-            else:
-                self._subscriptions.pop(device_info.api["did"], None)
-
-            self._subscription_changes.task_done()
-
     def _handle_atr(
-        self, topic_split: list[str], payload: str | bytes | bytearray
+        self,
+        topic_split: list[str],
+        payload: str | bytes | bytearray | dict[str, Any],
     ) -> None:
         try:
             if sub_info := self._subscriptions.get(topic_split[3]):
@@ -293,13 +763,24 @@ class MqttClient:
             _LOGGER.exception("An exception occurred during handling atr message")
 
     def _handle_p2p(
-        self, topic_split: list[str], payload: str | bytes | bytearray
+        self,
+        topic_split: list[str],
+        payload: str | bytes | bytearray | dict[str, Any],
     ) -> None:
         try:
-            if (data_type := DataType.get(topic_split[11])) is None:
+            if (data_type := _DATA_TYPES.get(topic_split[11])) is None:
                 _LOGGER.warning('Unsupported data type: "%s"', topic_split[11])
                 return
 
+            is_request = topic_split[9] == "q"
+            request_id = topic_split[10]
+
+            if (future := self._pending_p2p_requests.get(request_id)) is not None:
+                # Request or response of a command sent by us
+                if not is_request and not future.done():
+                    future.set_result(_decode_payload(payload))
+                return
+
             command_name = topic_split[2]
             command_type = COMMANDS_WITH_MQTT_P2P_HANDLING.get(data_type, {}).get(
                 command_name, None
@@ -310,11 +791,8 @@ class MqttClient:
                 )
                 return
 
-            is_request = topic_split[9] == "q"
-            request_id = topic_split[10]
-
             if is_request:
-                payload_json = json.loads(payload)
+                payload_json = _decode_payload(payload)
                 try:
                     data = payload_json["body"]["data"]
                 except KeyError:
@@ -330,8 +808,10 @@ class MqttClient:
                 )
             elif command := self._received_p2p_commands.pop(request_id, None):
                 if sub_info := self._subscriptions.get(topic_split[3]):
-                    data = json.loads(payload)
+                    data = _decode_payload(payload)
                     command.handle_mqtt_p2p(sub_info.events, data)
+                    if sub_info.p2p_callback:
+                        sub_info.p2p_callback(command)
             else:
                 _LOGGER.debug(
                     "Response to command came in probably to late. requestId=%s, commandName=%s",
@@ -4,9 +4,12 @@ from __future__ import annotations
 
 from abc import ABC
 import asyncio
-from contextlib import suppress
-from enum import Enum
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from enum import Enum, StrEnum
 import hashlib
+import random
+import time
 from typing import TYPE_CHECKING, Any, TypeVar
 
 from deebot_client.logging_filter import get_logger
@@ -14,7 +17,7 @@ from deebot_client.logging_filter import get_logger
 _LOGGER = get_logger(__name__)
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, Coroutine, Iterable
+    from collections.abc import AsyncIterator, Callable, Coroutine, Iterable
 
 _T = TypeVar("_T")
 
@@ -130,3 +133,244 @@ LST = list[_T] | set[_T] | tuple[_T, ...]
 def short_name(value: str) -> str:
     """Return value after last dot."""
     return value.rsplit(".", maxsplit=1)[-1]
+
+
+class TokenBucket:
+    """Token bucket rate limiter.
+
+    Tokens are refilled continuously with the given rate up to the capacity.
+    Waiting callers sleep until a token is available, extended by a random jitter
+    to avoid that all of them wake up at the same time.
+    """
+
+    def __init__(self, rate: float, capacity: int, *, jitter: float = 0) -> None:
+        if rate <= 0 or capacity < 1:
+            msg = "rate must be positive and capacity at least 1"
+            raise ValueError(msg)
+
+        self._rate = rate
+        self._capacity = capacity
+        self._jitter = jitter
+        self._tokens: float = capacity
+        self._updated_at = time.monotonic()
+
+    @property
+    def tokens(self) -> float:
+        """Return the currently available tokens."""
+        self._refill()
+        return self._tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+
+    def try_acquire(self) -> bool:
+        """Take a token without waiting and return True on success."""
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        while not self.try_acquire():
+            delay = (1 - self._tokens) / self._rate
+            if self._jitter > 0:
+                delay += random.uniform(0, self._jitter)  # noqa: S311
+            await asyncio.sleep(delay)
+
+
+class AdaptiveLimiter:
+    """Concurrency limiter, which adapts its limit using AIMD.
+
+    After each successful call, which was faster than the latency threshold,
+    the limit is increased additively (about +1 per limit calls).
+    After a failed or slow call, the limit is decreased multiplicatively.
+
+    Free slots are handed over to the waiters with the lowest priority value first.
+    To prevent starvation, the priority of a waiter is raised by one for each
+    aging_interval seconds it is waiting.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        *,
+        min_limit: int = 1,
+        max_limit: int,
+        latency_threshold: float,
+        backoff_ratio: float = 0.5,
+        aging_interval: float = 5,
+    ) -> None:
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            msg = "limits must satisfy 1 <= min_limit <= initial_limit <= max_limit"
+            raise ValueError(msg)
+        if not 0 < backoff_ratio < 1:
+            msg = "backoff_ratio must be between 0 and 1"
+            raise ValueError(msg)
+
+        self._limit: float = initial_limit
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._latency_threshold = latency_threshold
+        self._backoff_ratio = backoff_ratio
+        self._aging_interval = aging_interval
+        self._in_flight = 0
+        # Waiters by priority with the time they started waiting
+        self._waiters: dict[int, deque[tuple[float, asyncio.Future[None]]]] = {}
+
+    @property
+    def limit(self) -> int:
+        """Return the current limit."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of calls currently in flight."""
+        return self._in_flight
+
+    async def acquire(self, priority: int = 0) -> None:
+        """Wait until a slot is free and take it."""
+        if not self._waiters and self._in_flight < self.limit:
+            self._in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (time.monotonic(), future)
+        self._waiters.setdefault(priority, deque()).append(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was already handed over to us
+                self._in_flight -= 1
+                self._wake_up_waiters()
+            raise
+        finally:
+            if (waiters := self._waiters.get(priority)) is not None:
+                with suppress(ValueError):
+                    waiters.remove(waiter)
+                if not waiters:
+                    del self._waiters[priority]
+
+    def release(self, latency: float, *, failed: bool = False) -> None:
+        """Release a slot and adapt the limit to the outcome of the call."""
+        self._in_flight -= 1
+        if failed or latency > self._latency_threshold:
+            limit = max(self._min_limit, self._limit * self._backoff_ratio)
+            if int(limit) < self.limit:
+                _LOGGER.debug("Decreasing concurrency limit to %d", int(limit))
+            self._limit = limit
+        else:
+            self._limit = min(self._max_limit, self._limit + 1 / self._limit)
+        self._wake_up_waiters()
+
+    def release_unmeasured(self) -> None:
+        """Release a slot without adapting the limit.
+
+        Used if the call was not made or is not representative (e.g. cached).
+        """
+        self._in_flight -= 1
+        self._wake_up_waiters()
+
+    def _wake_up_waiters(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            now = time.monotonic()
+            # The first waiter of each priority is the one waiting the longest
+            priority = min(
+                self._waiters,
+                key=lambda prio: (
+                    prio - (now - self._waiters[prio][0][0]) / self._aging_interval,
+                    prio,
+                ),
+            )
+            waiters = self._waiters[priority]
+            _, future = waiters.popleft()
+            if not waiters:
+                del self._waiters[priority]
+            if not future.done():
+                self._in_flight += 1
+                future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 0) -> AsyncIterator[None]:
+        """Hold a slot while in the context.
+
+        Raised exceptions are counted as failed calls.
+        """
+        await self.acquire(priority)
+        start = time.monotonic()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(time.monotonic() - start, failed=failed)
+
+
+class CircuitState(StrEnum):
+    """Circuit breaker state."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Circuit breaker.
+
+    After failure_threshold consecutive failures the circuit opens and all
+    requests should fail fast. After reset_timeout a single probe request is
+    allowed (half-open). Its success closes the circuit again and its failure
+    opens it for another reset_timeout.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30) -> None:
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> CircuitState:
+        """Return the current state."""
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a request is allowed."""
+        if self._state == CircuitState.CLOSED:
+            return True
+
+        # A probe is allowed once per reset_timeout, so a lost probe doesn't block forever
+        now = time.monotonic()
+        if now - self._opened_at >= self._reset_timeout:
+            self._state = CircuitState.HALF_OPEN
+            self._opened_at = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Record a successful request."""
+        if self._state != CircuitState.CLOSED:
+            _LOGGER.debug("Closing circuit breaker")
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        """Record a failed request."""
+        self._failures += 1
+        if (
+            self._state == CircuitState.HALF_OPEN
+            or self._failures >= self._failure_threshold
+        ):
+            if self._state == CircuitState.CLOSED:
+                _LOGGER.debug("Opening circuit breaker")
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
@@ -0,0 +1,78 @@
+"""Json util module.
+
+Uses orjson or msgspec if installed and falls back to the json module of the stdlib.
+Typed decoding is only supported by msgspec.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import json
+from typing import Any
+
+from deebot_client.logging_filter import get_logger
+
+_LOGGER = get_logger(__name__)
+
+JsonLoads = Callable[[str | bytes | bytearray], Any]
+JsonDumps = Callable[[Any], str]
+
+
+def _get_codec() -> tuple[str, JsonLoads, JsonDumps]:
+    try:
+        import orjson  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        pass
+    else:
+        orjson_dumps = orjson.dumps
+        # Same as the stdlib, which converts keys like int to str
+        orjson_option = orjson.OPT_NON_STR_KEYS
+
+        def orjson_json_dumps(obj: Any) -> str:
+            return orjson_dumps(obj, option=orjson_option).decode()
+
+        return "orjson", orjson.loads, orjson_json_dumps
+
+    try:
+        import msgspec  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        pass
+    else:
+        encoder = msgspec.json.Encoder()
+        decoder = msgspec.json.Decoder()
+
+        def msgspec_json_dumps(obj: Any) -> str:
+            return encoder.encode(obj).decode()
+
+        return "msgspec", decoder.decode, msgspec_json_dumps
+
+    return "json", json.loads, json.dumps
+
+
+JSON_CODEC, json_loads, json_dumps = _get_codec()
+
+
+def create_typed_loads(type_: Any) -> JsonLoads:
+    """Create a loads function, which decodes the payload directly into the given type.
+
+    With msgspec, the payload is decoded in a single pass, where all fields,
+    which are not part of the type, are skipped. Only if the payload does not
+    match the type, it is decoded again with json_loads.
+    If msgspec is not installed, json_loads is used instead.
+    """
+    try:
+        import msgspec  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return json_loads
+
+    decode = msgspec.json.Decoder(type_).decode
+    validation_error = msgspec.ValidationError
+
+    def typed_loads(payload: str | bytes | bytearray) -> Any:
+        try:
+            return decode(payload)
+        except validation_error as err:
+            _LOGGER.debug("Payload does not match the schema: %s", err)
+            return json_loads(payload)
+
+    return typed_loads
@@ -0,0 +1,171 @@
+"""Traffic module.
+
+Records the received mqtt messages and api responses and replays them,
+e.g. to benchmark the message handling without a broker or the cloud.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from enum import StrEnum
+from pathlib import Path
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from deebot_client.logging_filter import get_logger
+
+from .json import json_dumps, json_loads
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+    from deebot_client.device import Device
+
+_LOGGER = get_logger(__name__)
+
+
+class TrafficKind(StrEnum):
+    """Traffic kind."""
+
+    MQTT = "mqtt"
+    REST = "rest"
+
+
+@dataclass(frozen=True)
+class TrafficRecord:
+    """Traffic record.
+
+    For mqtt messages the name is the topic, for api responses the path.
+    Api responses of device commands have the name of the command.
+    """
+
+    timestamp: float
+    kind: TrafficKind
+    name: str
+    payload: str
+    command: str | None = None
+
+
+class TrafficRecorder:
+    """Recorder, which appends the traffic as json lines to a file.
+
+    The lines are written by a background thread, so recording doesn't block the event loop.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = Path(path)
+        # None signals the writer to stop
+        self._lines: queue.SimpleQueue[str | None] = queue.SimpleQueue()
+        self._writer: threading.Thread | None = None
+
+    def record(
+        self,
+        kind: TrafficKind,
+        name: str,
+        payload: str | bytes | bytearray | dict[str, Any],
+        *,
+        command: str | None = None,
+    ) -> None:
+        """Record the given traffic."""
+        if isinstance(payload, bytes | bytearray):
+            payload = payload.decode()
+        elif isinstance(payload, dict):
+            payload = json_dumps(payload)
+
+        if self._writer is None:
+            self._writer = threading.Thread(
+                target=self._write, name="TrafficRecorder", daemon=True
+            )
+            self._writer.start()
+        self._lines.put(
+            json_dumps([time.time(), kind.value, name, payload, command]) + "\n"
+        )
+
+    def close(self) -> None:
+        """Write the pending records and close the file.
+
+        Blocks until the writer thread is done.
+        """
+        if self._writer is not None:
+            self._lines.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def _write(self) -> None:
+        try:
+            with self._path.open("a", encoding="utf-8") as file:
+                while (line := self._lines.get()) is not None:
+                    file.write(line)
+                    if self._lines.empty():
+                        file.flush()
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Could not write the traffic to %s", self._path)
+
+
+def read_records(path: str | Path) -> Iterator[TrafficRecord]:
+    """Read the records of the given file."""
+    with Path(path).open(encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                # Records without command were written by older versions
+                timestamp, kind, name, payload, *command = json_loads(line)
+                yield TrafficRecord(
+                    timestamp,
+                    TrafficKind(kind),
+                    name,
+                    payload,
+                    command[0] if command else None,
+                )
+
+
+async def replay(
+    records: Iterable[TrafficRecord],
+    handle: Callable[[TrafficRecord], None],
+    *,
+    speed: float | None = None,
+) -> int:
+    """Replay the records and return the number of replayed records.
+
+    Without speed the records are replayed as fast as possible.
+    Otherwise, the recorded timing is kept, but scaled by speed (2 -> twice as fast).
+    """
+    count = 0
+    first_timestamp: float | None = None
+    start = time.monotonic()
+    for record in records:
+        if speed is not None:
+            if first_timestamp is None:
+                first_timestamp = record.timestamp
+            delay = (record.timestamp - first_timestamp) / speed - (
+                time.monotonic() - start
+            )
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        try:
+            handle(record)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("An exception occurred during replaying %s", record)
+        count += 1
+
+    return count
+
+
+def get_device_handler(device: Device) -> Callable[[TrafficRecord], None]:
+    """Return a handler, which passes the recorded traffic to the device.
+
+    Atr messages are handled as messages and api responses of commands
+    as command responses.
+    """
+
+    def handle(record: TrafficRecord) -> None:
+        if record.kind == TrafficKind.MQTT and record.name.startswith("iot/atr/"):
+            # The command name is the third part of the atr topic
+            device.inject_message(record.name.split("/")[2], record.payload)
+        elif record.kind == TrafficKind.REST and record.command is not None:
+            device.inject_response(record.command, json_loads(record.payload))
+
+    return handle
@@ -13,6 +13,7 @@ from deebot_client.api_client import ApiClient
 from deebot_client.authentication import Authenticator, create_rest_config
 from deebot_client.hardware.deebot import DEVICES, _load
 from deebot_client.util import md5
+from scripts import generate_hardware_index
 
 
 async def main() -> None:
@@ -60,6 +61,9 @@ async def main() -> None:
                             ),
                         )
 
+        # Add the linked models to the index
+        generate_hardware_index.main()
+
 
 if __name__ == "__main__":
     loop = asyncio.new_event_loop()
@@ -0,0 +1,49 @@
+"""Script to generate the index of the hardware modules.
+
+Has to be executed after a model is added or linked to another one.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+HARDWARE_FOLDER = Path(__file__).parents[1] / "deebot_client" / "hardware" / "deebot"
+INDEX_FILE = HARDWARE_FOLDER / "_index.py"
+
+_HEADER = '''"""Index of the hardware modules.
+
+Generated by scripts/generate_hardware_index.py. Do not edit manually.
+"""
+
+from __future__ import annotations
+
+# Device class -> module implementing it, with symlinks resolved
+MODULES: dict[str, str] = {
+'''
+
+
+def get_modules(folder: Path = HARDWARE_FOLDER) -> dict[str, str]:
+    """Return the device classes and the canonical modules implementing them."""
+    return {
+        path.stem: path.resolve().stem
+        for path in sorted(folder.glob("*.py"))
+        if not path.name.startswith("_")
+    }
+
+
+def generate_index(folder: Path = HARDWARE_FOLDER) -> str:
+    """Generate the content of the index module."""
+    lines = [
+        f'    "{class_}": "{module}",\n'
+        for class_, module in get_modules(folder).items()
+    ]
+    return _HEADER + "".join(lines) + "}\n"
+
+
+def main() -> None:
+    """Execute script."""
+    INDEX_FILE.write_text(generate_index(), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -28,9 +28,12 @@ def _wrap_command(
         authenticator: Authenticator,
         device_info: ApiDeviceInfo,
         event_bus: EventBus,
+        **kwargs: Any,
     ) -> tuple[CommandResult, dict[str, Any]]:
         nonlocal result, response
-        result, response = await execute_fn(authenticator, device_info, event_bus)
+        result, response = await execute_fn(
+            authenticator, device_info, event_bus, **kwargs
+        )
         return result, response
 
     def verify_result(
@@ -14,7 +14,7 @@ from deebot_client.authentication import (
     RestConfiguration,
     create_rest_config as create_config_rest,
 )
-from deebot_client.event_bus import EventBus
+from deebot_client.event_bus import EventBus, create_refresh_bucket
 from deebot_client.hardware.deebot import get_static_device_info
 from deebot_client.models import (
     ApiDeviceInfo,
@@ -60,6 +60,7 @@ def rest_config(
 @pytest.fixture
 def authenticator() -> Authenticator:
     authenticator = Mock(spec_set=Authenticator)
+    authenticator.refresh_bucket = create_refresh_bucket()
     authenticator.authenticate.return_value = Credentials("token", "user_id", 9999)
     authenticator.post_authenticated.return_value = {
         "header": {
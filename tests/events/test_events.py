@@ -2,10 +2,73 @@
 
 from __future__ import annotations
 
-from deebot_client.events import LifeSpan
+from deebot_client.events import (
+    AdvancedModeEvent,
+    AvailabilityEvent,
+    BatteryEvent,
+    CleanJobStatus,
+    CleanLogEntry,
+    CleanLogEvent,
+    ContinuousCleaningEvent,
+    LifeSpan,
+    MapTraceEvent,
+    StateEvent,
+    WaterAmount,
+    WaterInfoEvent,
+)
+from deebot_client.models import State
 
 
 def test_life_span() -> None:
     """Test life span events."""
     assert LifeSpan.BRUSH != LifeSpan.FILTER
     assert LifeSpan.FILTER not in {LifeSpan.BLADE, LifeSpan.BRUSH, LifeSpan.SIDE_BRUSH}
+
+
+def test_slots() -> None:
+    """Test that events don't have a __dict__."""
+    assert not hasattr(BatteryEvent(100), "__dict__")
+    assert not hasattr(AdvancedModeEvent(enabled=True), "__dict__")
+
+
+def test_interned_events() -> None:
+    """Test that equal events with a small value space are shared."""
+    assert StateEvent(State.DOCKED) is StateEvent(State.DOCKED)
+    assert StateEvent(State.DOCKED) is not StateEvent(State.IDLE)
+    assert AvailabilityEvent(available=True) is AvailabilityEvent(available=True)
+    assert WaterInfoEvent(WaterAmount.LOW, mop_attached=True) is WaterInfoEvent(
+        WaterAmount.LOW, None, mop_attached=True
+    )
+    # Subclasses are interned separately
+    assert isinstance(ContinuousCleaningEvent(enabled=True), ContinuousCleaningEvent)
+
+    # Other events are not interned
+    assert BatteryEvent(100) is not BatteryEvent(100)
+
+
+def test_fingerprint() -> None:
+    """Test that large events are compared by their fingerprint first."""
+    logs = [
+        CleanLogEntry(
+            1, "https://localhost/1.png", "auto", 10, CleanJobStatus.FINISHED, 600
+        ),
+        CleanLogEntry(
+            2, "https://localhost/2.png", "auto", 20, CleanJobStatus.FINISHED, 1200
+        ),
+    ]
+    event = CleanLogEvent(logs)
+    assert event.fingerprint == CleanLogEvent(list(logs)).fingerprint
+    assert event.is_duplicate_of(CleanLogEvent(list(logs)))
+    assert not event.is_duplicate_of(CleanLogEvent(logs[:1]))
+    assert not event.is_duplicate_of(None)
+
+    trace = MapTraceEvent(start=0, total=200, data="XQAABAA")
+    assert trace.is_duplicate_of(MapTraceEvent(start=0, total=200, data="XQAABAA"))
+    assert not trace.is_duplicate_of(
+        MapTraceEvent(start=200, total=200, data="XQAABAA")
+    )
+
+    # A fingerprint collision is not a duplicate
+    other = MapTraceEvent(start=0, total=200, data="other")
+    object.__setattr__(other, "_fingerprint", trace.fingerprint)
+    assert not trace.is_duplicate_of(other)
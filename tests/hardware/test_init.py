@@ -85,6 +85,7 @@ from deebot_client.events.map import (
 from deebot_client.events.network import NetworkInfoEvent
 from deebot_client.events.water_info import WaterInfoEvent
 from deebot_client.hardware import deebot as hardware_deebot, get_static_device_info
+from deebot_client.hardware.deebot._index import MODULES
 
 if TYPE_CHECKING:
     from collections.abc import Callable
@@ -257,10 +258,28 @@ def test_all_models_loaded() -> None:
     """Test that all models are loaded."""
     hardware_deebot._load()
     folder = Path(hardware_deebot.__file__).parent
-    assert list(hardware_deebot.DEVICES) == sorted(
+    assert sorted(hardware_deebot.DEVICES) == sorted(
         [
             name.removesuffix(".py")
             for name in os.listdir(folder)
-            if (folder / name).is_file() and name != "__init__.py"
+            if (folder / name).is_file() and not name.startswith("_")
         ]
     )
+
+
+def test_index_up_to_date() -> None:
+    """Test that the index matches the hardware modules."""
+    folder = Path(hardware_deebot.__file__).parent
+    assert {
+        name.removesuffix(".py"): (folder / name).resolve().stem
+        for name in os.listdir(folder)
+        if name.endswith(".py") and not name.startswith("_")
+    } == MODULES, "Index is outdated. Please run scripts/generate_hardware_index.py"
+
+
+async def test_linked_models_share_device_info() -> None:
+    """Test that linked models are loaded once and share the device info."""
+    assert MODULES["1b23du"] == "2o4lnm"
+    assert await get_static_device_info("1b23du") is await get_static_device_info(
+        "2o4lnm"
+    )
@@ -29,3 +29,15 @@ def test_get_messages(
 ) -> None:
     """Test get messages."""
     assert get_message(name, data_type) == expected
+
+
+def test_get_messages_cached() -> None:
+    get_message.cache_clear()
+
+    assert get_message("onBattery", DataType.JSON) == OnBattery
+    assert get_message("onFwBuryPoint", DataType.JSON) is None
+    assert get_message.cache_info().misses == 2
+
+    assert get_message("onBattery", DataType.JSON) == OnBattery
+    assert get_message("onFwBuryPoint", DataType.JSON) is None
+    assert get_message.cache_info().hits == 2
@@ -1,6 +1,21 @@
 from __future__ import annotations
 
+import logging
+from typing import TYPE_CHECKING, Any
+from unittest.mock import Mock, patch
+
+import pytest
+
+from deebot_client.commands.json import Charge, GetLifeSpan, GetPos
+from deebot_client.event_bus import EventBus
+from deebot_client.events import BatteryEvent, Position, PositionsEvent
+from deebot_client.message import HandlingResult, HandlingState
 from deebot_client.messages import MESSAGES
+from deebot_client.messages.json import OnBattery
+from deebot_client.rs.map import PositionType
+
+if TYPE_CHECKING:
+    from deebot_client.message import Message
 
 
 def test_all_messages_4_abstract_methods() -> None:
@@ -8,3 +23,75 @@ def test_all_messages_4_abstract_methods() -> None:
     for messages in MESSAGES.values():
         for message in messages.values():
             message()
+
+
+@pytest.mark.parametrize(
+    ("message", "data", "expected_state", "expected_warnings"),
+    [
+        (
+            OnBattery,
+            {"body": {"data": {"value": 10, "isLow": 0}}},
+            HandlingState.SUCCESS,
+            0,
+        ),
+        (OnBattery, {"body": {"data": {"isLow": 0}}}, HandlingState.ERROR, 1),
+        (OnBattery, {"header": {}}, HandlingState.ERROR, 1),
+        (GetLifeSpan, {"body": {"data": []}}, HandlingState.SUCCESS, 0),
+        (Charge, {"body": {"code": 0, "msg": "ok"}}, HandlingState.SUCCESS, 0),
+    ],
+)
+def test_handle(
+    caplog: pytest.LogCaptureFixture,
+    message: type[Message],
+    data: dict[str, Any],
+    expected_state: HandlingState,
+    expected_warnings: int,
+) -> None:
+    event_bus = Mock(spec_set=EventBus)
+
+    assert message.handle(event_bus, data).state == expected_state
+    assert (
+        len([r for r in caplog.records if r.levelno == logging.WARNING])
+        == expected_warnings
+    )
+    if expected_state == HandlingState.SUCCESS and message is OnBattery:
+        event_bus.notify.assert_called_once_with(BatteryEvent(10))
+
+
+def test_handle_patched_leaf() -> None:
+    """Test that the handler calls the current leaf method of the message."""
+    event_bus = Mock(spec_set=EventBus)
+    result = HandlingResult.success()
+    data = {"body": {"data": {"value": 10, "isLow": 0}}}
+
+    with patch.object(
+        OnBattery, "_handle_body_data_dict", Mock(return_value=result)
+    ) as leaf:
+        assert OnBattery.handle(event_bus, data) is result
+
+    leaf.assert_called_once_with(event_bus, data["body"]["data"])
+    event_bus.notify.assert_not_called()
+
+
+def test_decode_with_schema() -> None:
+    payload = (
+        b'{"header":{"pri":1,"fwVer":"1.8.2"},"body":{"code":0,"msg":"ok",'
+        b'"data":{"deebotPos":{"x":1,"y":5,"a":85,"invalid":0},'
+        b'"chargePos":[{"x":5,"y":9,"a":0,"did":"x"}]}}}'
+    )
+    data = GetPos.decode(payload)
+    assert data["header"]["fwVer"] == "1.8.2"
+
+    event_bus = Mock(spec_set=EventBus)
+    assert GetPos.handle(event_bus, data).state == HandlingState.SUCCESS
+    event_bus.notify.assert_called_once_with(
+        PositionsEvent(
+            positions=[
+                Position(type=PositionType.DEEBOT, x=1, y=5, a=85),
+                Position(type=PositionType.CHARGER, x=5, y=9, a=0),
+            ]
+        )
+    )
+
+    # Messages without schema are decoded as they are
+    assert OnBattery.decode(payload)["body"]["code"] == 0
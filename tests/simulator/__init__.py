@@ -0,0 +1,19 @@
+"""In-process Ecovacs cloud simulator.
+
+Consists of an embedded mqtt broker, a fake portal and virtual bots,
+to load test the client end to end without docker or the real cloud.
+"""
+
+from __future__ import annotations
+
+from .bot import VirtualBot, compress_7z_base64_data
+from .broker import MqttBroker
+from .cloud import CloudSimulator, create_bots
+
+__all__ = [
+    "CloudSimulator",
+    "MqttBroker",
+    "VirtualBot",
+    "compress_7z_base64_data",
+    "create_bots",
+]
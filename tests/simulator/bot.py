@@ -0,0 +1,315 @@
+"""Virtual bots of the simulator."""
+
+from __future__ import annotations
+
+import base64
+from functools import cached_property
+import lzma
+import random
+import struct
+import time
+from typing import TYPE_CHECKING, Any
+import zlib
+
+from deebot_client.models import ApiDeviceInfo
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+_PIECES = 64
+_PIECE_SIZE = 100
+_TRACE_POINTS = 1000
+_ROOMS = 6
+
+# Pixel values of a map piece
+_FLOOR = 0x01
+_WALL = 0x02
+
+
+def compress_7z_base64_data(data: bytes) -> str:
+    """Compress data in the format used by Ecovacs (lzma alone with a 4 byte size)."""
+    compressed = lzma.compress(data, format=lzma.FORMAT_ALONE)
+    return base64.b64encode(
+        compressed[:5] + struct.pack("<I", len(data)) + compressed[13:]
+    ).decode()
+
+
+def _success(data: dict[str, Any] | list[Any] | None = None) -> dict[str, Any]:
+    body: dict[str, Any] = {"code": 0, "msg": "ok"}
+    if data is not None:
+        body["data"] = data
+    return body
+
+
+class VirtualBot:
+    """Virtual json bot, which answers commands with generated payloads.
+
+    All payloads are derived from a seeded random generator,
+    so the same did always results in the same bot.
+    """
+
+    def __init__(
+        self, did: str, *, device_class: str = "yna5xi", resource: str = "sim"
+    ) -> None:
+        self.did = did
+        self.device_class = device_class
+        self.resource = resource
+        self.received_commands = 0
+
+        self._random = random.Random(did)  # noqa: S311
+        self.map_id = str(self._random.randrange(100_000_000, 999_999_999))
+        self.battery = self._random.randint(20, 100)
+        self.state = "idle"
+        self._handlers: dict[str, Callable[[Any], dict[str, Any]]] = {
+            "getAdvancedMode": lambda _: _success({"enable": 1}),
+            "getBattery": lambda _: _success({"value": self.battery, "isLow": 0}),
+            "getCachedMapInfo": self._get_cached_map_info,
+            "getCarpertPressure": lambda _: _success({"enable": 1}),
+            "getChargeState": lambda _: _success(
+                {"isCharging": int(self.state == "idle"), "mode": "slot"}
+            ),
+            "getCleanInfo": lambda _: _success({"trigger": "app", "state": self.state}),
+            "getContinuousClean": lambda _: _success({"enable": 1}),
+            "getError": lambda _: _success({"code": [0]}),
+            "getLifeSpan": self._get_life_span,
+            "getMajorMap": self._get_major_map,
+            "getMapSet": self._get_map_set,
+            "getMapSubSet": self._get_map_sub_set,
+            "getMapTrace": self._get_map_trace,
+            "getMinorMap": self._get_minor_map,
+            "getMultimapState": lambda _: _success({"enable": 1}),
+            "getNetInfo": lambda _: _success(
+                {
+                    "ip": "192.168.1.100",
+                    "ssid": "Simulator",
+                    "rssi": str(self._random.randint(-80, -30)),
+                    "wkVer": "0.1.2",
+                    "mac": "AA:BB:CC:DD:EE:FF",
+                }
+            ),
+            "getOta": lambda _: _success(
+                {
+                    "autoSwitch": 0,
+                    "supportAuto": 1,
+                    "ver": "1.7.2",
+                    "status": "idle",
+                    "progress": 0,
+                }
+            ),
+            "getPos": self._get_pos,
+            "getSpeed": lambda _: _success({"speed": 0}),
+            "getStats": lambda _: _success({"area": 12, "time": 720, "type": "auto"}),
+            "getTotalStats": lambda _: _success(
+                {"area": 1234, "time": 98765, "count": 56}
+            ),
+            "getVolume": lambda _: _success({"volume": 7, "total": 10}),
+            "getWaterInfo": lambda _: _success({"amount": 2, "enable": 0}),
+            "charge": self._charge,
+            "clean": self._clean,
+        }
+
+    @property
+    def api_device_info(self) -> ApiDeviceInfo:
+        """Return the device info as returned by the api."""
+        return ApiDeviceInfo(
+            {
+                "did": self.did,
+                "name": self.did,
+                "class": self.device_class,
+                "resource": self.resource,
+                "company": "eco-ng",
+                "nick": f"Bot {self.did}",
+            }
+        )
+
+    def handle_command(self, name: str, data: Any) -> dict[str, Any]:
+        """Handle a command and return the response body."""
+        self.received_commands += 1
+        name = name.removesuffix("_V2")
+        if handler := self._handlers.get(name):
+            return handler(data or {})
+        # Set commands and unknown commands are acknowledged
+        return _success()
+
+    def get_atr_topic(self, name: str) -> str:
+        """Return the topic of the given message, which the bot sends over the atr channel."""
+        return f"iot/atr/{name}/{self.did}/{self.device_class}/{self.resource}/j"
+
+    def create_message(self, body: dict[str, Any]) -> dict[str, Any]:
+        """Create a message with header and the given body."""
+        return {
+            "header": {
+                "pri": 1,
+                "tzm": 480,
+                "ts": str(int(time.time() * 1000)),
+                "ver": "0.0.1",
+                "fwVer": "1.8.2",
+                "hwVer": "0.1.1",
+            },
+            "body": body,
+        }
+
+    def get_status_messages(self) -> list[tuple[str, dict[str, Any]]]:
+        """Return the messages, a bot sends periodically over the atr channel."""
+        return [
+            ("onBattery", self.create_message(self._handlers["getBattery"]({}))),
+            ("onPos", self.create_message(self._get_pos({}))),
+            (
+                "onCleanInfo",
+                self.create_message(self._handlers["getCleanInfo"]({})),
+            ),
+        ]
+
+    @cached_property
+    def _pieces(self) -> list[bytes | None]:
+        """Generate the pieces of a map with some rectangular rooms on first use."""
+        size = 8 * _PIECE_SIZE
+        grid = bytearray(size * size)
+        for _ in range(_ROOMS):
+            x = self._random.randrange(200, 500)
+            y = self._random.randrange(200, 500)
+            width = self._random.randrange(50, 150)
+            height = self._random.randrange(50, 150)
+            wall = bytes([_WALL]) * width
+            floor = bytes([_WALL]) + bytes([_FLOOR]) * (width - 2) + bytes([_WALL])
+            for row in range(y, y + height):
+                grid[row * size + x : row * size + x + width] = (
+                    wall if row in (y, y + height - 1) else floor
+                )
+
+        pieces: list[bytes | None] = []
+        for index in range(_PIECES):
+            top = index // 8 * _PIECE_SIZE
+            left = index % 8 * _PIECE_SIZE
+            piece = b"".join(
+                grid[row * size + left : row * size + left + _PIECE_SIZE]
+                for row in range(top, top + _PIECE_SIZE)
+            )
+            pieces.append(piece if any(piece) else None)
+        return pieces
+
+    @cached_property
+    def _trace(self) -> bytes:
+        """Generate a random walk as trace on first use."""
+        x = y = 0
+        points = bytearray()
+        for _ in range(_TRACE_POINTS):
+            x += self._random.randint(-5, 5)
+            y += self._random.randint(-5, 5)
+            points += struct.pack("<hhB", x, y, 0)
+        return bytes(points)
+
+    def _get_pos(self, _: dict[str, Any]) -> dict[str, Any]:
+        return _success(
+            {
+                "deebotPos": {
+                    "x": self._random.randint(-5000, 5000),
+                    "y": self._random.randint(-5000, 5000),
+                    "a": self._random.randint(-180, 180),
+                },
+                "chargePos": {"x": 0, "y": 0, "a": 0},
+            }
+        )
+
+    def _get_life_span(self, data: list[str] | dict[str, Any]) -> dict[str, Any]:
+        types = data if isinstance(data, list) else []
+        return _success(
+            [{"type": type_, "left": 8000, "total": 9000} for type_ in types]
+        )
+
+    def _get_cached_map_info(self, _: dict[str, Any]) -> dict[str, Any]:
+        return _success(
+            {
+                "enable": 1,
+                "info": [
+                    {
+                        "mid": self.map_id,
+                        "index": 0,
+                        "status": 1,
+                        "using": 1,
+                        "built": 1,
+                        "name": "Simulated",
+                    }
+                ],
+            }
+        )
+
+    def _get_major_map(self, _: dict[str, Any]) -> dict[str, Any]:
+        # crc32 of an empty piece marks the piece as not in use
+        empty_crc32 = zlib.crc32(bytes(_PIECE_SIZE * _PIECE_SIZE))
+        return _success(
+            {
+                "mid": self.map_id,
+                "pieceWidth": _PIECE_SIZE,
+                "pieceHeight": _PIECE_SIZE,
+                "cellWidth": 8,
+                "cellHeight": 8,
+                "pixel": 50,
+                "value": ",".join(
+                    str(empty_crc32 if piece is None else zlib.crc32(piece))
+                    for piece in self._pieces
+                ),
+            }
+        )
+
+    def _get_minor_map(self, data: dict[str, Any]) -> dict[str, Any]:
+        index = int(data["pieceIndex"])
+        piece = self._pieces[index] or bytes(_PIECE_SIZE * _PIECE_SIZE)
+        return _success(
+            {
+                "mid": self.map_id,
+                "type": "ol",
+                "pieceIndex": index,
+                "pieceValue": compress_7z_base64_data(piece),
+            }
+        )
+
+    def _get_map_trace(self, data: dict[str, Any]) -> dict[str, Any]:
+        start = int(data.get("traceStart", 0))
+        count = int(data.get("pointCount", 200))
+        return _success(
+            {
+                "tid": "1",
+                "totalCount": _TRACE_POINTS,
+                "traceStart": start,
+                "pointCount": count,
+                "traceValue": compress_7z_base64_data(
+                    self._trace[start * 5 : (start + count) * 5]
+                ),
+            }
+        )
+
+    def _get_map_set(self, data: dict[str, Any]) -> dict[str, Any]:
+        subsets = [{"mssid": str(i)} for i in range(_ROOMS)]
+        return _success(
+            {
+                "type": data.get("type", "ar"),
+                "count": len(subsets),
+                "mid": self.map_id,
+                "msid": "1",
+                "subsets": subsets if data.get("type", "ar") == "ar" else [],
+            }
+        )
+
+    def _get_map_sub_set(self, data: dict[str, Any]) -> dict[str, Any]:
+        x = self._random.randint(-5000, 4000)
+        y = self._random.randint(-5000, 4000)
+        return _success(
+            {
+                "type": data.get("type", "ar"),
+                "mid": self.map_id,
+                "mssid": data.get("mssid", "0"),
+                "subtype": "1",
+                "name": "",
+                "compress": 0,
+                "value": f"{x},{y};{x},{y + 1000};{x + 1000},{y + 1000};{x + 1000},{y}",
+            }
+        )
+
+    def _charge(self, _: dict[str, Any]) -> dict[str, Any]:
+        self.state = "idle"
+        return _success()
+
+    def _clean(self, data: dict[str, Any]) -> dict[str, Any]:
+        self.state = "idle" if data.get("act") == "stop" else "clean"
+        return _success()
@@ -0,0 +1,230 @@
+"""Minimal in-process mqtt broker of the simulator."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from contextlib import suppress
+from dataclasses import dataclass, field
+import struct
+
+from deebot_client.logging_filter import get_logger
+
+_LOGGER = get_logger(__name__)
+
+_CONNECT = 1
+_CONNACK = 2
+_PUBLISH = 3
+_PUBACK = 4
+_SUBSCRIBE = 8
+_SUBACK = 9
+_UNSUBSCRIBE = 10
+_UNSUBACK = 11
+_PINGREQ = 12
+_PINGRESP = 13
+_DISCONNECT = 14
+
+PublishHook = Callable[[str, bytes], None]
+
+
+def _encode_packet(packet_type: int, flags: int, data: bytes) -> bytes:
+    header = bytearray([packet_type << 4 | flags])
+    length = len(data)
+    while True:
+        byte, length = length % 128, length // 128
+        header.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(header) + data
+
+
+def _encode_str(value: str) -> bytes:
+    encoded = value.encode()
+    return struct.pack("!H", len(encoded)) + encoded
+
+
+def _decode_str(data: bytes, offset: int) -> tuple[str, int]:
+    (length,) = struct.unpack_from("!H", data, offset)
+    offset += 2
+    return data[offset : offset + length].decode(), offset + length
+
+
+@dataclass(eq=False)
+class _Session:
+    writer: asyncio.StreamWriter
+    filters: set[str] = field(default_factory=set)
+
+    def send(self, packet_type: int, flags: int, data: bytes) -> None:
+        self.writer.write(_encode_packet(packet_type, flags, data))
+
+
+@dataclass(eq=False)
+class _Node:
+    children: dict[str, _Node] = field(default_factory=dict)
+    sessions: set[_Session] = field(default_factory=set)
+
+
+class _SubscriptionTree:
+    """Topic tree, so matching does not depend on the number of subscriptions."""
+
+    def __init__(self) -> None:
+        self._root = _Node()
+
+    def add(self, topic_filter: str, session: _Session) -> None:
+        node = self._root
+        for level in topic_filter.split("/"):
+            node = node.children.setdefault(level, _Node())
+        node.sessions.add(session)
+
+    def remove(self, topic_filter: str, session: _Session) -> None:
+        node: _Node | None = self._root
+        for level in topic_filter.split("/"):
+            if node is None:
+                return
+            node = node.children.get(level)
+        if node is not None:
+            node.sessions.discard(session)
+
+    def match(self, topic: str) -> set[_Session]:
+        sessions: set[_Session] = set()
+        nodes = [self._root]
+        for level in topic.split("/"):
+            next_nodes = []
+            for node in nodes:
+                if wildcard := node.children.get("#"):
+                    sessions.update(wildcard.sessions)
+                if child := node.children.get(level):
+                    next_nodes.append(child)
+                if child := node.children.get("+"):
+                    next_nodes.append(child)
+            if not (nodes := next_nodes):
+                return sessions
+        for node in nodes:
+            sessions.update(node.sessions)
+            if wildcard := node.children.get("#"):
+                sessions.update(wildcard.sessions)
+        return sessions
+
+
+class MqttBroker:
+    """Minimal in-process MQTT 3.1.1 broker.
+
+    Supports QoS 0/1 publishes (delivered with QoS 0), wildcard subscriptions
+    and keep alive. Authentication, retained messages and wills are not supported.
+    """
+
+    def __init__(self) -> None:
+        self._server: asyncio.Server | None = None
+        self._sessions: set[_Session] = set()
+        self._subscriptions = _SubscriptionTree()
+        self._hooks: list[PublishHook] = []
+        # Replaced by a new event after each subscribe
+        self._subscribed = asyncio.Event()
+        self.received_messages = 0
+
+    @property
+    def port(self) -> int:
+        """Return the port the broker is listening on."""
+        assert self._server is not None
+        return int(self._server.sockets[0].getsockname()[1])
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Start the broker."""
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+
+    async def stop(self) -> None:
+        """Stop the broker and close all connections."""
+        for session in self._sessions:
+            session.writer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def wait_for_subscriber(self, topic: str) -> None:
+        """Wait until a client is subscribed to the given topic."""
+        while not self._subscriptions.match(topic):
+            await self._subscribed.wait()
+
+    def add_publish_hook(self, hook: PublishHook) -> None:
+        """Add a hook, which is called for every published message."""
+        self._hooks.append(hook)
+
+    def publish(self, topic: str, payload: str | bytes) -> None:
+        """Publish a message to all matching subscribers."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        data = _encode_str(topic) + payload
+        for session in self._subscriptions.match(topic):
+            session.send(_PUBLISH, 0, data)
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        session = _Session(writer)
+        self._sessions.add(session)
+        try:
+            while True:
+                first_byte = (await reader.readexactly(1))[0]
+                length = 0
+                multiplier = 1
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length += (byte & 0x7F) * multiplier
+                    multiplier *= 128
+                    if not byte & 0x80:
+                        break
+                data = await reader.readexactly(length)
+                if not self._handle_packet(session, first_byte, data):
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._sessions.discard(session)
+            for topic_filter in session.filters:
+                self._subscriptions.remove(topic_filter, session)
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    def _handle_packet(self, session: _Session, first_byte: int, data: bytes) -> bool:
+        packet_type, flags = first_byte >> 4, first_byte & 0x0F
+        if packet_type == _CONNECT:
+            session.send(_CONNACK, 0, b"\x00\x00")
+        elif packet_type == _PUBLISH:
+            topic, offset = _decode_str(data, 0)
+            if (flags >> 1) & 0x03:
+                session.send(_PUBACK, 0, data[offset : offset + 2])
+                offset += 2
+            self.received_messages += 1
+            payload = data[offset:]
+            for hook in self._hooks:
+                hook(topic, payload)
+            self.publish(topic, payload)
+        elif packet_type == _SUBSCRIBE:
+            offset = 2
+            granted = bytearray()
+            while offset < len(data):
+                topic_filter, offset = _decode_str(data, offset)
+                session.filters.add(topic_filter)
+                self._subscriptions.add(topic_filter, session)
+                # skip requested qos, we only grant qos 0
+                offset += 1
+                granted.append(0)
+            session.send(_SUBACK, 0, data[:2] + granted)
+            self._subscribed.set()
+            self._subscribed = asyncio.Event()
+        elif packet_type == _UNSUBSCRIBE:
+            offset = 2
+            while offset < len(data):
+                topic_filter, offset = _decode_str(data, offset)
+                session.filters.discard(topic_filter)
+                self._subscriptions.remove(topic_filter, session)
+            session.send(_UNSUBACK, 0, data[:2])
+        elif packet_type == _PINGREQ:
+            session.send(_PINGRESP, 0, b"")
+        elif packet_type == _DISCONNECT:
+            return False
+        else:
+            _LOGGER.warning("Unsupported packet type %d", packet_type)
+        return True
@@ -0,0 +1,217 @@
+"""Fake Ecovacs portal of the simulator."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Self
+
+from aiohttp import web
+
+from deebot_client import const
+from deebot_client.authentication import RestConfiguration, create_rest_config
+from deebot_client.logging_filter import get_logger
+from deebot_client.mqtt_client import MqttConfiguration, create_mqtt_config
+from deebot_client.util.json import json_dumps, json_loads
+
+from .bot import VirtualBot
+from .broker import MqttBroker
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from types import TracebackType
+
+    from aiohttp import ClientSession
+
+_LOGGER = get_logger(__name__)
+
+_HOST = "127.0.0.1"
+
+
+def create_bots(count: int, *, device_class: str = "yna5xi") -> list[VirtualBot]:
+    """Create the given number of virtual bots."""
+    return [VirtualBot(f"sim{i:05d}", device_class=device_class) for i in range(count)]
+
+
+class CloudSimulator:
+    """In-process Ecovacs cloud, which consists of a fake portal and a mqtt broker.
+
+    Supports the login flow, the device list, commands over the api and mqtt p2p
+    and clean logs for json bots. Can be used as async context manager.
+    """
+
+    def __init__(self, bots: Iterable[VirtualBot] = ()) -> None:
+        self.bots = {bot.did: bot for bot in bots}
+        self.user_id = "simuser"
+        self.token = "simtoken"  # noqa: S105
+        self.broker = MqttBroker()
+        self.broker.add_publish_hook(self._handle_p2p)
+        self.api_requests = 0
+
+        app = web.Application()
+        app.router.add_get("/v1/private/{path:.*}", self._login)
+        app.router.add_get("/v1/global/auth/getAuthCode", self._get_auth_code)
+        app.router.add_post("/api/{path:.*}", self._api)
+        self._runner = web.AppRunner(app)
+
+    @property
+    def rest_url(self) -> str:
+        """Return the url of the fake portal."""
+        return f"http://{_HOST}:{self._runner.addresses[0][1]}"
+
+    @property
+    def mqtt_url(self) -> str:
+        """Return the url of the broker."""
+        return f"mqtt://{_HOST}:{self.broker.port}"
+
+    def create_rest_config(
+        self, session: ClientSession, device_id: str = "simulator"
+    ) -> RestConfiguration:
+        """Create a rest configuration pointing to the simulator."""
+        return create_rest_config(
+            session,
+            device_id=device_id,
+            alpha_2_country="IT",
+            override_rest_url=self.rest_url,
+        )
+
+    def create_mqtt_config(
+        self, device_id: str = "simulator", **kwargs: Any
+    ) -> MqttConfiguration:
+        """Create a mqtt configuration pointing to the simulator."""
+        return create_mqtt_config(
+            device_id=device_id,
+            country="IT",
+            override_mqtt_url=self.mqtt_url,
+            **kwargs,
+        )
+
+    async def start(self) -> None:
+        """Start the portal and the broker."""
+        await self.broker.start(_HOST)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, _HOST, 0).start()
+
+    async def stop(self) -> None:
+        """Stop the portal and the broker."""
+        await self._runner.cleanup()
+        await self.broker.stop()
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        await self.stop()
+
+    async def wait_for_subscriptions(
+        self, bots: Iterable[VirtualBot] | None = None
+    ) -> None:
+        """Wait until a client is subscribed to the atr and p2p responses of the bots."""
+        topics = []
+        for bot in self.bots.values() if bots is None else bots:
+            topics.append(bot.get_atr_topic("onBattery"))
+            topics.append(
+                self._get_p2p_response_topic(bot, "getBattery", "client", "0")
+            )
+        await asyncio.gather(*map(self.broker.wait_for_subscriber, topics))
+
+    def push_status(self, bots: Iterable[VirtualBot] | None = None) -> int:
+        """Publish the status messages of the bots over mqtt.
+
+        :return: Number of published messages
+        """
+        count = 0
+        for bot in self.bots.values() if bots is None else bots:
+            for name, message in bot.get_status_messages():
+                self.broker.publish(bot.get_atr_topic(name), json_dumps(message))
+                count += 1
+        return count
+
+    async def _login(self, _: web.Request) -> web.Response:
+        return web.json_response(
+            {"code": "0000", "data": {"uid": self.user_id, "accessToken": "access"}}
+        )
+
+    async def _get_auth_code(self, _: web.Request) -> web.Response:
+        return web.json_response({"code": "0000", "data": {"authCode": "auth"}})
+
+    async def _api(self, request: web.Request) -> web.Response:
+        self.api_requests += 1
+        path = request.match_info["path"]
+        data = await request.json(loads=json_loads)
+        response: dict[str, Any]
+        match path:
+            case const.PATH_API_USERS_USER if data["todo"] == "loginByItToken":
+                response = {
+                    "result": "ok",
+                    "userId": self.user_id,
+                    "token": self.token,
+                    "last": "604800000",
+                }
+            case const.PATH_API_USERS_USER if data["todo"] == "GetDeviceList":
+                response = {
+                    "result": "ok",
+                    "devices": [bot.api_device_info for bot in self.bots.values()],
+                }
+            case const.PATH_API_APPSVR_APP:
+                response = {"ret": "ok", "devices": []}
+            case const.PATH_API_PIM_PRODUCT_IOT_MAP:
+                response = {
+                    "code": 0,
+                    "data": [
+                        {"classid": cls, "product": {"name": "Simulated bot"}}
+                        for cls in {bot.device_class for bot in self.bots.values()}
+                    ],
+                }
+            case const.PATH_API_IOT_DEVMANAGER:
+                response = self._handle_command(data)
+            case const.PATH_API_LG_LOG:
+                response = {"ret": "ok", "logs": []}
+            case _:
+                _LOGGER.warning("Unsupported api call %s: %s", path, data)
+                response = {"ret": "fail", "errno": 404, "error": "not found"}
+
+        return web.json_response(response, dumps=json_dumps)
+
+    def _handle_command(self, data: dict[str, Any]) -> dict[str, Any]:
+        if (bot := self.bots.get(data["toId"])) is None:
+            return {"ret": "fail", "errno": 500, "error": "device not found"}
+        if data["payloadType"] != const.DataType.JSON.value:
+            return {"ret": "fail", "errno": 500, "error": "xml is not supported"}
+
+        body = bot.handle_command(
+            data["cmdName"], data["payload"].get("body", {}).get("data")
+        )
+        return {"id": "sim", "ret": "ok", "resp": bot.create_message(body)}
+
+    def _handle_p2p(self, topic: str, payload: bytes) -> None:
+        # iot/p2p/{name}/{uid}/ecouser/{device_id}/{did}/{class}/{resource}/q/{request_id}/{data_type}
+        topic_split = topic.split("/")
+        if (
+            len(topic_split) != 12
+            or topic_split[1] != "p2p"
+            or topic_split[9] != "q"
+            or (bot := self.bots.get(topic_split[6])) is None
+        ):
+            return
+
+        name, _, _, device_id = topic_split[2:6]
+        request_id = topic_split[10]
+        data = json_loads(payload).get("body", {}).get("data")
+        self.broker.publish(
+            self._get_p2p_response_topic(bot, name, device_id, request_id),
+            json_dumps(bot.create_message(bot.handle_command(name, data))),
+        )
+
+    def _get_p2p_response_topic(
+        self, bot: VirtualBot, name: str, device_id: str, request_id: str
+    ) -> str:
+        return (
+            f"iot/p2p/{name}/{bot.did}/{bot.device_class}/{bot.resource}"
+            f"/{self.user_id}/ecouser/{device_id}/p/{request_id}/j"
+        )
@@ -3,14 +3,35 @@ from __future__ import annotations
 import asyncio
 import time
 from typing import TYPE_CHECKING
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import pytest
 
-from deebot_client.authentication import Authenticator, create_rest_config
+from deebot_client.authentication import (
+    Authenticator,
+    CredentialStore,
+    FileCredentialStore,
+    RetryPolicy,
+    _AuthClient,
+    create_rest_config,
+)
+from deebot_client.const import (
+    PATH_API_APPSVR_APP,
+    PATH_API_IOT_DEVMANAGER,
+    PATH_API_USERS_USER,
+)
+from deebot_client.exceptions import (
+    ApiCircuitOpenError,
+    ApiError,
+    ApiTimeoutError,
+    ApiUnauthorizedError,
+)
 from deebot_client.models import Credentials
+from deebot_client.util.traffic import TrafficKind, TrafficRecorder
 
 if TYPE_CHECKING:
+    from pathlib import Path
+
     from aiohttp import ClientSession
 
     from deebot_client.authentication import RestConfiguration
@@ -112,3 +133,247 @@ def test_config_override_rest_url(
     assert config.portal_url == expected_portal_url
     assert config.login_url == expected_login_url
     assert config.auth_code_url == expected_auth_code_url
+
+
+async def test_authenticator_authenticate_during_login(
+    rest_config: RestConfiguration,
+) -> None:
+    """Test that valid credentials are returned without waiting for a running login."""
+    with patch("deebot_client.authentication._AuthClient", spec_set=True) as api_client:
+        login_mock: AsyncMock = api_client.return_value.login
+        old_credentials = Credentials("token", "user_id", int(time.time() + 123456789))
+        new_credentials = Credentials(
+            "new_token", "user_id", int(time.time() + 123456789)
+        )
+        login_mock.return_value = old_credentials
+        authenticator = Authenticator(rest_config, "test", "test")
+        assert (await authenticator.authenticate()) == old_credentials
+
+        release_login = asyncio.Event()
+
+        async def login() -> Credentials:
+            await release_login.wait()
+            return new_credentials
+
+        login_mock.side_effect = login
+        refresh = asyncio.create_task(authenticator.authenticate(force=True))
+        await asyncio.sleep(0.01)
+
+        # The login is still running, but the old credentials are valid
+        async with asyncio.timeout(0.1):
+            assert (await authenticator.authenticate()) == old_credentials
+
+        release_login.set()
+        assert (await refresh) == new_credentials
+        assert (await authenticator.authenticate()) == new_credentials
+        await authenticator.teardown()
+
+
+async def test_file_credential_store(tmp_path: Path) -> None:
+    path = tmp_path / "credentials.json"
+    store = FileCredentialStore(path)
+    assert (await store.load()) is None
+
+    credentials = Credentials("token", "user_id", 123456789)
+    await store.save(credentials)
+    assert (await store.load()) == credentials
+    assert path.stat().st_mode & 0o777 == 0o600
+
+    await store.clear()
+    assert (await store.load()) is None
+    # clear is possible without any stored credentials
+    await store.clear()
+
+    path.write_text("invalid")
+    assert (await store.load()) is None
+
+
+@pytest.mark.parametrize(
+    ("stored_expires_in", "expect_login"),
+    [(123456789, False), (-1, True)],
+)
+async def test_authenticator_credential_store(
+    rest_config: RestConfiguration,
+    stored_expires_in: int,
+    *,
+    expect_login: bool,
+) -> None:
+    """Test that valid stored credentials are used instead of a login."""
+    stored_credentials = Credentials(
+        "stored_token", "user_id", int(time.time() + stored_expires_in)
+    )
+    store = Mock(spec_set=CredentialStore)
+    store.load.return_value = stored_credentials
+
+    with patch("deebot_client.authentication._AuthClient", spec_set=True) as api_client:
+        login_mock: AsyncMock = api_client.return_value.login
+        login_mock.return_value = Credentials(
+            "token", "user_id", int(time.time() + 123456789)
+        )
+        authenticator = Authenticator(
+            rest_config, "test", "test", credential_store=store
+        )
+
+        credentials = await authenticator.authenticate()
+        if expect_login:
+            assert credentials == login_mock.return_value
+            login_mock.assert_awaited_once()
+            store.save.assert_awaited_once_with(login_mock.return_value)
+        else:
+            assert credentials == stored_credentials
+            login_mock.assert_not_called()
+            store.save.assert_not_called()
+
+        await authenticator.teardown()
+
+
+async def test_authenticator_rejected_stored_credentials(
+    rest_config: RestConfiguration,
+) -> None:
+    """Test that rejected stored credentials will be replaced by a login."""
+    stored_credentials = Credentials(
+        "stored_token", "user_id", int(time.time() + 123456789)
+    )
+    store = Mock(spec_set=CredentialStore)
+    store.load.return_value = stored_credentials
+
+    with patch("deebot_client.authentication._AuthClient", spec_set=True) as api_client:
+        login_mock: AsyncMock = api_client.return_value.login
+        login_mock.return_value = Credentials(
+            "token", "user_id", int(time.time() + 123456789)
+        )
+        authenticator = Authenticator(
+            rest_config, "test", "test", credential_store=store
+        )
+        assert (await authenticator.authenticate()) == stored_credentials
+
+        await authenticator.handle_rejected_credentials(stored_credentials)
+        store.clear.assert_awaited_once()
+        login_mock.assert_awaited_once()
+        assert (await authenticator.authenticate()) == login_mock.return_value
+
+        # Credentials of a login are not touched
+        await authenticator.handle_rejected_credentials(login_mock.return_value)
+        login_mock.assert_awaited_once()
+
+        await authenticator.teardown()
+
+
+async def test_authenticator_post_rejected_stored_credentials(
+    rest_config: RestConfiguration,
+) -> None:
+    """Test that stored credentials rejected by the api will be replaced by a login."""
+    stored_credentials = Credentials(
+        "stored_token", "user_id", int(time.time() + 123456789)
+    )
+    store = Mock(spec_set=CredentialStore)
+    store.load.return_value = stored_credentials
+
+    with patch("deebot_client.authentication._AuthClient", spec_set=True) as api_client:
+        login_mock: AsyncMock = api_client.return_value.login
+        login_mock.return_value = Credentials(
+            "token", "user_id", int(time.time() + 123456789)
+        )
+        post_mock: AsyncMock = api_client.return_value.post
+        post_mock.side_effect = ApiUnauthorizedError
+        authenticator = Authenticator(
+            rest_config, "test", "test", credential_store=store
+        )
+
+        with pytest.raises(ApiUnauthorizedError):
+            await authenticator.post_authenticated("test", {})
+        store.clear.assert_awaited_once()
+        login_mock.assert_awaited_once()
+        assert (await authenticator.authenticate()) == login_mock.return_value
+
+        await authenticator.teardown()
+
+
+def test_retry_policy() -> None:
+    policy = RetryPolicy(base_delay=1, max_delay=3, budget_rate=1, budget_capacity=2)
+
+    for attempt, max_delay in ((0, 1), (1, 2), (2, 3), (5, 3)):
+        for _ in range(10):
+            assert 0 <= policy.get_delay(attempt) <= max_delay
+
+    assert policy.try_acquire_retry()
+    assert policy.try_acquire_retry()
+    # budget is exhausted
+    assert not policy.try_acquire_retry()
+
+
+async def test_auth_client_post_retry_and_circuit_breaker() -> None:
+    session = MagicMock()
+    response = MagicMock(status=503, reason="Service Unavailable")
+    session.post.return_value.__aenter__.return_value = response
+    config = create_rest_config(session, device_id="test", alpha_2_country="IT")
+    client = _AuthClient(
+        config,
+        "test",
+        "test",
+        retry_policy=RetryPolicy(base_delay=0, budget_capacity=2),
+    )
+
+    # The budget allows only 2 retries
+    with pytest.raises(ApiError):
+        await client.post("test", {})
+    assert session.post.call_count == 3
+
+    with pytest.raises(ApiError):
+        await client.post("test", {})
+    assert session.post.call_count == 4
+
+    # After 5 consecutive failures the circuit opens and the api is not called
+    session.post.reset_mock()
+    with pytest.raises(ApiError):
+        await client.post("test", {})
+    assert session.post.call_count == 1
+    with pytest.raises(ApiCircuitOpenError):
+        await client.post("test", {})
+    session.post.assert_called_once()
+
+    # Other paths are not affected
+    response.status = 200
+    response.json = AsyncMock(return_value={"code": 0})
+    assert await client.post("other", {}) == {"code": 0}
+
+    response.status = 401
+    with pytest.raises(ApiUnauthorizedError):
+        await client.post("other", {})
+
+
+async def test_auth_client_post_not_recording_credentials() -> None:
+    session = MagicMock()
+    response = MagicMock(status=200)
+    response.json = AsyncMock(return_value={"code": 0})
+    session.post.return_value.__aenter__.return_value = response
+    config = create_rest_config(session, device_id="test", alpha_2_country="IT")
+    recorder = Mock(spec_set=TrafficRecorder)
+    client = _AuthClient(config, "test", "test", recorder=recorder)
+
+    # Responses of the user api contain the credentials
+    await client.post(PATH_API_USERS_USER, {})
+    recorder.record.assert_not_called()
+
+    await client.post(PATH_API_APPSVR_APP, {})
+    recorder.record.assert_called_once_with(
+        TrafficKind.REST, PATH_API_APPSVR_APP, {"code": 0}, command=None
+    )
+
+    # Responses of device commands are recorded with the command name
+    recorder.reset_mock()
+    await client.post(PATH_API_IOT_DEVMANAGER, {"cmdName": "getBattery"})
+    recorder.record.assert_called_once_with(
+        TrafficKind.REST, PATH_API_IOT_DEVMANAGER, {"code": 0}, command="getBattery"
+    )
+
+
+@pytest.mark.parametrize("request_timeout", [0, -1])
+async def test_auth_client_post_no_time_left(request_timeout: float) -> None:
+    session = MagicMock()
+    config = create_rest_config(session, device_id="test", alpha_2_country="IT")
+    client = _AuthClient(config, "test", "test")
+
+    with pytest.raises(ApiTimeoutError):
+        await client.post("test", {}, request_timeout=request_timeout)
+    session.post.assert_not_called()
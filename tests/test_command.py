@@ -1,19 +1,37 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from types import MappingProxyType
 from typing import TYPE_CHECKING, Any
+from unittest.mock import Mock
 
 from aiohttp import ClientTimeout
 import pytest
 
-from deebot_client.command import Command, CommandMqttP2P, CommandResult, InitParam
+from deebot_client.command import (
+    Command,
+    CommandMqttP2P,
+    CommandResult,
+    DeviceCommandResult,
+    InitParam,
+    ResponseCache,
+)
+from deebot_client.commands.json import Charge, GetTotalStats, GetVolume, SetVolume
+from deebot_client.commands.json.map import GetMapSet, GetMapSubSet
 from deebot_client.const import DataType
-from deebot_client.exceptions import ApiTimeoutError, DeebotError
+from deebot_client.events import MapSetEvent, MapSetType, VolumeEvent
+from deebot_client.exceptions import (
+    ApiError,
+    ApiTimeoutError,
+    DeebotError,
+    MqttError,
+)
+from deebot_client.messages.json import OnBattery, ReportStats
+from deebot_client.mqtt_client import MqttClient
+from tests.helpers import get_request_json, get_success_body
 
 if TYPE_CHECKING:
-    from unittest.mock import Mock
-
     from deebot_client.event_bus import EventBus
     from deebot_client.models import ApiDeviceInfo
 
@@ -110,3 +128,219 @@ async def test_execute_api_timeout_error(
         logging.WARNING,
         "Could not execute command TestCommand: Timeout reached",
     ) in caplog.record_tuples
+
+
+async def test_execute_api_error(
+    authenticator: Mock,
+    api_device_info: ApiDeviceInfo,
+    event_bus_mock: Mock,
+) -> None:
+    """Test that a failed api request is reported as transport error."""
+    command = _TestCommand(1)
+    authenticator.post_authenticated.side_effect = ApiError("test")
+    result = await command.execute(authenticator, api_device_info, event_bus_mock)
+    assert result == DeviceCommandResult(device_reached=False, transport_error=True)
+
+
+def test_Command_hash() -> None:
+    """Test that equal commands with dict args have the same hash."""
+    command = GetMapSubSet(mid="1", msid="2", mssid="3")
+    same = GetMapSubSet(mid="1", msid="2", mssid="3")
+    other = GetMapSubSet(mid="1", msid="2", mssid="4")
+
+    assert command == same
+    assert hash(command) == hash(same)
+    assert command != other
+    assert {command: 1, same: 2, other: 3} == {command: 2, other: 3}
+
+
+async def test_execute_response_cache(
+    authenticator: Mock,
+    api_device_info: ApiDeviceInfo,
+    event_bus_mock: Mock,
+) -> None:
+    """Test that cached responses are handled without calling the api."""
+    response_cache = ResponseCache()
+    response = get_request_json(get_success_body({"volume": 2, "total": 10}))
+    authenticator.post_authenticated.return_value = response
+
+    for from_cache in (False, True):
+        result = await GetVolume().execute(
+            authenticator,
+            api_device_info,
+            event_bus_mock,
+            response_cache=response_cache,
+        )
+        assert result.raw_response == response
+        assert result.device_reached
+        assert result.from_cache is from_cache
+        event_bus_mock.notify.assert_called_once_with(VolumeEvent(2, 10))
+        event_bus_mock.reset_mock()
+
+    authenticator.post_authenticated.assert_awaited_once()
+
+    # A successful set command invalidates the response of the get command
+    authenticator.post_authenticated.return_value = get_request_json(get_success_body())
+    await SetVolume(3).execute(
+        authenticator, api_device_info, event_bus_mock, response_cache=response_cache
+    )
+    assert response_cache.get(GetVolume()) is None
+
+
+def test_ResponseCache_invalidate() -> None:
+    response_cache = ResponseCache()
+    command = GetVolume()
+    response = get_request_json(get_success_body({"volume": 2, "total": 10}))
+
+    # Commands without CACHE_TTL are not cached
+    response_cache.update(GetMapSet("1"), response)
+    assert response_cache.get(GetMapSet("1")) is None
+
+    response_cache.update(command, response)
+    assert response_cache.get(GetVolume()) == response
+
+    response_cache.invalidate(GetMapSet)
+    assert response_cache.get(command) == response
+
+    response_cache.invalidate(GetVolume)
+    assert response_cache.get(command) is None
+
+    response_cache.update(command, response)
+    response_cache.invalidate_by(Charge())
+    assert response_cache.get(command) is None
+
+
+def test_ResponseCache_invalidate_by_message() -> None:
+    response_cache = ResponseCache()
+    response = get_request_json(get_success_body())
+    response_cache.update(GetVolume(), response)
+    response_cache.update(GetTotalStats(), response)
+
+    response_cache.invalidate_by_message(OnBattery)
+    assert response_cache.get(GetVolume()) == response
+    assert response_cache.get(GetTotalStats()) == response
+
+    # onVolume is handled by the get command itself
+    response_cache.invalidate_by_message(GetVolume)
+    assert response_cache.get(GetVolume()) is None
+
+    response_cache.invalidate_by_message(ReportStats)
+    assert response_cache.get(GetTotalStats()) is None
+
+
+@pytest.mark.parametrize(
+    ("p2p_result", "expect_api_call"),
+    [
+        (
+            {"header": {}, "body": {"code": 0, "data": {"volume": 2, "total": 10}}},
+            False,
+        ),
+        (TimeoutError(), True),
+        (MqttError("Not connected"), True),
+    ],
+)
+async def test_execute_mqtt_p2p(
+    authenticator: Mock,
+    api_device_info: ApiDeviceInfo,
+    event_bus_mock: Mock,
+    p2p_result: dict[str, Any] | Exception,
+    *,
+    expect_api_call: bool,
+) -> None:
+    """Test that commands are sent over mqtt p2p with fallback to the api."""
+    mqtt_client = Mock(spec_set=MqttClient)
+    if isinstance(p2p_result, Exception):
+        mqtt_client.send_p2p_command.side_effect = p2p_result
+    else:
+        mqtt_client.send_p2p_command.return_value = p2p_result
+    authenticator.post_authenticated.return_value = get_request_json(
+        get_success_body({"volume": 2, "total": 10})
+    )
+
+    result = await GetVolume().execute(
+        authenticator, api_device_info, event_bus_mock, mqtt_client=mqtt_client
+    )
+
+    assert result.device_reached
+    mqtt_client.send_p2p_command.assert_awaited_once()
+    assert authenticator.post_authenticated.await_count == int(expect_api_call)
+    event_bus_mock.notify.assert_called_once_with(VolumeEvent(2, 10))
+
+
+async def test_execute_mqtt_p2p_timeout_not_idempotent(
+    authenticator: Mock,
+    api_device_info: ApiDeviceInfo,
+    event_bus_mock: Mock,
+) -> None:
+    """Test that a not idempotent command is not sent again after a p2p timeout."""
+    mqtt_client = Mock(spec_set=MqttClient)
+    mqtt_client.send_p2p_command.side_effect = TimeoutError
+
+    result = await SetVolume(3).execute(
+        authenticator, api_device_info, event_bus_mock, mqtt_client=mqtt_client
+    )
+
+    assert result == DeviceCommandResult(device_reached=False, timed_out=True)
+    mqtt_client.send_p2p_command.assert_awaited_once()
+    authenticator.post_authenticated.assert_not_awaited()
+
+
+async def test_execute_api_request_timeout(
+    authenticator: Mock,
+    api_device_info: ApiDeviceInfo,
+    event_bus_mock: Mock,
+) -> None:
+    """Test that the api request timeout is derived from the command deadline."""
+    authenticator.post_authenticated.return_value = get_request_json(
+        get_success_body({"volume": 2, "total": 10})
+    )
+
+    await GetVolume().execute(
+        authenticator, api_device_info, event_bus_mock, command_timeout=5
+    )
+
+    request_timeout = authenticator.post_authenticated.call_args.kwargs[
+        "request_timeout"
+    ]
+    assert 0 < request_timeout <= 5
+
+
+async def test_execute_command_timeout(
+    caplog: pytest.LogCaptureFixture,
+    authenticator: Mock,
+    api_device_info: ApiDeviceInfo,
+    event_bus_mock: Mock,
+) -> None:
+    """Test that the deadline of a command includes its requested commands."""
+    requested_command_cancelled = asyncio.Event()
+
+    async def post_authenticated(
+        _: str, payload: dict[str, Any], **__: Any
+    ) -> dict[str, Any]:
+        if payload["cmdName"] == GetMapSubSet.NAME:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                requested_command_cancelled.set()
+                raise
+        return get_request_json(
+            get_success_body(
+                {"type": "ar", "mid": "1", "msid": "2", "subsets": [{"mssid": "3"}]}
+            )
+        )
+
+    authenticator.post_authenticated.side_effect = post_authenticated
+
+    result = await GetMapSet("1").execute(
+        authenticator, api_device_info, event_bus_mock, command_timeout=0.1
+    )
+
+    assert not result.device_reached
+    assert result.timed_out
+    assert requested_command_cancelled.is_set()
+    event_bus_mock.notify.assert_called_once_with(MapSetEvent(MapSetType.ROOMS, [3]))
+    assert (
+        "deebot_client.command",
+        logging.WARNING,
+        "Could not execute command getMapSet: Timeout reached",
+    ) in caplog.record_tuples
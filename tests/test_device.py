@@ -3,13 +3,21 @@ from __future__ import annotations
 import asyncio
 from collections.abc import Callable
 import json
-from typing import TYPE_CHECKING
-from unittest.mock import Mock, patch
+from typing import TYPE_CHECKING, Any
+from unittest.mock import AsyncMock, Mock, patch
 
-from deebot_client.command import DeviceCommandResult
+import pytest
+
+from deebot_client.command import Command, DeviceCommandResult
 from deebot_client.commands.json.battery import GetBattery
+from deebot_client.commands.json.charge import Charge
+from deebot_client.commands.json.map import (
+    GetCachedMapInfo,
+    GetMapSet,
+    GetMapSubSet,
+)
 from deebot_client.device import Device
-from deebot_client.events import AvailabilityEvent
+from deebot_client.events import AvailabilityEvent, BatteryEvent
 from deebot_client.events.network import NetworkInfoEvent
 from deebot_client.models import DeviceInfo
 from deebot_client.mqtt_client import MqttClient, SubscriberInfo
@@ -37,7 +45,7 @@ async def test_available_check_and_teardown(
         assert received_statuses.get_nowait().available is expected
 
     # prepare mocks
-    battery_mock = Mock(spec_set=GetBattery)
+    battery_mock = Mock(spec_set=GetBattery, TIMEOUT=GetBattery.TIMEOUT)
 
     device_info = DeviceInfo(
         api_device_info, mock_static_device_info({AvailabilityEvent: [battery_mock]})
@@ -133,3 +141,350 @@ async def test_mac_address(
 
     assert device.mac == mac
     await device.teardown()
+
+
+async def test_devices_share_account_refresh_bucket(
+    authenticator: Authenticator, device_info: DeviceInfo
+) -> None:
+    """Test that all devices of an account share the refresh bucket of the authenticator."""
+    devices = [Device(device_info, authenticator) for _ in range(2)]
+
+    for device in devices:
+        assert (
+            device.events._refresh_scheduler._shared_bucket
+            is authenticator.refresh_bucket
+        )
+        await device.teardown()
+
+
+@pytest.mark.parametrize(
+    ("command", "expected_executions"),
+    [
+        (GetBattery(), 1),
+        (Charge(), 3),
+    ],
+)
+async def test_execute_command_coalescing(
+    authenticator: Authenticator,
+    device_info: DeviceInfo,
+    command: Command,
+    expected_executions: int,
+) -> None:
+    """Test that concurrent equal idempotent commands are only sent once."""
+    device = Device(device_info, authenticator)
+    # deactivate refresh event subscribe refresh calls
+    device.events._get_refresh_commands = lambda _: []
+    # and drop the refreshes requested on the subscriptions of the device itself
+    device.events._refresh_scheduler.clear()
+    release = asyncio.Event()
+    response = {"ret": "ok"}
+
+    async def execute(*_: Any, **__: Any) -> DeviceCommandResult:
+        await release.wait()
+        return DeviceCommandResult(device_reached=True, raw_response=response)
+
+    execute_mock = AsyncMock(side_effect=execute)
+    with patch.object(type(command), "execute", execute_mock):
+        tasks = [asyncio.create_task(device.execute_command(command)) for _ in range(3)]
+        await asyncio.sleep(0.1)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+    assert execute_mock.await_count == expected_executions
+    assert results == [response] * 3
+    assert not device._commands_in_flight
+    await device.teardown()
+
+
+async def test_teardown_cancels_commands_in_flight(
+    authenticator: Authenticator, device_info: DeviceInfo
+) -> None:
+    """Test that teardown cancels the coalesced commands in flight."""
+    device = Device(device_info, authenticator)
+    device.events._get_refresh_commands = lambda _: []
+    device.events._refresh_scheduler.clear()
+    cancelled = asyncio.Event()
+
+    async def execute(*_: Any, **__: Any) -> DeviceCommandResult:
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return DeviceCommandResult(device_reached=True)
+
+    with patch.object(GetBattery, "execute", AsyncMock(side_effect=execute)):
+        task = asyncio.create_task(device.execute_command(GetBattery()))
+        await asyncio.sleep(0.1)
+        assert device._commands_in_flight
+
+        await device.teardown()
+
+    assert cancelled.is_set()
+    assert not device._commands_in_flight
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.parametrize(
+    ("result", "expected_limit"),
+    [
+        (DeviceCommandResult(device_reached=True), 3),
+        (DeviceCommandResult(device_reached=False), 3),
+        (DeviceCommandResult(device_reached=False, timed_out=True), 1),
+        (DeviceCommandResult(device_reached=False, transport_error=True), 1),
+    ],
+)
+async def test_send_command_limiter_failures(
+    authenticator: Authenticator,
+    device_info: DeviceInfo,
+    result: DeviceCommandResult,
+    expected_limit: int,
+) -> None:
+    """Test that only timed out commands and transport errors decrease the limit."""
+    device = Device(device_info, authenticator)
+    # deactivate refresh event subscribe refresh calls
+    device.events._get_refresh_commands = lambda _: []
+    # and drop the refreshes requested on the subscriptions of the device itself
+    device.events._refresh_scheduler.clear()
+
+    with patch.object(Charge, "execute", AsyncMock(return_value=result)):
+        await device.execute_command(Charge())
+
+    assert device.limiter.limit == expected_limit
+    assert device.limiter.in_flight == 0
+    await device.teardown()
+
+
+async def test_send_command_limiter_recovers(
+    authenticator: Authenticator, device_info: DeviceInfo
+) -> None:
+    """Test that the limit recovers after a failure with successful commands."""
+    device = Device(device_info, authenticator)
+    device.events._get_refresh_commands = lambda _: []
+    device.events._refresh_scheduler.clear()
+
+    execute_mock = AsyncMock(
+        return_value=DeviceCommandResult(device_reached=False, transport_error=True)
+    )
+    with patch.object(Charge, "execute", execute_mock):
+        await device.execute_command(Charge())
+        assert device.limiter.limit == 1
+
+        execute_mock.return_value = DeviceCommandResult(device_reached=True)
+        for _ in range(5):
+            await device.execute_command(Charge())
+
+    assert device.limiter.limit == 3
+    await device.teardown()
+
+
+async def test_requested_commands_planner(
+    authenticator: Authenticator, device_info: DeviceInfo
+) -> None:
+    """Test that requested commands are executed by a bounded amount of workers."""
+    device = Device(device_info, authenticator)
+    # deactivate refresh event subscribe refresh calls
+    device.events._get_refresh_commands = lambda _: []
+    # and drop the refreshes requested on the subscriptions of the device itself
+    device.events._refresh_scheduler.clear()
+    subsets = [GetMapSubSet(mid="1", msid="2", mssid=i) for i in range(5)]
+    executed: list[Command] = []
+    running = max_running = 0
+
+    async def execute(
+        command: Command,
+        *_: Any,
+        schedule_command: Callable[[Command], None] | None = None,
+        **__: Any,
+    ) -> DeviceCommandResult:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        executed.append(command)
+        if isinstance(command, GetMapSet):
+            assert schedule_command
+            # The duplicate is skipped
+            for subset in [*subsets, subsets[0]]:
+                schedule_command(subset)
+        running -= 1
+        return DeviceCommandResult(device_reached=True)
+
+    with patch.object(Command, "execute", autospec=True, side_effect=execute):
+        # Returns after all requested commands are done
+        await device.execute_command(GetMapSet("1"))
+
+    assert executed[0] == GetMapSet("1")
+    assert len(executed) == len(subsets) + 1
+    assert set(executed[1:]) == set(subsets)
+    assert max_running == 2
+    await device.teardown()
+
+
+async def test_execute_command_waits_for_requested_cascade(
+    authenticator: Authenticator, device_info: DeviceInfo
+) -> None:
+    """Test that requested commands of requested commands are awaited too."""
+    device = Device(device_info, authenticator)
+    # deactivate refresh event subscribe refresh calls
+    device.events._get_refresh_commands = lambda _: []
+    # and drop the refreshes requested on the subscriptions of the device itself
+    device.events._refresh_scheduler.clear()
+    map_sets = [GetMapSet(str(i)) for i in range(3)]
+    executed: list[Command] = []
+
+    async def execute(
+        command: Command,
+        *_: Any,
+        schedule_command: Callable[[Command], None] | None = None,
+        **__: Any,
+    ) -> DeviceCommandResult:
+        await asyncio.sleep(0.01)
+        executed.append(command)
+        assert schedule_command
+        if isinstance(command, GetCachedMapInfo):
+            for map_set in map_sets:
+                schedule_command(map_set)
+        elif isinstance(command, GetMapSet):
+            for i in range(3):
+                schedule_command(
+                    GetMapSubSet(mid=map_sets.index(command), msid="1", mssid=i)
+                )
+        return DeviceCommandResult(device_reached=True)
+
+    with patch.object(Command, "execute", autospec=True, side_effect=execute):
+        await device.execute_command(GetCachedMapInfo())
+
+    assert len(executed) == 1 + 3 + 9
+    assert isinstance(executed[-1], GetMapSubSet)
+    await device.teardown()
+
+
+async def test_requested_commands_deadline(
+    authenticator: Authenticator, device_info: DeviceInfo
+) -> None:
+    """Test that requested commands inherit the deadline of the requesting one."""
+    device = Device(device_info, authenticator)
+    # deactivate refresh event subscribe refresh calls
+    device.events._get_refresh_commands = lambda _: []
+    # and drop the refreshes requested on the subscriptions of the device itself
+    device.events._refresh_scheduler.clear()
+    command_timeouts: list[float] = []
+
+    async def execute(
+        command: Command,
+        *_: Any,
+        schedule_command: Callable[[Command], None] | None = None,
+        command_timeout: float,
+        **__: Any,
+    ) -> DeviceCommandResult:
+        command_timeouts.append(command_timeout)
+        if isinstance(command, GetMapSet):
+            assert schedule_command
+            for i in range(5):
+                schedule_command(GetMapSubSet(mid="1", msid="2", mssid=i))
+        else:
+            await asyncio.sleep(0.2)
+        return DeviceCommandResult(device_reached=True)
+
+    with patch.object(Command, "execute", autospec=True, side_effect=execute):
+        start = asyncio.get_running_loop().time()
+        await device.execute_command(GetMapSet("1"), command_timeout=0.1)
+        assert asyncio.get_running_loop().time() - start < 0.2
+        await asyncio.sleep(0.3)
+
+    # Only the requested commands started by the workers before the deadline
+    assert len(command_timeouts) == 3
+    assert all(timeout <= 0.1 for timeout in command_timeouts)
+    await device.teardown()
+
+
+async def test_send_command_deadline_reached_in_limiter(
+    authenticator: Authenticator, device_info: DeviceInfo
+) -> None:
+    """Test that commands expiring while waiting for the limiter are not sent."""
+    device = Device(device_info, authenticator)
+    # deactivate refresh event subscribe refresh calls
+    device.events._get_refresh_commands = lambda _: []
+    # and drop the refreshes requested on the subscriptions of the device itself
+    device.events._refresh_scheduler.clear()
+    release = asyncio.Event()
+    executed: list[Command] = []
+
+    async def execute(command: Command, *_: Any, **__: Any) -> DeviceCommandResult:
+        executed.append(command)
+        await release.wait()
+        return DeviceCommandResult(device_reached=True)
+
+    with patch.object(Command, "execute", autospec=True, side_effect=execute):
+        # Occupy all slots of the device
+        busy = [
+            asyncio.create_task(device.execute_command(Charge(), command_timeout=5))
+            for _ in range(device.limiter.limit)
+        ]
+        await asyncio.sleep(0.05)
+        expired = [
+            asyncio.create_task(device._execute_command(Charge(), command_timeout=0.2))
+            for _ in range(3)
+        ]
+        results = await asyncio.gather(*expired)
+        release.set()
+        await asyncio.gather(*busy)
+
+    assert len(executed) == 3
+    assert all(result.timed_out for result in results)
+    assert device.command_timeouts[Charge.NAME] == 3
+    assert device.limiter.limit == 3
+    assert device.limiter.in_flight == 0
+    await device.teardown()
+
+
+async def test_send_command_cached_result_not_measured(
+    authenticator: Authenticator, device_info: DeviceInfo
+) -> None:
+    """Test that cached results don't adapt the limit."""
+    device = Device(device_info, authenticator)
+    # deactivate refresh event subscribe refresh calls
+    device.events._get_refresh_commands = lambda _: []
+    # and drop the refreshes requested on the subscriptions of the device itself
+    device.events._refresh_scheduler.clear()
+    device.limiter.release = Mock(wraps=device.limiter.release)  # type: ignore[method-assign]
+
+    result = DeviceCommandResult(device_reached=True, from_cache=True)
+    with patch.object(GetBattery, "execute", AsyncMock(return_value=result)):
+        await device.execute_command(GetBattery())
+
+    device.limiter.release.assert_not_called()
+    assert device.limiter.in_flight == 0
+    await device.teardown()
+
+
+async def test_inject_response(
+    authenticator: Authenticator, device_info: DeviceInfo
+) -> None:
+    """Test that injected api responses are handled by the command."""
+    device = Device(device_info, authenticator)
+    device.events._get_refresh_commands = lambda _: []
+    device.events._refresh_scheduler.clear()
+    events: list[BatteryEvent] = []
+
+    async def on_battery(event: BatteryEvent) -> None:
+        events.append(event)
+
+    device.events.subscribe(BatteryEvent, on_battery)
+    response = {
+        "ret": "ok",
+        "resp": {"header": {"fwVer": "1.2.3"}, "body": {"data": {"value": 80}}},
+    }
+
+    device.inject_response("getBattery", response)
+    # Failed responses and commands without message handling are ignored
+    device.inject_response("getBattery", {"ret": "fail", "errno": 500})
+    device.inject_response("GetCleanLogs", {"ret": "ok", "logs": []})
+    device.inject_response("unknown", response)
+    await block_till_done(device.events._tasks)
+
+    assert events == [BatteryEvent(80)]
+    assert device.fw_version == "1.2.3"
+    await device.teardown()
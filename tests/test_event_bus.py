@@ -7,15 +7,22 @@ from unittest.mock import AsyncMock, call, patch
 
 import pytest
 
-from deebot_client.events import AvailabilityEvent, BatteryEvent, StateEvent
+from deebot_client.event_bus import EventBus
+from deebot_client.events import (
+    AvailabilityEvent,
+    BatteryEvent,
+    LifeSpanEvent,
+    StateEvent,
+    TotalStatsEvent,
+)
 from deebot_client.events.map import MapChangedEvent
 from deebot_client.events.water_info import WaterInfoEvent
 from deebot_client.models import State
+from deebot_client.util import TokenBucket
 
 if TYPE_CHECKING:
     from collections.abc import Callable
 
-    from deebot_client.event_bus import EventBus
     from deebot_client.events.base import Event
 
 
@@ -244,3 +251,75 @@ async def test_teardown(event_bus: EventBus, execute_mock: AsyncMock) -> None:
     assert handle is not None
     assert handle.cancelled() is True
     assert len(event_bus._tasks) == 0
+
+
+async def test_request_refresh_priority(
+    execute_mock: AsyncMock, event_bus: EventBus
+) -> None:
+    """Test that refreshes with a higher priority are executed first."""
+    for event in (LifeSpanEvent, TotalStatsEvent, BatteryEvent):
+        event_bus.subscribe(event, AsyncMock())
+
+    await asyncio.sleep(0.1)
+
+    expected_order = [
+        *event_bus._get_refresh_commands(BatteryEvent),
+        *event_bus._get_refresh_commands(LifeSpanEvent),
+        *event_bus._get_refresh_commands(TotalStatsEvent),
+    ]
+    assert execute_mock.call_args_list == [call(cmd) for cmd in expected_order]
+
+
+async def test_request_refresh_rate_limited(
+    execute_mock: AsyncMock, event_bus: EventBus
+) -> None:
+    """Test that refreshes are throttled by the device token bucket."""
+    with patch(
+        "deebot_client.event_bus._create_device_refresh_bucket",
+        return_value=TokenBucket(rate=1, capacity=1),
+    ):
+        bus = EventBus(execute_mock, event_bus._get_refresh_commands)
+
+    bus.subscribe(BatteryEvent, AsyncMock())
+    bus.subscribe(StateEvent, AsyncMock())
+    await asyncio.sleep(0.1)
+
+    # Initial refreshes are not throttled
+    _verify_event_command_called(execute_mock, BatteryEvent, bus, expected_call=True)
+    _verify_event_command_called(execute_mock, StateEvent, bus, expected_call=True)
+    execute_mock.reset_mock()
+
+    bus.request_refresh(BatteryEvent)
+    bus.request_refresh(StateEvent)
+    await asyncio.sleep(0.1)
+
+    _verify_event_command_called(execute_mock, BatteryEvent, bus, expected_call=True)
+    _verify_event_command_called(execute_mock, StateEvent, bus, expected_call=False)
+
+    await bus.teardown()
+
+
+async def test_request_refresh_shared_bucket(
+    execute_mock: AsyncMock, event_bus: EventBus
+) -> None:
+    """Test that the injected refresh bucket is shared by all buses."""
+    bucket = TokenBucket(rate=1, capacity=1)
+    buses = [
+        EventBus(execute_mock, event_bus._get_refresh_commands, refresh_bucket=bucket)
+        for _ in range(2)
+    ]
+    for bus in buses:
+        bus.subscribe(BatteryEvent, AsyncMock())
+    await asyncio.sleep(0.1)
+    execute_mock.reset_mock()
+
+    for bus in buses:
+        bus.request_refresh(BatteryEvent)
+    await asyncio.sleep(0.1)
+
+    assert execute_mock.await_count == len(
+        event_bus._get_refresh_commands(BatteryEvent)
+    )
+
+    for bus in buses:
+        await bus.teardown()
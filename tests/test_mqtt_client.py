@@ -6,23 +6,34 @@ import json
 import logging
 import ssl
 from typing import TYPE_CHECKING, Any
-from unittest.mock import DEFAULT, MagicMock, Mock, patch
+from unittest.mock import DEFAULT, AsyncMock, MagicMock, Mock, patch
 
 from aiomqtt import Client, Message, MqttError as AioMqttError
 from cachetools import TTLCache
+from paho.mqtt.client import ConnectFlags
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.reasoncodes import ReasonCode
 import pytest
 
 from deebot_client.commands.json.battery import GetBattery
 from deebot_client.commands.json.volume import SetVolume
 from deebot_client.const import UNDEFINED, DataType, UndefinedType
 from deebot_client.exceptions import AuthenticationError, MqttError
-from deebot_client.mqtt_client import MqttClient, MqttConfiguration, create_mqtt_config
+from deebot_client.models import DeviceInfo
+from deebot_client.mqtt_client import (
+    MqttClient,
+    MqttConfiguration,
+    SubscriberInfo,
+    _get_reconnect_delay,
+    _MessageDispatcher,
+    create_mqtt_config,
+)
 
 from .mqtt_util import subscribe, verify_subscribe
 
 if TYPE_CHECKING:
     from deebot_client.authentication import Authenticator
-    from deebot_client.models import ApiDeviceInfo, DeviceInfo
+    from deebot_client.models import ApiDeviceInfo
 
 
 @pytest.mark.docker
@@ -46,6 +57,232 @@ async def test_last_message_received_at(
         assert mqtt_client.last_message_received_at == expected
 
 
+@pytest.mark.parametrize(
+    ("topic", "expected_handler", "expected_split"),
+    [
+        (
+            "iot/atr/onBattery/did/get_class/resource/j",
+            "_handle_atr",
+            ["iot", "atr", "onBattery", "did", "get_class/resource/j"],
+        ),
+        (
+            "iot/p2p/getBattery/test/test/test/did/get_class/resource/q/req/j",
+            "_handle_p2p",
+            "iot/p2p/getBattery/test/test/test/did/get_class/resource/q/req/j".split(
+                "/"
+            ),
+        ),
+        ("iot/cfg/test", None, None),
+        ("iot/atr", None, None),
+        ("/test", None, None),
+    ],
+)
+def test_handle_message_routing(
+    authenticator: Authenticator,
+    topic: str,
+    expected_handler: str | None,
+    expected_split: list[str] | None,
+) -> None:
+    """Test that messages are routed to the handler of the topic."""
+    with patch.multiple(MqttClient, _handle_atr=DEFAULT, _handle_p2p=DEFAULT) as mocks:
+        client = MqttClient(
+            create_mqtt_config(device_id="123", country="IT"), authenticator
+        )
+        client._handle_message(
+            Message(topic, b"{}", 0, retain=False, mid=1, properties=None)
+        )
+
+    for name, mock in mocks.items():
+        if name == expected_handler:
+            mock.assert_called_once_with(expected_split, b"{}")
+        else:
+            mock.assert_not_called()
+
+
+async def test_pending_subscriptions_batched(
+    authenticator: Authenticator, device_info: DeviceInfo
+) -> None:
+    """Test that pending subscription changes are sent in batched packets."""
+    mqtt_client = MqttClient(
+        create_mqtt_config(device_id="123", country="IT"), authenticator
+    )
+    infos = [
+        SubscriberInfo(
+            DeviceInfo({**device_info.api, "did": f"did{i}"}, device_info.static),
+            Mock(),
+            Mock(),
+        )
+        for i in range(3)
+    ]
+    connection = mqtt_client._connections[0]
+    for info in infos:
+        connection.change_subscription(info, add=True)
+    # Only the last change of a device is relevant
+    connection.change_subscription(infos[1], add=False)
+
+    client = AsyncMock(spec_set=Client)
+    with patch("deebot_client.mqtt_client._SUBSCRIBE_BATCH_SIZE", 4):
+        task = asyncio.create_task(connection._pending_subscriptions_worker(client))
+        await connection._subscription_changes.join()
+        task.cancel()
+
+    # 3 topics per device
+    assert [len(call.args[0]) for call in client.subscribe.call_args_list] == [4, 2]
+    assert len(client.unsubscribe.call_args_list[0].args[0]) == 3
+    assert set(mqtt_client._subscriptions) == {"did0", "did2"}
+
+
+async def test_sharded_connections(authenticator: Authenticator) -> None:
+    """Test that the devices are distributed consistently on the connections."""
+    dids = [f"did{i}" for i in range(100)]
+
+    def get_shards(connections: int) -> dict[str, int]:
+        mqtt_client = MqttClient(
+            create_mqtt_config(device_id="123", country="IT", connections=connections),
+            authenticator,
+        )
+        return {
+            did: mqtt_client._connections.index(mqtt_client._get_connection(did))
+            for did in dids
+        }
+
+    shards = get_shards(4)
+    assert shards == get_shards(4)
+    assert set(shards.values()) == {0, 1, 2, 3}
+
+    # Adding a connection only moves devices to the new connection
+    assert all(shard in (shards[did], 4) for did, shard in get_shards(5).items())
+
+    mqtt_client = MqttClient(
+        create_mqtt_config(device_id="123", country="IT", connections=2),
+        authenticator,
+    )
+    client_ids = [
+        (await connection._get_client())._client._client_id
+        for connection in mqtt_client._connections
+    ]
+    assert client_ids == [b"user_id@ecouser/123", b"user_id@ecouser/123-1"]
+
+
+def test_config_connections_invalid() -> None:
+    with pytest.raises(MqttError, match="At least one connection is required"):
+        create_mqtt_config(device_id="123", country="IT", connections=0)
+
+
+async def test_message_dispatcher() -> None:
+    """Test that messages are processed in order per device."""
+    processed: list[str] = []
+    release = asyncio.Event()
+
+    async def process(message: Message) -> None:
+        if message.topic.value == "did1/0":
+            await release.wait()
+        processed.append(message.topic.value)
+
+    def dispatch(topic: str) -> None:
+        dispatcher.dispatch(
+            topic.split("/")[0],
+            Message(topic, b"", 0, retain=False, mid=1, properties=None),
+        )
+
+    dispatcher = _MessageDispatcher(process, max_queue_size=2, max_workers=2)
+    dispatch("did1/0")
+    await asyncio.sleep(0.01)
+    for topic in ("did1/1", "did1/2", "did2/0"):
+        dispatch(topic)
+    await asyncio.sleep(0.01)
+
+    # The blocked device doesn't delay the other one
+    assert processed == ["did2/0"]
+    assert dispatcher.queue_depth == 2
+    assert dispatcher.lag > 0
+
+    release.set()
+    await asyncio.sleep(0.01)
+    assert processed == ["did2/0", "did1/0", "did1/1", "did1/2"]
+    assert dispatcher.queue_depth == 0
+    assert dispatcher.lag == 0
+
+    await dispatcher.teardown()
+
+
+async def test_message_dispatcher_full_queue() -> None:
+    """Test that only state messages are coalesced on a full queue."""
+    processed: list[str] = []
+    release = asyncio.Event()
+    blocking = "iot/atr/onBattery/did1/0/res/j"
+    battery = "iot/atr/onBattery/did1/class/res/j"
+    minor_map = "iot/atr/onMinorMap/did1/class/res/j"
+    stats = "iot/atr/onStats/did1/class/res/j"
+
+    async def process(message: Message) -> None:
+        if message.topic.value == blocking:
+            await release.wait()
+        processed.append(f"{message.topic.value}:{message.payload!r}")
+
+    def dispatch(topic: str, payload: bytes) -> None:
+        dispatcher.dispatch(
+            "did1", Message(topic, payload, 0, retain=False, mid=1, properties=None)
+        )
+
+    dispatcher = _MessageDispatcher(process, max_queue_size=3, max_workers=1)
+    dispatch(blocking, b"")
+    await asyncio.sleep(0.01)
+    dispatch(minor_map, b"0")
+    dispatch(battery, b"1")
+    dispatch(minor_map, b"2")
+
+    # The newer state message supersedes the queued one
+    dispatch(battery, b"3")
+    assert dispatcher.coalesced == 1
+    # but map pieces are never replaced, the oldest message is dropped instead
+    dispatch(minor_map, b"4")
+    assert dispatcher.coalesced == 1
+    assert dispatcher.dropped == 1
+    dispatch(stats, b"5")
+    assert dispatcher.dropped == 2
+
+    release.set()
+    await asyncio.sleep(0.01)
+    assert processed[1:] == [
+        f"{battery}:b'3'",
+        f"{minor_map}:b'4'",
+        f"{stats}:b'5'",
+    ]
+    await dispatcher.teardown()
+
+
+async def test_message_dispatcher_worker_pool() -> None:
+    """Test that the devices are processed by a bounded number of workers."""
+    running = max_running = 0
+    processed: list[str] = []
+
+    async def process(message: Message) -> None:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        processed.append(message.topic.value)
+        running -= 1
+
+    dispatcher = _MessageDispatcher(process, max_queue_size=10, max_workers=2)
+    topics = [f"did{device}/{i}" for i in range(3) for device in range(4)]
+    for topic in topics:
+        dispatcher.dispatch(
+            topic.split("/")[0],
+            Message(topic, b"", 0, retain=False, mid=1, properties=None),
+        )
+    await asyncio.sleep(0.2)
+
+    assert max_running == 2
+    assert sorted(processed) == sorted(topics)
+    for device in range(4):
+        assert [t for t in processed if t.startswith(f"did{device}/")] == [
+            f"did{device}/{i}" for i in range(3)
+        ]
+    await dispatcher.teardown()
+
+
 @pytest.mark.docker
 async def test_client_bot_subscription(
     mqtt_client: MqttClient, device_info: DeviceInfo, test_mqtt_client: Client
@@ -300,6 +537,73 @@ async def test_p2p_parse_error(
     ) in caplog.record_tuples
 
 
+@pytest.mark.docker
+async def test_send_p2p_command(
+    mqtt_client: MqttClient, device_info: DeviceInfo, test_mqtt_client: Client
+) -> None:
+    """Test sending a command over p2p and receiving the response."""
+    await subscribe(mqtt_client, device_info)
+    api = device_info.api
+    command_name = GetBattery.NAME
+    response = {"header": {"pri": 1}, "body": {"code": 0, "data": {"value": 100}}}
+    await test_mqtt_client.subscribe(
+        f"iot/p2p/{command_name}/+/+/+/{api['did']}/{api['class']}/{api['resource']}/q/+/j"
+    )
+
+    async def respond() -> None:
+        async for message in test_mqtt_client.messages:
+            request_id = message.topic.value.split("/")[10]
+            await _publish_p2p(
+                command_name,
+                api,
+                response,
+                request_id,
+                test_mqtt_client,
+                is_request=False,
+            )
+            return
+
+    task = asyncio.create_task(respond())
+    result = await mqtt_client.send_p2p_command(
+        command_name, {"header": {"pri": 1}}, api, DataType.JSON
+    )
+    await task
+
+    assert result == response
+    assert not mqtt_client._pending_p2p_requests
+    assert not mqtt_client._received_p2p_commands
+
+
+@pytest.mark.docker
+@patch("deebot_client.mqtt_client.P2P_TIMEOUT", 0.1)
+async def test_send_p2p_command_timeout(
+    mqtt_client: MqttClient, device_info: DeviceInfo
+) -> None:
+    """Test that a TimeoutError is raised if no response is received."""
+    await subscribe(mqtt_client, device_info)
+
+    with pytest.raises(TimeoutError):
+        await mqtt_client.send_p2p_command(
+            GetBattery.NAME, {}, device_info.api, DataType.JSON
+        )
+
+    assert not mqtt_client._pending_p2p_requests
+
+
+@pytest.mark.docker
+async def test_send_p2p_command_not_connected(
+    mqtt_config: MqttConfiguration,
+    authenticator: Authenticator,
+    device_info: DeviceInfo,
+) -> None:
+    mqtt_client = MqttClient(mqtt_config, authenticator)
+
+    with pytest.raises(MqttError, match="Not connected"):
+        await mqtt_client.send_p2p_command(
+            GetBattery.NAME, {}, device_info.api, DataType.JSON
+        )
+
+
 @pytest.mark.docker
 @pytest.mark.parametrize(
     ("exception_to_raise", "expected_log_message"),
@@ -319,10 +623,11 @@ async def test_mqtt_task_exceptions(
     caplog: pytest.LogCaptureFixture,
 ) -> None:
     with patch(
-        "deebot_client.mqtt_client.Client",
+        "deebot_client.mqtt_client._Client",
         MagicMock(side_effect=[exception_to_raise, DEFAULT]),
     ):
         mqtt_client = MqttClient(mqtt_config, authenticator)
+        connection = mqtt_client._connections[0]
 
         await mqtt_client.connect()
         await asyncio.sleep(0.1)
@@ -333,13 +638,13 @@ async def test_mqtt_task_exceptions(
             expected_log_message,
         ) in caplog.record_tuples
 
-        assert mqtt_client._mqtt_task
-        assert mqtt_client._mqtt_task.done()
+        assert connection._mqtt_task
+        assert connection._mqtt_task.done()
 
         await mqtt_client.connect()
         await asyncio.sleep(0.1)
 
-        assert not mqtt_client._mqtt_task.done()
+        assert not connection._mqtt_task.done()
 
 
 @pytest.mark.parametrize(
@@ -420,7 +725,7 @@ def test_config_override_mqtt_url_invalid(
 
 
 async def test_verify_config(authenticator: Authenticator) -> None:
-    with patch("deebot_client.mqtt_client.Client", autospec=True) as client_mock:
+    with patch("deebot_client.mqtt_client._Client", autospec=True) as client_mock:
         client = MqttClient(
             create_mqtt_config(
                 device_id="123",
@@ -434,7 +739,7 @@ async def test_verify_config(authenticator: Authenticator) -> None:
 
 
 async def test_verify_config_fails(authenticator: Authenticator) -> None:
-    with patch("deebot_client.mqtt_client.Client", autospec=True) as client_mock:
+    with patch("deebot_client.mqtt_client._Client", autospec=True) as client_mock:
         client_mock.return_value.__aenter__.side_effect = AioMqttError
         client = MqttClient(
             create_mqtt_config(
@@ -448,3 +753,58 @@ async def test_verify_config_fails(authenticator: Authenticator) -> None:
             await client.verify_config()
 
         client_mock.return_value.__aenter__.assert_called()
+
+
+@pytest.mark.parametrize(
+    ("attempt", "expected_max_delay"), [(0, 5), (1, 10), (3, 40), (10, 300)]
+)
+def test_get_reconnect_delay(attempt: int, expected_max_delay: float) -> None:
+    for _ in range(10):
+        assert (
+            expected_max_delay / 2
+            <= _get_reconnect_delay(attempt)
+            <= expected_max_delay
+        )
+
+
+@pytest.mark.parametrize("persistent_session", [True, False])
+async def test_persistent_session(
+    authenticator: Authenticator,
+    device_info: DeviceInfo,
+    *,
+    persistent_session: bool,
+) -> None:
+    """Test that a persistent session is requested and the resumption detected."""
+    mqtt_client = MqttClient(
+        create_mqtt_config(
+            device_id="123", country="IT", persistent_session=persistent_session
+        ),
+        authenticator,
+    )
+    client = await mqtt_client._get_client()
+    assert not client.session_present
+    assert client._client._clean_session is not persistent_session
+
+    # The connect callback of paho is the extended one
+    assert client._client.on_connect == client._on_connect
+    client._on_connect(
+        client._client,
+        None,
+        ConnectFlags(session_present=persistent_session),
+        ReasonCode(PacketTypes.CONNACK, "Success"),
+    )
+    assert client.session_present is persistent_session
+
+    # Subscriptions of a persistent session use QoS 1
+    connection = mqtt_client._connections[0]
+    connection.change_subscription(
+        SubscriberInfo(device_info, Mock(), Mock()), add=True
+    )
+    client_mock = AsyncMock(spec_set=Client)
+    task = asyncio.create_task(connection._pending_subscriptions_worker(client_mock))
+    await connection._subscription_changes.join()
+    task.cancel()
+    expected_qos = 1 if persistent_session else 0
+    for call in client_mock.subscribe.call_args_list:
+        assert all(qos == expected_qos for _, qos in call.args[0])
+    client_mock.subscribe.assert_awaited()
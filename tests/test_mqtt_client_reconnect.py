@@ -51,11 +51,12 @@ async def test_client_reconnect_on_broker_error(
     mqtt_server.stop()
     await asyncio.sleep(0.1)
 
-    assert (
-        "deebot_client.mqtt_client",
-        logging.WARNING,
-        "Connection lost; Reconnecting in 5 seconds ...",
-    ) in caplog.record_tuples
+    assert any(
+        name == "deebot_client.mqtt_client"
+        and level == logging.WARNING
+        and message.startswith("Connection lost; Reconnecting in ")
+        for name, level, message in caplog.record_tuples
+    )
     caplog.clear()
 
     mqtt_server.run()
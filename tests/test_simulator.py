@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+from unittest.mock import Mock
+
+import pytest
+
+from deebot_client.api_client import ApiClient
+from deebot_client.authentication import Authenticator
+from deebot_client.commands.json import GetBattery, GetMajorMap
+from deebot_client.device import Device
+from deebot_client.events import BatteryEvent, MajorMapEvent
+from deebot_client.mqtt_client import MqttClient
+from deebot_client.rs.util import decompress_7z_base64_data
+from deebot_client.util import md5
+
+from .simulator import CloudSimulator, compress_7z_base64_data, create_bots
+from .simulator.broker import _SubscriptionTree
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine
+
+    from aiohttp import ClientSession
+
+
+@pytest.mark.parametrize(
+    ("topic_filter", "topic", "expected"),
+    [
+        ("iot/atr/+/did/cls/res/j", "iot/atr/onBattery/did/cls/res/j", True),
+        ("iot/atr/+/did/cls/res/j", "iot/atr/onBattery/other/cls/res/j", False),
+        ("iot/p2p/+/+/+/+/did/cls/res/#", "iot/p2p/a/b/c/d/did/cls/res/q/1/j", True),
+        ("iot/atr/#", "iot/p2p/onBattery", False),
+        ("iot/atr/+", "iot/atr/onBattery/did", False),
+        ("iot/#", "iot", True),
+    ],
+)
+def test_subscription_tree(topic_filter: str, topic: str, *, expected: bool) -> None:
+    tree = _SubscriptionTree()
+    session = Mock()
+    tree.add(topic_filter, session)
+    tree.add("other/#", Mock())
+    assert tree.match(topic) == ({session} if expected else set())
+
+    tree.remove(topic_filter, session)
+    assert tree.match(topic) == set()
+
+
+def test_compress_7z_base64_data() -> None:
+    data = bytes(range(256)) * 40
+    assert decompress_7z_base64_data(compress_7z_base64_data(data)) == data
+
+
+async def test_simulator(session: ClientSession) -> None:
+    bots = create_bots(3)
+    async with CloudSimulator(bots) as simulator:
+        authenticator = Authenticator(
+            simulator.create_rest_config(session), "user", md5("password")
+        )
+        devices = await ApiClient(authenticator).get_devices()
+        assert [d.api["did"] for d in devices.mqtt] == [bot.did for bot in bots]
+
+        mqtt_client = MqttClient(simulator.create_mqtt_config(), authenticator)
+        battery_events: asyncio.Queue[BatteryEvent] = asyncio.Queue()
+
+        async def on_battery(event: BatteryEvent) -> None:
+            await battery_events.put(event)
+
+        device = Device(devices.mqtt[0], authenticator)
+        # Commands of this device are sent over the api
+        api_device = Device(devices.mqtt[1], authenticator)
+        await device.initialize(mqtt_client, use_p2p_transport=True)
+        await api_device.initialize(mqtt_client)
+        device.events.subscribe(BatteryEvent, on_battery)
+        try:
+            async with asyncio.timeout(5):
+                await simulator.wait_for_subscriptions(bots[:2])
+
+            # Initial refresh on subscribing
+            async with asyncio.timeout(5):
+                assert (await battery_events.get()).value == bots[0].battery
+
+            # Request over mqtt p2p
+            api_requests = simulator.api_requests
+            bots[0].battery = 21
+            await device.execute_command(GetBattery())
+            assert (await battery_events.get()).value == 21
+            assert simulator.api_requests == api_requests
+
+            # Status pushed over the atr channel
+            bots[0].battery = 42
+            assert simulator.push_status(bots[:1]) == 3
+            async with asyncio.timeout(5):
+                assert (await battery_events.get()).value == 42
+
+            # Request over the api
+            major_map_events: asyncio.Queue[MajorMapEvent] = asyncio.Queue()
+
+            async def on_major_map(event: MajorMapEvent) -> None:
+                await major_map_events.put(event)
+
+            api_device.events.subscribe(MajorMapEvent, on_major_map)
+            await api_device.execute_command(GetMajorMap())
+            event = await major_map_events.get()
+            assert event.map_id == bots[1].map_id
+            assert len(event.values) == 64
+            assert simulator.api_requests > api_requests
+        finally:
+            await device.teardown()
+            await api_device.teardown()
+            await mqtt_client.disconnect()
+
+
+async def test_simulator_many_bots(session: ClientSession) -> None:
+    """Load test with many bots on multiple mqtt connections."""
+    bots = create_bots(200)
+    async with CloudSimulator(bots) as simulator:
+        authenticator = Authenticator(
+            simulator.create_rest_config(session), "user", md5("password")
+        )
+        devices = await ApiClient(authenticator).get_devices()
+        assert len(devices.mqtt) == len(bots)
+
+        mqtt_client = MqttClient(
+            simulator.create_mqtt_config(connections=4), authenticator
+        )
+        batteries: dict[str, int] = {}
+        battery_changed = asyncio.Event()
+
+        def create_on_battery(
+            did: str,
+        ) -> Callable[[BatteryEvent], Coroutine[Any, Any, None]]:
+            async def on_battery(event: BatteryEvent) -> None:
+                batteries[did] = event.value
+                battery_changed.set()
+
+            return on_battery
+
+        async def wait_for_batteries() -> None:
+            expected = {bot.did: bot.battery for bot in bots}
+            async with asyncio.timeout(10):
+                while batteries != expected:
+                    battery_changed.clear()
+                    await battery_changed.wait()
+
+        bot_devices = [Device(info, authenticator) for info in devices.mqtt]
+        try:
+            for device in bot_devices:
+                await device.initialize(mqtt_client, use_p2p_transport=True)
+                device.events.subscribe(
+                    BatteryEvent, create_on_battery(device.device_info["did"])
+                )
+            async with asyncio.timeout(10):
+                await simulator.wait_for_subscriptions()
+
+            # Initial refreshes of all bots
+            await wait_for_batteries()
+
+            # Status pushed by all bots at once
+            for i, bot in enumerate(bots):
+                bot.battery = i % 100
+            assert simulator.push_status() == 3 * len(bots)
+            await wait_for_batteries()
+
+            # Concurrent requests of all bots over mqtt p2p
+            api_requests = simulator.api_requests
+            for bot in bots:
+                bot.battery = 100 - bot.battery
+            async with asyncio.timeout(10):
+                await asyncio.gather(
+                    *(device.execute_command(GetBattery()) for device in bot_devices)
+                )
+            await wait_for_batteries()
+            assert simulator.api_requests == api_requests
+
+            assert mqtt_client.message_drops == 0
+            assert all(not device.command_timeouts for device in bot_devices)
+        finally:
+            for device in bot_devices:
+                await device.teardown()
+            await mqtt_client.disconnect()
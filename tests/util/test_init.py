@@ -1,9 +1,20 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from typing import Any
+from unittest.mock import patch
 
-from deebot_client.util import cancel, create_task
+import pytest
+
+from deebot_client.util import (
+    AdaptiveLimiter,
+    CircuitBreaker,
+    CircuitState,
+    TokenBucket,
+    cancel,
+    create_task,
+)
 
 
 async def test_create_task_and_cancel() -> None:
@@ -35,3 +46,130 @@ async def test_create_task_and_cancel() -> None:
     for task in _tasks:
         assert task.cancelled()
         assert task.done()
+
+
+async def test_token_bucket() -> None:
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    # bucket is empty
+    assert not bucket.try_acquire()
+
+    start = time.monotonic()
+    await bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_token_bucket_invalid() -> None:
+    with pytest.raises(ValueError, match="rate must be positive"):
+        TokenBucket(rate=0, capacity=1)
+
+
+async def test_adaptive_limiter() -> None:
+    limiter = AdaptiveLimiter(2, max_limit=3, latency_threshold=1)
+
+    await limiter.acquire()
+    await limiter.acquire()
+    # limit is reached
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    assert limiter.in_flight == 2
+
+    # fast successful calls increase the limit additively
+    limiter.release(0.1)
+    await asyncio.sleep(0.01)
+    assert waiter.done()
+    assert limiter.limit == 2
+    assert limiter.in_flight == 2
+    limiter.release(0.1)
+    limiter.release(0.1)
+    assert limiter.limit == 3
+    assert limiter.in_flight == 0
+
+    # failed or slow calls decrease the limit multiplicatively
+    await limiter.acquire()
+    limiter.release(2)
+    assert limiter.limit == 1
+
+    with pytest.raises(RuntimeError):
+        async with limiter.slot():
+            raise RuntimeError
+    assert limiter.limit == 1
+    assert limiter.in_flight == 0
+
+    # unmeasured calls don't change the limit
+    await limiter.acquire()
+    limiter.release_unmeasured()
+    assert limiter.limit == 1
+    assert limiter.in_flight == 0
+
+
+async def test_adaptive_limiter_priority() -> None:
+    limiter = AdaptiveLimiter(1, max_limit=1, latency_threshold=1, aging_interval=1)
+    order: list[str] = []
+
+    async def acquire(name: str, priority: int) -> None:
+        await limiter.acquire(priority)
+        order.append(name)
+
+    now = 100.0
+    # Patch only the time module used by the limiter as asyncio uses it too
+    with patch("deebot_client.util.time") as time_mock:
+        time_mock.monotonic.side_effect = lambda: now
+        await limiter.acquire()
+        tasks = [asyncio.create_task(acquire("bulk_old", 3))]
+        await asyncio.sleep(0.01)
+
+        # The old bulk waiter gets a higher priority than a new normal one
+        now += 1.5
+        tasks += [
+            asyncio.create_task(acquire("bulk", 3)),
+            asyncio.create_task(acquire("normal", 2)),
+            asyncio.create_task(acquire("interactive", 1)),
+        ]
+        await asyncio.sleep(0.01)
+
+        for _ in tasks:
+            limiter.release(0.1)
+            await asyncio.sleep(0.01)
+
+    assert order == ["interactive", "bulk_old", "normal", "bulk"]
+    assert limiter.in_flight == 1
+
+
+def test_adaptive_limiter_invalid() -> None:
+    with pytest.raises(ValueError, match="limits must satisfy"):
+        AdaptiveLimiter(3, min_limit=1, max_limit=2, latency_threshold=1)
+
+
+def test_circuit_breaker() -> None:
+    now = 100.0
+    with patch("deebot_client.util.time.monotonic", side_effect=lambda: now):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+        breaker.record_failure()
+        assert breaker.allow_request()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.allow_request()
+
+        breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN
+        assert not breaker.allow_request()
+
+        # Only a single probe is allowed after the reset timeout
+        now += 10
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+        # A failed probe opens the circuit again
+        breaker.record_failure()
+        assert not breaker.allow_request()
+
+        now += 10
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.allow_request()
+        assert breaker.allow_request()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import sys
+from typing import Any, TypedDict
+from unittest.mock import patch
+
+import pytest
+
+from deebot_client.util.json import (
+    _get_codec,
+    create_typed_loads,
+    json_dumps,
+    json_loads,
+)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"header": {"pri": 1}, "body": {"data": {"value": 100, "isLow": 0}}},
+        [1, "a", None, True, 1.5],
+        "test",
+    ],
+)
+def test_json_roundtrip(value: Any) -> None:
+    dumped = json_dumps(value)
+    assert isinstance(dumped, str)
+    assert json_loads(dumped) == value
+    assert json_loads(dumped.encode()) == value
+    assert json_loads(bytearray(dumped.encode())) == value
+
+
+def test_json_dumps_non_str_keys() -> None:
+    assert json_loads(json_dumps({1: "a"})) == {"1": "a"}
+
+
+def test_stdlib_fallback() -> None:
+    with patch.dict(sys.modules, {"orjson": None, "msgspec": None}):
+        name, loads, dumps = _get_codec()
+
+    assert name == "json"
+    assert loads(b'{"a": [1]}') == {"a": [1]}
+    assert loads(dumps({"a": [1]})) == {"a": [1]}
+
+
+class _Data(TypedDict):
+    value: int
+
+
+def test_create_typed_loads() -> None:
+    pytest.importorskip("msgspec")
+    loads = create_typed_loads(list[_Data])
+
+    # Keys, which are not declared, are skipped
+    assert loads(b'[{"value": 1, "isLow": 0}]') == [{"value": 1}]
+    # Payloads, which don't match the type, are decoded untyped
+    assert loads('[{"value": "1"}]') == [{"value": "1"}]
+    # and only then with the generic loads
+    with patch(
+        "deebot_client.util.json.json_loads", side_effect=json_loads
+    ) as json_loads_mock:
+        loads(b'[{"value": 1}]')
+        json_loads_mock.assert_not_called()
+        loads(b'[{"value": "1"}]')
+        json_loads_mock.assert_called_once_with(b'[{"value": "1"}]')
+
+
+def test_create_typed_loads_without_msgspec() -> None:
+    with patch.dict(sys.modules, {"msgspec": None}):
+        loads = create_typed_loads(list[_Data])
+
+    assert loads is json_loads
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from unittest.mock import Mock, patch
+
+from deebot_client.util.traffic import (
+    TrafficKind,
+    TrafficRecord,
+    TrafficRecorder,
+    get_device_handler,
+    read_records,
+    replay,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_record_and_read(tmp_path: Path) -> None:
+    path = tmp_path / "traffic.jsonl"
+    recorder = TrafficRecorder(path)
+    recorder.record(TrafficKind.MQTT, "iot/atr/onBattery/did/cls/res/j", b'{"a":1}')
+    recorder.record(TrafficKind.REST, "appsvr/app.do", {"code": 0})
+    recorder.record(
+        TrafficKind.REST, "iot/devmanager.do", {"ret": "ok"}, command="getBattery"
+    )
+    recorder.close()
+    # Records of older versions have no command
+    with path.open("a", encoding="utf-8") as file:
+        file.write('[1, "rest", "appsvr/app.do", "{}"]\n')
+
+    records = list(read_records(path))
+    assert [(r.kind, r.name, r.payload, r.command) for r in records] == [
+        (TrafficKind.MQTT, "iot/atr/onBattery/did/cls/res/j", '{"a":1}', None),
+        (TrafficKind.REST, "appsvr/app.do", '{"code":0}', None),
+        (TrafficKind.REST, "iot/devmanager.do", '{"ret":"ok"}', "getBattery"),
+        (TrafficKind.REST, "appsvr/app.do", "{}", None),
+    ]
+
+
+async def test_replay() -> None:
+    records = [
+        TrafficRecord(100, TrafficKind.MQTT, "iot/atr/onBattery/did/cls/res/j", "1"),
+        TrafficRecord(101, TrafficKind.REST, "appsvr/app.do", "2"),
+        TrafficRecord(102, TrafficKind.MQTT, "iot/atr/onStats/did/cls/res/j", "3"),
+        TrafficRecord(
+            103, TrafficKind.REST, "iot/devmanager.do", '{"ret":"ok"}', "getBattery"
+        ),
+    ]
+    handle = Mock(side_effect=[None, Exception("test"), None, None])
+
+    with patch("deebot_client.util.traffic.asyncio.sleep") as sleep:
+        assert await replay(records, handle) == 4
+        sleep.assert_not_called()
+
+        assert await replay(records, Mock(), speed=100) == 4
+        assert sleep.call_count == 3
+
+    device = Mock()
+    handle_device = get_device_handler(device)
+    for record in records:
+        handle_device(record)
+    assert [c.args for c in device.inject_message.call_args_list] == [
+        ("onBattery", "1"),
+        ("onStats", "3"),
+    ]
+    device.inject_response.assert_called_once_with("getBattery", {"ret": "ok"})